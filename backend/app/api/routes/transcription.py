@@ -7,15 +7,17 @@ management.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Body, BackgroundTasks
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from functools import lru_cache
 from typing import Dict, List, Optional
 import logging
 import os
 import json
 from datetime import datetime
 import uuid
+import orjson
 
-from app.services.transcription import TranscriptionService
+from app.services.transcription import TranscriptionRequest, TranscriptionService
 from app.services.identity_verification import IdentityVerificationService
 from app.core.security import get_current_user, verify_court_role
 from app.core.config import settings
@@ -24,10 +26,18 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # Initialize services
-transcription_service = TranscriptionService(
-    model_path=settings.TRANSCRIPTION_MODEL_PATH,
-    speaker_model_path=settings.SPEAKER_MODEL_PATH
-)
+@lru_cache(maxsize=None)
+def get_transcription_service() -> TranscriptionService:
+    """
+    Get the shared transcription service, creating it on first use.
+    
+    Creating it loads the speech models, so it happens in the app's startup
+    handler or on first use rather than on import.
+    """
+    return TranscriptionService(
+        model_path=settings.TRANSCRIPTION_MODEL_PATH,
+        speaker_model_path=settings.SPEAKER_MODEL_PATH
+    )
 
 identity_service = IdentityVerificationService(
     config_path=settings.IDENTITY_CONFIG_PATH
@@ -45,7 +55,10 @@ async def transcribe_real_time(
     
     Args:
         audio_file: Audio data from the court proceeding
-        session_metadata: Metadata about the court session
+        session_metadata: Metadata about the court session. Segments with
+            the same session_id are decoded as one stream; set "is_final":
+            true on the last segment of a recording so its held-back audio
+            is transcribed and the stream state released
         
     Returns:
         Transcription results
@@ -69,9 +82,9 @@ async def transcribe_real_time(
         }
         
         # Process the audio
-        result = await transcription_service.transcribe_audio(
+        result = await get_transcription_service().transcribe_audio(
             audio_data=audio_data,
-            metadata=full_metadata
+            request=TranscriptionRequest.from_metadata(full_metadata)
         )
         
         logger.info(f"Successfully transcribed audio segment for session {session_metadata.get('session_id')}")
@@ -81,6 +94,56 @@ async def transcribe_real_time(
         logger.error(f"Error transcribing audio: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/real-time/stream")
+async def transcribe_real_time_stream(
+    audio_file: UploadFile = File(...),
+    session_metadata: Dict = Body(...),
+    current_user: Dict = Depends(get_current_user),
+    authorized: bool = Depends(verify_court_role(["judge", "stenographer", "clerk"]))
+):
+    """
+    Transcribe a real-time audio segment, streaming partial results.
+    
+    Args:
+        audio_file: Audio data from the court proceeding
+        session_metadata: Metadata about the court session. Segments with
+            the same session_id are decoded as one stream; set "is_final":
+            true on the last segment of a recording so its held-back audio
+            is transcribed and the stream state released
+        
+    Returns:
+        Newline-delimited JSON results, partial ones first and the final
+        result (with "is_final": true) last, or a {"detail": ...} line if
+        transcription fails
+    """
+    if not authorized:
+        raise HTTPException(
+            status_code=403,
+            detail="You are not authorized to access real-time transcription"
+        )
+    
+    # Read audio data
+    audio_data = await audio_file.read()
+    
+    # Add additional metadata
+    request = TranscriptionRequest.from_metadata({
+        **session_metadata,
+        "timestamp": datetime.now().isoformat(),
+        "user_id": current_user.get("id"),
+        "user_role": current_user.get("role")
+    })
+    
+    async def results():
+        try:
+            async for result in get_transcription_service().transcribe_audio_stream(audio_data, request):
+                yield orjson.dumps(result) + b"\n"
+        except Exception as e:
+            # The response has started, so the error is sent as the last line
+            logger.error(f"Error transcribing audio: {str(e)}", exc_info=True)
+            yield orjson.dumps({"detail": str(e)}) + b"\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @router.post("/identify-speaker", response_model=Dict)
 async def identify_speaker(
     audio_file: UploadFile = File(...),
@@ -109,7 +172,7 @@ async def identify_speaker(
         audio_data = await audio_file.read()
         
         # Identify the speaker
-        result = await transcription_service.identify_speaker(
+        result = await get_transcription_service().identify_speaker(
             audio_segment=audio_data,
             known_speakers=known_speakers
         )
@@ -151,7 +214,7 @@ async def anonymize_transcript(
     
     try:
         # Anonymize the transcript
-        anonymized = await transcription_service.anonymize_transcript(
+        anonymized = await get_transcription_service().anonymize_transcript(
             transcript=transcript,
             entities_to_anonymize=entities_to_anonymize
         )
@@ -195,7 +258,7 @@ async def save_transcript(
         }
         
         # Save the transcript
-        output_path = await transcription_service.save_transcript(
+        output_path = await get_transcription_service().save_transcript(
             transcript_data=full_transcript_data,
             output_format=output_format
         )
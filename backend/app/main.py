@@ -5,10 +5,11 @@ This module configures and starts the FastAPI application that serves
 as the backend for the NigeriaJustice.AI system.
 """
 
+import asyncio
 import logging
 from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 import time
 import os
 from typing import Dict
@@ -26,6 +27,7 @@ from app.api.routes import (
 )
 from app.core.config import settings
 from app.core.security import get_current_user, verify_api_key
+from app.services.virtual_court import get_virtual_court_service
 
 # Configure logging
 logging.basicConfig(
@@ -47,8 +49,22 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/api/docs" if os.getenv("ENVIRONMENT") != "production" else None,
     redoc_url="/api/redoc" if os.getenv("ENVIRONMENT") != "production" else None,
+    # Service responses are large nested dicts; orjson encodes them much faster
+    default_response_class=ORJSONResponse,
 )
 
+# Create the transcription service (loading its speech models) before
+# serving, off the event loop, so the first request doesn't pay for it
+@app.on_event("startup")
+async def load_models():
+    await asyncio.to_thread(transcription.get_transcription_service)
+
+# Write virtual court session changes still waiting for a coalesced save
+@app.on_event("shutdown")
+async def flush_sessions():
+    if get_virtual_court_service.cache_info().currsize:
+        await get_virtual_court_service().close()
+
 # Add middleware for timing requests
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
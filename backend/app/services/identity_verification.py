@@ -361,6 +361,29 @@ class IdentityVerificationService:
             logger.warning(f"Court official verification failed: {official_id}")
             return False, {"error": "Court official not found or invalid"}
     
+    async def verify_credential(self, identity_data: Dict) -> Tuple[bool, Dict]:
+        """
+        Verify whichever identity credential is provided.
+        
+        Args:
+            identity_data: Dict with a "nin", "passport" or "court_official_id"
+                (and optional "expected_role") credential
+            
+        Returns:
+            Tuple of (is_verified, person_data)
+        """
+        if "nin" in identity_data:
+            return await self.verify_nin(identity_data["nin"])
+        elif "passport" in identity_data:
+            return await self.verify_passport(identity_data["passport"])
+        elif "court_official_id" in identity_data:
+            return await self.verify_court_official(
+                identity_data["court_official_id"],
+                identity_data.get("expected_role")
+            )
+        else:
+            return False, {"error": "No recognized identity credential provided"}
+    
     async def comprehensive_verification(self, 
                                        identity_data: Dict) -> Dict:
         """
@@ -0,0 +1,58 @@
+"""
+Model Quantization Utility for NigeriaJustice.AI
+
+This module converts exported ONNX speech recognition and speaker embedding
+models to INT8 with dynamic quantization, for CPU-only court deployments.
+Quantized models are saved with a ".int8.onnx" suffix, which the speech
+backends recognize and load with CPU-tuned session options.
+
+Usage:
+    python -m app.services.model_quantization models/asr.onnx models/speaker.onnx
+"""
+
+import argparse
+import logging
+from typing import List, Optional
+
+from app.services.speech_backends import INT8_MODEL_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+def quantize_model(model_path: str, output_path: Optional[str] = None) -> str:
+    """
+    Quantize an ONNX model's weights to INT8.
+    
+    Activations are quantized dynamically at inference time, so no
+    calibration data is needed.
+    
+    Args:
+        model_path: Path to the full-precision ONNX model
+        output_path: Path for the quantized model (defaults to the model
+                     path with a ".int8.onnx" suffix)
+        
+    Returns:
+        Path to the quantized model
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    
+    if output_path is None:
+        base = model_path[:-len(".onnx")] if model_path.endswith(".onnx") else model_path
+        output_path = base + INT8_MODEL_SUFFIX
+    
+    quantize_dynamic(model_path, output_path, weight_type=QuantType.QInt8)
+    
+    logger.info("Quantized %s to %s", model_path, output_path)
+    return output_path
+
+def main(argv: Optional[List[str]] = None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Quantize ONNX speech models to INT8")
+    parser.add_argument("models", nargs="+", help="Paths to ONNX models to quantize")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO)
+    for model_path in args.models:
+        quantize_model(model_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,864 @@
+"""
+Virtual Court Session Storage for NigeriaJustice.AI
+
+This module provides the storage backends used by the virtual court service
+to persist session documents. The JSON file store keeps one file per session
+with a SQLite search index beside them;
+the SQLite store keeps indexed session rows plus an append-only events table,
+so appending an event never rewrites the session's event history.
+
+The store is selected with the VIRTUAL_COURT_STORE environment variable
+("json" or "sqlite", defaulting to "json").
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Protocol, Sequence, Tuple
+
+try:
+    import orjson
+except ImportError:  # Optional accelerator; falls back to the stdlib json module
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Search index kept beside the JSON session files
+SEARCH_INDEX_FILE = "sessions_idx.sqlite"
+
+# Suffix of the summary file written beside each session file
+SUMMARY_SUFFIX = ".summary.json"
+
+# Suffix of the append-only event log written beside each session file
+EVENTS_SUFFIX = ".events.jsonl"
+
+# Number of worker threads reading session files during a search
+SESSION_LOAD_CONCURRENCY = 32
+
+# Number of session summaries a search loads at a time
+SEARCH_BATCH_SIZE = 512
+
+# Trigram full-text index of participant names, keyed by the rowid of the
+# session's row, so name searches probe an index instead of scanning every
+# session (needs SQLite 3.34 or later)
+PARTICIPANT_SEARCH_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS participant_search USING fts5(names, tokenize='trigram')"
+)
+
+# Indent session files for reading by hand (development only)
+PRETTY_SESSION_FILES = os.getenv("VIRTUAL_COURT_PRETTY_JSON", "").lower() in ("1", "true")
+
+def dump_session_json(session: Dict, indent: bool = False) -> bytes:
+    """Serialize a session document as UTF-8 JSON, compact unless indent is set"""
+    # Session data is only read back by the service, so skip indentation
+    if orjson is not None:
+        return orjson.dumps(session, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(session, indent=2).encode("utf-8")
+    return json.dumps(session, separators=(",", ":")).encode("utf-8")
+
+def load_session_json(data: bytes) -> Dict:
+    """Parse a serialized session document"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def participant_names(session: Dict) -> str:
+    """Get a session's lower-cased participant names, one per line, for substring searches"""
+    return "\n".join(p.get("name", "").lower() for p in session.get("participants", []))
+
+def search_fields(session: Dict) -> Tuple:
+    """
+    Get the searchable fields of a session.
+
+    Returns:
+        (status, case_number, judge_id, scheduled_date, scheduled_time,
+        created_at, participant_names)
+    """
+    schedule = session.get("schedule", {})
+    return (
+        session.get("status"),
+        session.get("case", {}).get("number"),
+        session.get("presiding_judge", {}).get("id"),
+        schedule.get("date"),
+        schedule.get("time"),
+        session.get("created_at"),
+        participant_names(session),
+    )
+
+def session_summary(session: Dict) -> Dict:
+    """
+    Get the part of a session that searches filter, sort and return.
+
+    Args:
+        session: Full session document
+
+    Returns:
+        Session summary
+    """
+    participants = session.get("participants", [])
+    return {
+        "id": session.get("id"),
+        "status": session.get("status"),
+        "created_at": session.get("created_at"),
+        "case": session.get("case"),
+        "schedule": session.get("schedule"),
+        "schedule_key": session.get("schedule_key"),
+        "presiding_judge": session.get("presiding_judge"),
+        "participant_names": participant_names(session),
+        "participants_count": len(participants),
+        "metadata": session.get("metadata"),
+    }
+
+# Search parameters answered by equality on an indexed column
+SEARCH_COLUMNS = (
+    ("status", "status"),
+    ("case_number", "case_number"),
+    ("judge_id", "judge_id"),
+)
+
+def search_conditions(search_params: Dict, participant_search: bool = False) -> Tuple[List[str], List]:
+    """
+    Translate search parameters into SQL conditions on the indexed columns.
+
+    Args:
+        search_params: Search parameters
+        participant_search: Whether the participant_search index is available
+
+    Returns:
+        (clauses, args) to be joined with AND
+    """
+    clauses, args = [], []
+    for param, column in SEARCH_COLUMNS:
+        if param in search_params:
+            clauses.append(f"{column} = ?")
+            args.append(search_params[param])
+    if "date_from" in search_params:
+        clauses.append("scheduled_date >= ?")
+        args.append(search_params["date_from"])
+    if "date_to" in search_params:
+        clauses.append("scheduled_date <= ?")
+        args.append(search_params["date_to"])
+    if "participant_name" in search_params:
+        participant_name = search_params["participant_name"].lower()
+        if participant_search:
+            # Substring match through the trigram index, with LIKE
+            # wildcards in the name taken literally
+            for char in "\\%_":
+                participant_name = participant_name.replace(char, "\\" + char)
+            clauses.append("rowid IN (SELECT rowid FROM participant_search WHERE names LIKE ? ESCAPE '\\')")
+            args.append(f"%{participant_name}%")
+        else:
+            clauses.append("instr(participant_names, ?) > 0")
+            args.append(participant_name)
+    return clauses, args
+
+def search_order(search_params: Dict) -> Tuple[str, List]:
+    """
+    Translate the sort and limit search parameters into SQL.
+
+    Ordering and limiting in the database means a limited search only
+    loads the sessions it returns.
+
+    Returns:
+        (ORDER BY and LIMIT clauses, args) to append to the query
+    """
+    direction = "DESC" if search_params.get("sort_order", "desc") == "desc" else "ASC"
+    sort_by = search_params.get("sort_by", "scheduled_date")
+    if sort_by == "scheduled_date":
+        sql = f" ORDER BY scheduled_date {direction}, scheduled_time {direction}"
+    elif sort_by == "created_at":
+        sql = f" ORDER BY created_at {direction}"
+    else:
+        sql = ""
+
+    limit = search_params.get("limit")
+    if limit and limit > 0:
+        return sql + " LIMIT ?", [limit]
+    return sql, []
+
+class SessionStore(Protocol):
+    """Persistent storage for virtual court session documents"""
+
+    async def version(self, session_id: str) -> Optional[int]:
+        """
+        Get a token that changes whenever the stored session changes.
+
+        Returns:
+            The version, or None if the session does not exist
+        """
+        ...
+
+    async def load(self, session_id: str) -> Optional[Tuple[int, Dict]]:
+        """
+        Load a session.
+
+        Returns:
+            (version, session), or None if the session does not exist
+        """
+        ...
+
+    async def save(self, session: Dict) -> int:
+        """
+        Save a session.
+
+        Returns:
+            The new version of the session
+        """
+        ...
+
+    async def save_fields(self, session: Dict, fields: Sequence[str]) -> int:
+        """
+        Save changes to some fields of a session, plus any new events.
+
+        Stores that cannot update part of a session save all of it.
+
+        Args:
+            session: Session with the changes applied
+            fields: Dotted paths of the changed fields, e.g. "schedule.date"
+
+        Returns:
+            The new version of the session
+        """
+        ...
+
+    def query(self, search_params: Dict) -> AsyncIterator[Dict]:
+        """
+        Stream the summaries of the sessions that may match search parameters.
+
+        Stores narrow the candidates with whatever filters they can apply
+        cheaply; the caller still applies every filter. A store may also
+        sort and limit the results as search_order describes, but only if
+        it applies every filter itself. Summaries are loaded in batches, so
+        memory use does not grow with the number of sessions.
+
+        Yields:
+            Session summaries, see session_summary
+        """
+        ...
+
+    async def close(self) -> None:
+        """Release the store's resources"""
+        ...
+
+class JsonFileSessionStore:
+    """
+    One JSON file per session in a directory.
+
+    A session's events are appended to <session_id>.events.jsonl, one JSON
+    document per line, rather than stored in the session file, so recording
+    an event costs one line instead of rewriting the session's history.
+    Session files written before the log existed keep their embedded events
+    until they are next saved.
+
+    The searchable fields of every session are also kept in a SQLite index
+    beside the files, so a search only reads the sessions that can match,
+    and then only their small <session_id>.summary.json companion files.
+    """
+
+    INDEX_SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS session_index (
+            id TEXT PRIMARY KEY,
+            status TEXT,
+            case_number TEXT,
+            judge_id TEXT,
+            scheduled_date TEXT,
+            scheduled_time TEXT,
+            created_at TEXT,
+            participant_names TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_session_index_status_schedule ON session_index (status, scheduled_date, scheduled_time)",
+        "CREATE INDEX IF NOT EXISTS idx_session_index_case_number ON session_index (case_number)",
+        "CREATE INDEX IF NOT EXISTS idx_session_index_judge_id ON session_index (judge_id)",
+        "CREATE INDEX IF NOT EXISTS idx_session_index_schedule ON session_index (scheduled_date, scheduled_time)",
+        "CREATE INDEX IF NOT EXISTS idx_session_index_created_at ON session_index (created_at)",
+    )
+
+    def __init__(self, storage_path: str):
+        """
+        Initialize the store.
+
+        Args:
+            storage_path: Directory holding the session files
+        """
+        self.storage_path = storage_path
+        os.makedirs(self.storage_path, exist_ok=True)
+
+        # Directory prefix of every session's files
+        self._path_prefix = os.path.join(self.storage_path, "")
+
+        index_path = os.path.join(self.storage_path, SEARCH_INDEX_FILE)
+        rebuild_index = not os.path.exists(index_path)
+        self._index = sqlite3.connect(index_path, check_same_thread=False)
+        self._index_lock = threading.Lock()
+
+        # Number of events and size of each event log last seen, and the
+        # lock serializing appends
+        self._event_logs: Dict[str, Tuple[int, int]] = {}
+        self._events_lock = threading.Lock()
+
+        # Parsed summaries by session ID with the summary file's mtime, so
+        # repeated searches only stat the summaries of unchanged sessions
+        self._summaries: Dict[str, Tuple[int, Dict]] = {}
+        for statement in self.INDEX_SCHEMA:
+            self._index.execute(statement)
+        self._participant_search = self._create_participant_search()
+
+        # Index any sessions saved before the index existed
+        if rebuild_index:
+            self._rebuild_index()
+        self._index.commit()
+
+    def _session_file(self, session_id: str) -> str:
+        return f"{self._path_prefix}{session_id}.json"
+
+    def _summary_file(self, session_id: str) -> str:
+        return f"{self._path_prefix}{session_id}{SUMMARY_SUFFIX}"
+
+    def _events_file(self, session_id: str) -> str:
+        return f"{self._path_prefix}{session_id}{EVENTS_SUFFIX}"
+
+    def _rebuild_index(self) -> None:
+        """Index every session file in the directory"""
+        with os.scandir(self.storage_path) as entries:
+            session_files = [
+                entry.path for entry in entries
+                if entry.name.endswith(".json") and not entry.name.endswith(SUMMARY_SUFFIX) and entry.is_file()
+            ]
+        for filename in session_files:
+            session = self._load_file(filename)
+            if session is not None:
+                self._index_session(self._index_row(session))
+        logger.info("Indexed %s virtual court session files", len(session_files))
+
+    def _create_participant_search(self) -> bool:
+        """
+        Create the participant name index, filling it if it is new.
+
+        Returns:
+            Whether the index is available
+        """
+        exists = self._index.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'participant_search'"
+        ).fetchone()
+        try:
+            self._index.execute(PARTICIPANT_SEARCH_SCHEMA)
+        except sqlite3.OperationalError as e:
+            logger.warning("Participant name index unavailable, names will be scanned: %s", e)
+            return False
+        if not exists:
+            self._index.execute(
+                "INSERT INTO participant_search (rowid, names) SELECT rowid, participant_names FROM session_index"
+            )
+        return True
+
+    def _index_row(self, session: Dict) -> Tuple:
+        """Get a session's row in the search index"""
+        return (session.get("id"), *search_fields(session))
+
+    def _index_session(self, row: Tuple) -> None:
+        """Record a session's searchable fields in the index"""
+        with self._index_lock:
+            if self._participant_search:
+                self._index.execute(
+                    "DELETE FROM participant_search WHERE rowid IN (SELECT rowid FROM session_index WHERE id = ?)",
+                    (row[0],)
+                )
+            cursor = self._index.execute("INSERT OR REPLACE INTO session_index VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+            if self._participant_search:
+                self._index.execute(
+                    "INSERT INTO participant_search (rowid, names) VALUES (?, ?)", (cursor.lastrowid, row[-1])
+                )
+
+    async def version(self, session_id: str) -> Optional[int]:
+        # The newest modification time of the session file and its event
+        # log identifies the stored revision
+        try:
+            version = os.stat(self._session_file(session_id)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        try:
+            return max(version, os.stat(self._events_file(session_id)).st_mtime_ns)
+        except FileNotFoundError:
+            return version
+
+    async def load(self, session_id: str) -> Optional[Tuple[int, Dict]]:
+        return await asyncio.to_thread(self._read_session_sync, session_id)
+
+    def _read_session_sync(self, session_id: str) -> Optional[Tuple[int, Dict]]:
+        try:
+            with open(self._session_file(session_id), 'rb') as f:
+                version = os.fstat(f.fileno()).st_mtime_ns
+                session = load_session_json(f.read())
+        except FileNotFoundError:
+            return None
+
+        try:
+            with open(self._events_file(session_id), 'rb') as f:
+                version = max(version, os.fstat(f.fileno()).st_mtime_ns)
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+
+        # Files written before the event log keep their events inline
+        if "events" not in session:
+            # Ignore a last line left incomplete by an interrupted append
+            session["events"] = [load_session_json(line) for line in data.split(b"\n")[:-1]]
+        return version, session
+
+    async def save(self, session: Dict) -> int:
+        # Serialize on the event loop, where nothing can modify the session
+        # mid-way; only the blocking file and index writes go to a thread
+        content = dump_session_json(
+            {key: value for key, value in session.items() if key != "events"}, indent=PRETTY_SESSION_FILES
+        )
+        summary = dump_session_json(session_summary(session))
+        row = self._index_row(session)
+        events = session.get("events", [])[:]
+        return await asyncio.to_thread(self._write_session_sync, session.get("id"), content, summary, row, events)
+
+    def _write_session_sync(
+        self, session_id: str, content: bytes, summary: bytes, row: Tuple, events: List[Dict]
+    ) -> int:
+        filename = self._session_file(session_id)
+
+        # Append the new events before the session file drops any inline ones
+        self._append_events_sync(session_id, events)
+
+        # Save as JSON file, with the summary that searches read
+        summary_file = self._summary_file(session_id)
+        self._write_files_sync([(filename, content), (summary_file, summary)])
+        self._summaries[session_id] = (os.stat(summary_file).st_mtime_ns, load_session_json(summary))
+
+        self._index_session(row)
+        with self._index_lock:
+            self._index.commit()
+
+        version = os.stat(filename).st_mtime_ns
+        try:
+            return max(version, os.stat(self._events_file(session_id)).st_mtime_ns)
+        except FileNotFoundError:
+            return version
+
+    def _append_events_sync(self, session_id: str, events: List[Dict]) -> None:
+        """Append the events not yet in a session's event log"""
+        filename = self._events_file(session_id)
+        with self._events_lock:
+            try:
+                size = os.stat(filename).st_size
+            except FileNotFoundError:
+                size = 0
+
+            # Recount the log if it changed since this store last saw it
+            stored_events, seen_size = self._event_logs.get(session_id, (0, 0))
+            if size == 0:
+                stored_events = 0
+            elif size != seen_size:
+                with open(filename, 'rb+') as f:
+                    data = f.read()
+                    size = data.rfind(b"\n") + 1
+                    if size != len(data):
+                        # Drop a line left incomplete by an interrupted append
+                        f.truncate(size)
+                stored_events = data.count(b"\n")
+
+            if len(events) > stored_events:
+                with open(filename, 'ab') as f:
+                    f.write(b"".join(dump_session_json(event) + b"\n" for event in events[stored_events:]))
+                    f.flush()
+                    os.fsync(f.fileno())
+                    size = f.tell()
+                stored_events = len(events)
+            self._event_logs[session_id] = (stored_events, size)
+
+    def _write_files_sync(self, files: List[Tuple[str, bytes]]) -> None:
+        """
+        Atomically replace files with new contents.
+
+        Each file is written to its own temporary file and flushed to disk,
+        then all of them are renamed over their targets and the directory
+        is synced once. Readers never see a partial file, concurrent saves
+        cannot interleave, and the batch costs one directory sync.
+        """
+        temp_paths = []
+        try:
+            for filename, content in files:
+                temp_path = f"{filename}.{uuid.uuid4().hex}.tmp"
+                temp_paths.append(temp_path)
+                with open(temp_path, 'xb') as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+            for temp_path, (filename, _) in zip(temp_paths, files):
+                os.replace(temp_path, filename)
+        except BaseException:
+            for temp_path in temp_paths:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+            raise
+        self._sync_directory()
+
+    def _sync_directory(self) -> None:
+        """Make renames in the storage directory durable"""
+        # Directories cannot be opened for syncing on Windows
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self.storage_path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    async def save_fields(self, session: Dict, fields: Sequence[str]) -> int:
+        # Session files are always written whole
+        return await self.save(session)
+
+    async def query(self, search_params: Dict) -> AsyncIterator[Dict]:
+        # Find the candidate sessions in the index, in the requested order
+        clauses, args = search_conditions(search_params, self._participant_search)
+        sql = "SELECT id FROM session_index"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        order, order_args = search_order(search_params)
+        sql += order
+        args.extend(order_args)
+        session_ids = await asyncio.to_thread(self._select_ids_sync, sql, args)
+
+        for start in range(0, len(session_ids), SEARCH_BATCH_SIZE):
+            chunk = session_ids[start:start + SEARCH_BATCH_SIZE]
+
+            # Load the summaries in up to SESSION_LOAD_CONCURRENCY worker
+            # threads, each taking an interleaved share of the sessions
+            batches = [chunk[i::SESSION_LOAD_CONCURRENCY] for i in range(SESSION_LOAD_CONCURRENCY)]
+            loaded = await asyncio.gather(
+                *(asyncio.to_thread(self._load_summaries, batch) for batch in batches if batch)
+            )
+
+            # Yield them in index order, undoing the interleaving
+            for position in range(len(chunk)):
+                summary = loaded[position % SESSION_LOAD_CONCURRENCY][position // SESSION_LOAD_CONCURRENCY]
+                if summary is not None:
+                    yield summary
+
+    def _select_ids_sync(self, sql: str, args: List) -> List[str]:
+        with self._index_lock:
+            return [session_id for session_id, in self._index.execute(sql, args)]
+
+    def _load_summaries(self, session_ids: List[str]) -> List[Optional[Dict]]:
+        return [self._load_summary(session_id) for session_id in session_ids]
+
+    def _load_summary(self, session_id: str) -> Optional[Dict]:
+        """Read a session's summary, deriving it from the session file if needed"""
+        if not os.path.exists(self._session_file(session_id)):
+            # Deleted outside the service; forget it
+            with self._index_lock:
+                if self._participant_search:
+                    self._index.execute(
+                        "DELETE FROM participant_search WHERE rowid IN (SELECT rowid FROM session_index WHERE id = ?)",
+                        (session_id,)
+                    )
+                self._index.execute("DELETE FROM session_index WHERE id = ?", (session_id,))
+                self._index.commit()
+            self._summaries.pop(session_id, None)
+            return None
+
+        summary_file = self._summary_file(session_id)
+        try:
+            mtime = os.stat(summary_file).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        if mtime is not None:
+            cached = self._summaries.get(session_id)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+            summary = self._load_file(summary_file, missing_ok=True)
+            if summary is not None:
+                self._summaries[session_id] = (mtime, summary)
+                return summary
+
+        # Sessions saved before summaries were written
+        session = self._load_file(self._session_file(session_id))
+        return session_summary(session) if session is not None else None
+
+    def _load_file(self, filename: str, missing_ok: bool = False) -> Optional[Dict]:
+        """Read one JSON file, logging and skipping unreadable ones"""
+        try:
+            with open(filename, 'rb') as f:
+                return load_session_json(f.read())
+        except FileNotFoundError:
+            if not missing_ok:
+                logger.error("Session file not found: %s", filename)
+            return None
+        except Exception as e:
+            logger.error("Error loading session file %s: %s", filename, e)
+            return None
+
+    async def close(self) -> None:
+        with self._index_lock:
+            self._index.close()
+
+class SQLiteSessionStore:
+    """
+    Sessions in a SQLite database.
+
+    The searchable fields of each session are indexed columns next to the
+    JSON document (stored without its events), and events are rows of an
+    append-only table. Saving a session inserts only the events added since
+    the last save, and save_fields patches the changed fields in place with
+    json_set instead of rewriting the document.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            status TEXT,
+            case_number TEXT,
+            judge_id TEXT,
+            scheduled_date TEXT,
+            scheduled_time TEXT,
+            created_at TEXT,
+            participant_names TEXT,
+            doc TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            session_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            ts TEXT,
+            type TEXT,
+            payload BLOB NOT NULL,
+            PRIMARY KEY (session_id, seq)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_sessions_status_schedule ON sessions (status, scheduled_date, scheduled_time)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_case_number ON sessions (case_number)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_judge_id ON sessions (judge_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_schedule ON sessions (scheduled_date, scheduled_time)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_created_at ON sessions (created_at)",
+    )
+
+    def __init__(self, database_path: str):
+        """
+        Initialize the store.
+
+        Args:
+            database_path: Path to the SQLite database file
+        """
+        self.database_path = database_path
+        self._db = None
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._participant_search = False
+
+    async def _connection(self):
+        """Open the database and create the schema on first use"""
+        if self._db is None:
+            async with self._connect_lock:
+                if self._db is None:
+                    import aiosqlite
+
+                    db = await aiosqlite.connect(self.database_path)
+                    await db.execute("PRAGMA journal_mode=WAL")
+                    for statement in self.SCHEMA:
+                        await db.execute(statement)
+                    self._participant_search = await self._create_participant_search(db)
+                    await db.commit()
+                    self._db = db
+        return self._db
+
+    async def _create_participant_search(self, db) -> bool:
+        """
+        Create the participant name index, filling it if it is new.
+
+        Returns:
+            Whether the index is available
+        """
+        async with db.execute("SELECT 1 FROM sqlite_master WHERE name = 'participant_search'") as cursor:
+            exists = await cursor.fetchone()
+        try:
+            await db.execute(PARTICIPANT_SEARCH_SCHEMA)
+        except sqlite3.OperationalError as e:
+            logger.warning("Participant name index unavailable, names will be scanned: %s", e)
+            return False
+        if not exists:
+            await db.execute(
+                "INSERT INTO participant_search (rowid, names) SELECT rowid, participant_names FROM sessions"
+            )
+        return True
+
+    async def _index_participants(self, db, session_id: str) -> None:
+        """Replace a session's entry in the participant name index"""
+        if not self._participant_search:
+            return
+        # Upserts keep each session's rowid, so the old entry shares it
+        await db.execute(
+            "DELETE FROM participant_search WHERE rowid IN (SELECT rowid FROM sessions WHERE id = ?)", (session_id,)
+        )
+        await db.execute(
+            "INSERT INTO participant_search (rowid, names) SELECT rowid, participant_names FROM sessions WHERE id = ?",
+            (session_id,)
+        )
+
+    async def version(self, session_id: str) -> Optional[int]:
+        db = await self._connection()
+        async with db.execute("SELECT version FROM sessions WHERE id = ?", (session_id,)) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def load(self, session_id: str) -> Optional[Tuple[int, Dict]]:
+        db = await self._connection()
+        async with db.execute("SELECT version, doc FROM sessions WHERE id = ?", (session_id,)) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+
+        version, doc = row
+        session = load_session_json(doc)
+        async with db.execute(
+            "SELECT payload FROM events WHERE session_id = ? ORDER BY seq", (session_id,)
+        ) as cursor:
+            session["events"] = [load_session_json(payload) async for payload, in cursor]
+        return version, session
+
+    async def save(self, session: Dict) -> int:
+        db = await self._connection()
+        # One save at a time, so concurrent saves never insert the same events
+        async with self._write_lock:
+            session_id = session.get("id")
+            events = session.get("events", [])
+
+            await self._insert_new_events(db, session_id, events)
+
+            doc = dump_session_json({key: value for key, value in session.items() if key != "events"}).decode("utf-8")
+            await db.execute(
+                """
+                INSERT INTO sessions (id, version, status, case_number, judge_id, scheduled_date,
+                                      scheduled_time, created_at, participant_names, doc)
+                VALUES (?, 1, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    version = sessions.version + 1,
+                    status = excluded.status,
+                    case_number = excluded.case_number,
+                    judge_id = excluded.judge_id,
+                    scheduled_date = excluded.scheduled_date,
+                    scheduled_time = excluded.scheduled_time,
+                    created_at = excluded.created_at,
+                    participant_names = excluded.participant_names,
+                    doc = excluded.doc
+                """,
+                (session_id, *search_fields(session), doc)
+            )
+            await self._index_participants(db, session_id)
+            await db.commit()
+            async with db.execute("SELECT version FROM sessions WHERE id = ?", (session_id,)) as cursor:
+                version, = await cursor.fetchone()
+        return version
+
+    async def save_fields(self, session: Dict, fields: Sequence[str]) -> int:
+        db = await self._connection()
+        async with self._write_lock:
+            session_id = session.get("id")
+            await self._insert_new_events(db, session_id, session.get("events", []))
+
+            # Patch just the changed fields inside the stored document
+            patches = []
+            for field in fields:
+                value = session
+                for key in field.split("."):
+                    value = value[key]
+                patches.extend((f"$.{field}", dump_session_json(value).decode("utf-8")))
+
+            cursor = await db.execute(
+                f"""
+                UPDATE sessions SET
+                    version = version + 1,
+                    status = ?,
+                    case_number = ?,
+                    judge_id = ?,
+                    scheduled_date = ?,
+                    scheduled_time = ?,
+                    created_at = ?,
+                    participant_names = ?,
+                    doc = json_set(doc{", ?, json(?)" * len(fields)})
+                WHERE id = ?
+                """,
+                (*search_fields(session), *patches, session_id)
+            )
+            if cursor.rowcount == 0:
+                await db.rollback()
+                patched = False
+            else:
+                await self._index_participants(db, session_id)
+                await db.commit()
+                patched = True
+
+        # Not stored yet, so there is nothing to patch
+        if not patched:
+            return await self.save(session)
+
+        async with db.execute("SELECT version FROM sessions WHERE id = ?", (session_id,)) as cursor:
+            version, = await cursor.fetchone()
+        return version
+
+    async def _insert_new_events(self, db, session_id: str, events: List[Dict]) -> None:
+        """Insert the events added since the session was last stored"""
+        async with db.execute(
+            "SELECT COUNT(*) FROM events WHERE session_id = ?", (session_id,)
+        ) as cursor:
+            stored_events, = await cursor.fetchone()
+
+        # Events are append-only, so only the new ones are written
+        await db.executemany(
+            "INSERT INTO events (session_id, seq, ts, type, payload) VALUES (?, ?, ?, ?, ?)",
+            [
+                (session_id, seq, event.get("timestamp"), event.get("type"), dump_session_json(event))
+                for seq, event in enumerate(events[stored_events:], start=stored_events)
+            ]
+        )
+
+    async def query(self, search_params: Dict) -> AsyncIterator[Dict]:
+        db = await self._connection()
+        clauses, args = search_conditions(search_params, self._participant_search)
+        sql = "SELECT doc FROM sessions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        order, order_args = search_order(search_params)
+        sql += order
+        args.extend(order_args)
+        async with db.execute(sql, args) as cursor:
+            async for doc, in cursor:
+                yield session_summary(load_session_json(doc))
+
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+def create_session_store(storage_path: str) -> SessionStore:
+    """
+    Create the session store selected by VIRTUAL_COURT_STORE.
+
+    Args:
+        storage_path: Directory for session data
+
+    Returns:
+        Session store
+    """
+    store = os.getenv("VIRTUAL_COURT_STORE", "json").lower()
+    if store == "sqlite":
+        os.makedirs(storage_path, exist_ok=True)
+        return SQLiteSessionStore(os.path.join(storage_path, "sessions.db"))
+    if store != "json":
+        logger.warning("Unknown virtual court store %s. Using JSON files instead.", store)
+    return JsonFileSessionStore(storage_path)
@@ -0,0 +1,495 @@
+"""
+Speech Model Backends for NigeriaJustice.AI
+
+This module provides the model backends used by the transcription service
+for speech recognition and speaker embedding. A mock backend simulates model
+latency for development, and ONNX Runtime backends run exported models.
+
+The backend is selected with the ASR_BACKEND and SPEAKER_BACKEND environment
+variables ("mock" or "onnx", defaulting to "mock"); ASR_BACKEND may also be
+"transformers" to run a Hugging Face sequence-to-sequence model on the GPU.
+"""
+
+import asyncio
+import logging
+import os
+import random
+from typing import TYPE_CHECKING, Any, List, Optional, Protocol, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # Optional accelerator; falls back to NumPy framing
+    njit = None
+
+if TYPE_CHECKING:
+    from app.services.transcription import TranscriptionRequest
+
+logger = logging.getLogger(__name__)
+
+# Sample rate of the 16-bit mono PCM audio the backends receive
+SAMPLE_RATE = 16000
+
+# Sample utterances by lower-cased court role, used to simulate transcripts in
+# development (the literal keys are interned, like TranscriptionRequest.court_role)
+SAMPLE_TEXTS_BY_ROLE = {
+    "judge": (
+        "The court is now in session.",
+        "Please proceed with your argument, counsel.",
+        "The witness may take the stand.",
+        "I will now deliver the judgment of this court."
+    ),
+    "prosecutor": (
+        "The prosecution intends to show that the defendant committed the offense.",
+        "Your Honor, I would like to present Exhibit A as evidence.",
+        "I call the first witness for the prosecution.",
+        "The state rests its case, Your Honor."
+    ),
+    "defense_counsel": (
+        "My client pleads not guilty to all charges.",
+        "Your Honor, I object to this line of questioning.",
+        "The defense would like to cross-examine this witness.",
+        "Your Honor, I move for dismissal of all charges."
+    ),
+    "witness": (
+        "I solemnly swear to tell the truth, the whole truth, and nothing but the truth.",
+        "I was present at the scene when it happened.",
+        "To the best of my recollection, it occurred around 3 PM.",
+        "I have known the defendant for approximately five years."
+    ),
+    "defendant": (
+        "I am not guilty of the charges against me.",
+        "I was not at the location on the date in question.",
+        "I would like to exercise my right to remain silent.",
+        "I did not commit this offense, Your Honor."
+    ),
+    "clerk": (
+        "All rise for the Honorable Justice.",
+        "Case number NHC/ABJ/123/2025 is now being heard.",
+        "Please state your full name for the record.",
+        "The next case on the docket is scheduled for 2 PM."
+    )
+}
+
+# Sample utterances for unrecognized court roles
+GENERIC_SAMPLE_TEXTS = (
+    "Proceedings continuing in the High Court.",
+    "The court is considering the evidence presented.",
+    "Legal arguments are being presented to the court.",
+    "The session is ongoing."
+)
+
+# A streaming chunk to recognize: (window, chunk_start, chunk_end, decoder_state, request).
+# The window is 16-bit PCM of left context + chunk + right context, and the
+# chunk occupies window[chunk_start:chunk_end]
+ASRChunk = Tuple[bytes, int, int, Any, "TranscriptionRequest"]
+
+class ASRBackend(Protocol):
+    """Speech recognition model backend"""
+
+    async def infer_batch(self, chunks: List[ASRChunk]) -> List[Tuple[str, str, Any]]:
+        """
+        Recognize a batch of streaming chunks.
+
+        Returns:
+            (transcript_text, detected_language, decoder_state) per chunk
+        """
+        ...
+
+class SpeakerBackend(Protocol):
+    """Speaker embedding model backend"""
+
+    async def embed_batch(self, segments: List[bytes]) -> List[Optional[np.ndarray]]:
+        """
+        Compute a voice embedding for each audio segment.
+
+        Returns:
+            One embedding vector per segment, or None if the backend
+            cannot produce embeddings
+        """
+        ...
+
+# Scale from 16-bit PCM sample values to [-1, 1)
+PCM16_SCALE = np.float32(1.0 / 32768.0)
+
+def pcm16_to_float32(audio_data: bytes, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Convert 16-bit little-endian PCM bytes to float32 samples in [-1, 1).
+
+    The bytes are viewed in place and converted in a single pass.
+
+    Args:
+        audio_data: PCM bytes (or a memoryview of them)
+        out: Float32 buffer to write the samples into, at least as long as
+            the audio; a new array is allocated if omitted
+
+    Returns:
+        The samples (a view of out, if given)
+    """
+    sample_count = len(audio_data) // 2
+    pcm16 = np.frombuffer(audio_data, dtype="<i2", count=sample_count)
+    if out is None:
+        return np.multiply(pcm16, PCM16_SCALE, dtype=np.float32)
+    return np.multiply(pcm16, PCM16_SCALE, out=out[:sample_count])
+
+# Log-mel feature settings: 25 ms windows every 10 ms, 80 mel bands
+FEATURE_WINDOW_SIZE = 400
+FEATURE_HOP_SIZE = 160
+FEATURE_MEL_BANDS = 80
+
+def _mel_filterbank(n_mels: int, n_fft: int, sample_rate: int) -> np.ndarray:
+    """Triangular mel filters as an (n_mels, n_fft // 2 + 1) float32 matrix"""
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    bin_hz = np.linspace(0.0, sample_rate / 2, n_fft // 2 + 1)
+    edges_hz = mel_to_hz(np.linspace(hz_to_mel(0.0), hz_to_mel(sample_rate / 2), n_mels + 2))
+    lower, center, upper = edges_hz[:-2, None], edges_hz[1:-1, None], edges_hz[2:, None]
+    rising = (bin_hz - lower) / (center - lower)
+    falling = (upper - bin_hz) / (upper - center)
+    return np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+
+MEL_FILTERBANK = _mel_filterbank(FEATURE_MEL_BANDS, FEATURE_WINDOW_SIZE, SAMPLE_RATE)
+FEATURE_WINDOW = np.hanning(FEATURE_WINDOW_SIZE).astype(np.float32)
+
+def _frame_signal_numpy(pcm: np.ndarray, window: np.ndarray, hop: int) -> np.ndarray:
+    """Split samples into overlapping windowed frames"""
+    frames = np.lib.stride_tricks.sliding_window_view(pcm, len(window))[::hop]
+    return frames * window
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _frame_signal(pcm, window, hop):
+        win = window.shape[0]
+        frame_count = (pcm.shape[0] - win) // hop + 1
+        frames = np.empty((frame_count, win), dtype=np.float32)
+        for i in prange(frame_count):
+            start = i * hop
+            for j in range(win):
+                frames[i, j] = pcm[start + j] * window[j]
+        return frames
+else:
+    _frame_signal = _frame_signal_numpy
+
+def compute_logmel(pcm: np.ndarray) -> np.ndarray:
+    """
+    Compute log-mel features of float32 samples.
+
+    Framing and windowing run as a Numba-compiled parallel loop when numba
+    is installed (Numba has no FFT, so the FFT and mel projection stay in
+    NumPy).
+
+    Args:
+        pcm: Float32 samples at SAMPLE_RATE
+
+    Returns:
+        (frames, FEATURE_MEL_BANDS) float32 log-mel features
+    """
+    if len(pcm) < FEATURE_WINDOW_SIZE:
+        pcm = np.pad(pcm, (0, FEATURE_WINDOW_SIZE - len(pcm)))
+    frames = _frame_signal(np.ascontiguousarray(pcm, dtype=np.float32), FEATURE_WINDOW, FEATURE_HOP_SIZE)
+    power = np.abs(np.fft.rfft(frames, axis=-1)) ** 2
+    return np.log(np.maximum(power.astype(np.float32) @ MEL_FILTERBANK.T, 1e-10))
+
+# Suffix of dynamically quantized INT8 models (see app.services.model_quantization)
+INT8_MODEL_SUFFIX = ".int8.onnx"
+
+def _create_onnx_session(model_path: str):
+    """
+    Open an ONNX Runtime inference session.
+
+    Full-precision models prefer CUDA when it is available. INT8 models are
+    meant for CPU-only deployments, where the quantized matmuls use the
+    CPU's integer dot-product instructions, so they always run on the CPU.
+    """
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    if model_path.endswith(INT8_MODEL_SUFFIX):
+        options.enable_cpu_mem_arena = True
+        providers = ["CPUExecutionProvider"]
+    else:
+        available = ort.get_available_providers()
+        providers = [p for p in ("CUDAExecutionProvider", "CPUExecutionProvider") if p in available]
+    return ort.InferenceSession(model_path, sess_options=options, providers=providers)
+
+class MockASRBackend:
+    """Simulated speech recognition for development"""
+
+    async def infer_batch(self, chunks: List[ASRChunk]) -> List[Tuple[str, str, Any]]:
+        # Simulate one batched model forward pass
+        await asyncio.sleep(0.5)  # Simulate processing time
+
+        results = []
+        for window, chunk_start, chunk_end, decoder_state, request in chunks:
+            # Detect primary language (would use actual language detection in production)
+            detected_language = self._detect_language(window[chunk_start:chunk_end])
+
+            # For demo/development, generate different sample text based on court role
+            transcript_text = self._generate_sample_text(request.court_role)
+
+            results.append((transcript_text, detected_language, decoder_state))
+        return results
+
+    def _detect_language(self, audio_data: bytes) -> str:
+        """
+        Detect the language being spoken in the audio.
+
+        Args:
+            audio_data: Raw audio data
+
+        Returns:
+            Language code (e.g., 'en-NG', 'pcm-NG', 'yo-NG')
+        """
+        # In production, this would use a language identification model
+        # For now, return English (Nigerian) as the default
+        return "en-NG"
+
+    def _generate_sample_text(self, court_role: str) -> str:
+        """
+        Generate sample text based on court role for development purposes.
+
+        Args:
+            court_role: Lower-cased role in court (judge, prosecutor, etc.)
+
+        Returns:
+            Sample text appropriate for the role
+        """
+        # Get samples for the role, or use generic samples if role not recognized
+        return random.choice(SAMPLE_TEXTS_BY_ROLE.get(court_role, GENERIC_SAMPLE_TEXTS))
+
+class MockSpeakerBackend:
+    """Simulated speaker embedding for development"""
+
+    async def embed_batch(self, segments: List[bytes]) -> List[Optional[np.ndarray]]:
+        # Simulate one batched model forward pass
+        await asyncio.sleep(0.2)
+
+        # The mock model produces no embeddings
+        return [None] * len(segments)
+
+class OnnxRuntimeASRBackend:
+    """
+    Speech recognition with an exported CTC acoustic model on ONNX Runtime.
+
+    The model takes a batch of float32 waveforms, or of log-mel features
+    if its input is 3-dimensional (plus their lengths, if it has a second
+    input), and returns per-frame logits; a tokens.txt file next to the
+    model lists one vocabulary entry per line, with the CTC blank first.
+    """
+
+    def __init__(self, model_path: str, language: str = "en-NG"):
+        """
+        Initialize the backend.
+
+        Args:
+            model_path: Path to the ONNX model
+            language: Language code reported for recognized text
+        """
+        self.session = _create_onnx_session(model_path)
+        self.language = language
+
+        tokens_path = os.path.join(os.path.dirname(model_path), "tokens.txt")
+        with open(tokens_path, "r", encoding="utf-8") as f:
+            self.tokens = [line.rstrip("\n") for line in f]
+
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.uses_features = len(self.session.get_inputs()[0].shape) == 3
+        if self.uses_features:
+            # Compile the feature kernels now rather than on the first request
+            compute_logmel(np.zeros(SAMPLE_RATE, dtype=np.float32))
+        logger.info("Loaded ONNX speech recognition model from %s", model_path)
+
+    async def infer_batch(self, chunks: List[ASRChunk]) -> List[Tuple[str, str, Any]]:
+        return await asyncio.to_thread(self._infer_batch_sync, chunks)
+
+    def _infer_batch_sync(self, chunks: List[ASRChunk]) -> List[Tuple[str, str, Any]]:
+        """Run the model on a zero-padded batch and greedy-decode each chunk"""
+        sample_count = max(1, max(len(window) // 2 for window, *_ in chunks))
+        if self.uses_features:
+            inputs = [compute_logmel(pcm16_to_float32(window)) for window, *_ in chunks]
+            lengths = np.array([len(x) for x in inputs], dtype=np.int64)
+            batch = np.zeros((len(inputs), max(1, int(lengths.max())), FEATURE_MEL_BANDS), dtype=np.float32)
+            for i, x in enumerate(inputs):
+                batch[i, :len(x)] = x
+        else:
+            # Convert the PCM straight into the rows of the zero-padded batch
+            lengths = np.array([len(window) // 2 for window, *_ in chunks], dtype=np.int64)
+            batch = np.zeros((len(chunks), sample_count), dtype=np.float32)
+            for i, (window, *_) in enumerate(chunks):
+                pcm16_to_float32(window, out=batch[i])
+
+        feeds = {self.input_names[0]: batch}
+        if len(self.input_names) > 1:
+            feeds[self.input_names[1]] = lengths
+        logits = self.session.run(None, feeds)[0]
+
+        results = []
+        for i, (window, chunk_start, chunk_end, decoder_state, request) in enumerate(chunks):
+            # Keep only the frames that belong to the chunk, dropping context
+            samples_per_frame = max(1, sample_count / logits.shape[1])
+            first_frame = int(chunk_start // 2 / samples_per_frame)
+            last_frame = int(chunk_end // 2 / samples_per_frame)
+            token_ids = logits[i, first_frame:last_frame].argmax(axis=-1)
+
+            text, decoder_state = self._ctc_greedy_decode(token_ids, decoder_state)
+            results.append((text, request.language or self.language, decoder_state))
+        return results
+
+    def _ctc_greedy_decode(self, token_ids: np.ndarray, previous_id: Optional[int]) -> Tuple[str, Optional[int]]:
+        """
+        Collapse repeated tokens and drop blanks.
+
+        The decoder state is the last frame's token id, so repeats are also
+        collapsed across chunk boundaries.
+        """
+        pieces = []
+        for token_id in token_ids.tolist():
+            if token_id != previous_id and token_id != 0:
+                pieces.append(self.tokens[token_id])
+            previous_id = token_id
+        return "".join(pieces).replace("▁", " ").strip(), previous_id
+
+class OnnxRuntimeSpeakerBackend:
+    """Speaker embedding with an exported model on ONNX Runtime"""
+
+    def __init__(self, model_path: str):
+        """
+        Initialize the backend.
+
+        Args:
+            model_path: Path to the ONNX speaker embedding model
+        """
+        self.session = _create_onnx_session(model_path)
+        self.input_name = self.session.get_inputs()[0].name
+        logger.info("Loaded ONNX speaker embedding model from %s", model_path)
+
+    async def embed_batch(self, segments: List[bytes]) -> List[Optional[np.ndarray]]:
+        return await asyncio.to_thread(self._embed_batch_sync, segments)
+
+    def _embed_batch_sync(self, segments: List[bytes]) -> List[Optional[np.ndarray]]:
+        """Embed each segment (segments differ in length, so run one at a time)"""
+        embeddings = []
+        for segment in segments:
+            waveform = pcm16_to_float32(segment)[np.newaxis, :]
+            embeddings.append(self.session.run(None, {self.input_name: waveform})[0][0])
+        return embeddings
+
+class TransformersASRBackend:
+    """
+    Speech recognition with a Whisper-style sequence-to-sequence model on
+    Hugging Face Transformers, meant for GPU deployments.
+
+    On CUDA the model runs in float16 with FlashAttention 2 when flash_attn
+    is installed (PyTorch SDPA attention otherwise); on CPU it runs in
+    float32. Each chunk is decoded on its own, without the stream context.
+    """
+
+    def __init__(self, model_path: str, device: str = "cuda", batch_size: int = 24, language: str = "en-NG"):
+        """
+        Initialize the backend.
+
+        Args:
+            model_path: Path or Hub id of the model
+            device: Torch device to run on ("cuda", "cuda:1", "cpu")
+            batch_size: Maximum number of chunks per forward pass
+            language: Language code reported for recognized text
+        """
+        import torch
+        from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
+
+        if device.startswith("cuda") and not torch.cuda.is_available():
+            logger.warning("CUDA is not available. Running speech recognition on the CPU.")
+            device = "cpu"
+        use_cuda = device.startswith("cuda")
+        torch_dtype = torch.float16 if use_cuda else torch.float32
+
+        # Flash attention when installed; otherwise the library default, since
+        # an explicit "sdpa" needs newer torch/transformers than are pinned
+        attn_implementation = None
+        if use_cuda:
+            try:
+                import flash_attn  # noqa: F401
+                attn_implementation = "flash_attention_2"
+            except ImportError:
+                pass
+
+        model = AutoModelForSpeechSeq2Seq.from_pretrained(
+            model_path,
+            torch_dtype=torch_dtype,
+            attn_implementation=attn_implementation,
+            low_cpu_mem_usage=True
+        )
+        model.to(device)
+        processor = AutoProcessor.from_pretrained(model_path)
+
+        self.pipe = pipeline(
+            "automatic-speech-recognition",
+            model=model,
+            tokenizer=processor.tokenizer,
+            feature_extractor=processor.feature_extractor,
+            torch_dtype=torch_dtype,
+            device=device
+        )
+        self.batch_size = batch_size
+        self.language = language
+        logger.info("Loaded speech recognition model from %s on %s (attention: %s)",
+                    model_path, device, attn_implementation or "default")
+
+    async def infer_batch(self, chunks: List[ASRChunk]) -> List[Tuple[str, str, Any]]:
+        return await asyncio.to_thread(self._infer_batch_sync, chunks)
+
+    def _infer_batch_sync(self, chunks: List[ASRChunk]) -> List[Tuple[str, str, Any]]:
+        """Transcribe the chunks (without their context) in batched forward passes"""
+        inputs = [
+            {"raw": pcm16_to_float32(memoryview(window)[chunk_start:chunk_end]), "sampling_rate": SAMPLE_RATE}
+            for window, chunk_start, chunk_end, _, _ in chunks
+        ]
+        outputs = self.pipe(inputs, batch_size=self.batch_size)
+        return [
+            (output["text"].strip(), request.language or self.language, decoder_state)
+            for output, (_, _, _, decoder_state, request) in zip(outputs, chunks)
+        ]
+
+def create_asr_backend(model_path: str, device: str = "cuda") -> ASRBackend:
+    """
+    Create the speech recognition backend selected by ASR_BACKEND.
+
+    Args:
+        model_path: Path to the speech recognition model
+        device: Torch device for the transformers backend
+
+    Returns:
+        Speech recognition backend
+    """
+    backend = os.getenv("ASR_BACKEND", "mock").lower()
+    if backend == "onnx":
+        return OnnxRuntimeASRBackend(model_path)
+    if backend == "transformers":
+        return TransformersASRBackend(model_path, device=device)
+    if backend != "mock":
+        logger.warning("Unknown ASR backend %s. Using mock backend instead.", backend)
+    return MockASRBackend()
+
+def create_speaker_backend(model_path: str) -> SpeakerBackend:
+    """
+    Create the speaker embedding backend selected by SPEAKER_BACKEND.
+
+    Args:
+        model_path: Path to the speaker embedding model
+
+    Returns:
+        Speaker embedding backend
+    """
+    backend = os.getenv("SPEAKER_BACKEND", "mock").lower()
+    if backend == "onnx":
+        return OnnxRuntimeSpeakerBackend(model_path)
+    if backend != "mock":
+        logger.warning("Unknown speaker backend %s. Using mock backend instead.", backend)
+    return MockSpeakerBackend()
@@ -7,12 +7,453 @@ with speaker identification and language detection.
 
 import json
 import logging
-from typing import Dict, List, Optional, BinaryIO
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, BinaryIO
 import os
+import re
+import sys
 import asyncio
+import threading
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+import numpy as np
+
+try:
+    import ahocorasick
+except ImportError:  # Optional accelerator; falls back to the compiled regexes
+    ahocorasick = None
+
+try:
+    import orjson
+except ImportError:  # Optional accelerator; falls back to the stdlib json module
+    orjson = None
+
+try:
+    import aiofiles
+except ImportError:  # Optional; falls back to writing files in a worker thread
+    aiofiles = None
+
+from app.services.speech_backends import ASRBackend, SpeakerBackend, create_asr_backend, create_speaker_backend
 
 logger = logging.getLogger(__name__)
 
+# Terms redacted for each entity type by anonymize_transcript
+ANONYMIZATION_TERMS = {
+    "DEFENDANT": [
+        "defendant", "accused", "perpetrator",
+        # Add common Nigerian names that might appear
+        "Adebayo", "Chukwu", "Mohammed", "Oluwaseun", "Ibrahim"
+    ],
+    "VICTIM": [
+        "victim", "complainant", "injured party",
+        # Add common Nigerian names that might appear
+        "Adesola", "Chioma", "Ahmed", "Oluwafemi", "Fatima"
+    ],
+    "WITNESS": [
+        "witness", "eyewitness", "bystander",
+        # Add common witness references
+        "first witness", "second witness", "prosecution witness", "defense witness"
+    ],
+    "MINOR": [
+        "child", "minor", "juvenile", "underage", 
+        "boy", "girl", "teenager", "infant", "baby"
+    ],
+    "ADDRESS": [
+        "street", "avenue", "road", "close", "crescent",
+        "estate", "compound", "quarters"
+    ],
+    "PHONE": [
+        "phone", "telephone", "mobile", "cell"
+    ]
+}
+
+# One case-insensitive whole-word alternation per entity type, compiled once.
+# Longer terms come first so multi-word phrases win over their last word.
+ANONYMIZATION_PATTERNS = {
+    entity_type: re.compile(
+        r"\b(?:" + "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)) + r")\b",
+        re.IGNORECASE
+    )
+    for entity_type, terms in ANONYMIZATION_TERMS.items()
+}
+
+def _build_term_automaton(terms_by_type: Dict[str, List[str]]):
+    """Build one Aho-Corasick automaton over the lower-cased terms of every entity type"""
+    automaton = ahocorasick.Automaton()
+    for entity_type, terms in terms_by_type.items():
+        for term in terms:
+            lowered = term.lower()
+            automaton.add_word(lowered, (entity_type, len(lowered)))
+    automaton.make_automaton()
+    return automaton
+
+# A single automaton finds the terms of all entity types in one linear scan
+# of the lower-cased transcript (only when pyahocorasick is installed)
+ANONYMIZATION_AUTOMATON = (
+    _build_term_automaton(ANONYMIZATION_TERMS) if ahocorasick is not None else None
+)
+
+def _is_word_char(char: str) -> bool:
+    """Whether a character counts as a word character for regex \\b purposes"""
+    return char.isalnum() or char == "_"
+
+def _find_term_spans(lowered: str, priorities: Dict[str, int]) -> List[Tuple[int, int, int, str]]:
+    """
+    Find whole-word matches of the requested entity types' terms.
+    
+    Args:
+        lowered: Lower-cased text to scan
+        priorities: Priority of each requested entity type
+        
+    Returns:
+        (start, end, priority, replacement) spans, possibly overlapping
+    """
+    spans = []
+    for end_index, (entity_type, length) in ANONYMIZATION_AUTOMATON.iter(lowered):
+        priority = priorities.get(entity_type)
+        if priority is None:
+            continue
+        start, end = end_index - length + 1, end_index + 1
+        if start > 0 and _is_word_char(lowered[start - 1]):
+            continue
+        if end < len(lowered) and _is_word_char(lowered[end]):
+            continue
+        spans.append((start, end, priority, f"[REDACTED-{entity_type}]"))
+    return spans
+
+def _merge_redaction_spans(spans: List[Tuple[int, int, int, str]]) -> List[Tuple[int, int, str]]:
+    """
+    Resolve overlapping redactions from different entity types.
+    
+    Takes (start, end, priority, replacement) spans and keeps a
+    non-overlapping subset, preferring the leftmost, then the longest (most
+    specific) match, then the lowest priority value.
+    """
+    spans.sort(key=lambda span: (span[0], span[0] - span[1], span[2]))
+    merged = []
+    last_end = 0
+    for start, end, _, replacement in spans:
+        if start >= last_end:
+            merged.append((start, end, replacement))
+            last_end = end
+    return merged
+
+def _replace_spans(text: str, spans: List[Tuple[int, int, str]]) -> str:
+    """Replace non-overlapping, sorted (start, end, replacement) spans of text"""
+    parts = []
+    position = 0
+    for start, end, replacement in spans:
+        parts.append(text[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+# Dynamic batching limits: requests arriving within the wait window are
+# coalesced into one inference call of at most the maximum batch size
+INFERENCE_MAX_BATCH_SIZE = 16
+INFERENCE_MAX_WAIT_MS = 20
+
+# Audio context kept around each decoded chunk when streaming, in bytes of
+# 16 kHz 16-bit mono PCM
+STREAM_LEFT_CONTEXT_BYTES = 16000   # 0.5 s of already-decoded audio
+STREAM_RIGHT_CONTEXT_BYTES = 8000   # 0.25 s of look-ahead, decoded with the next chunk
+STREAM_CHUNK_BYTES = 32000          # 1 s of new audio per partial hypothesis
+
+# Seconds without a request after which a session's stream is considered
+# abandoned and its state (including held-back audio) is released
+STREAM_IDLE_TIMEOUT_S = 120
+
+@dataclass
+class StreamingSessionState:
+    """
+    Streaming recognition state carried between audio chunks of a session.
+    
+    Each chunk is decoded once with a little left context (audio already
+    decoded) and right context (audio held back for the next chunk), so the
+    encoder never re-processes the full session buffer.
+    
+    Requests of one session decode under the state's lock, one at a time.
+    """
+    left_context: bytes = b""
+    right_context: bytes = b""
+    decoder_state: Any = None
+    speaker_index: Optional["SpeakerIndex"] = None
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_used: float = 0.0
+
+@dataclass(slots=True)
+class TranscriptionRequest:
+    """Metadata accompanying one audio segment sent for transcription"""
+    session_id: Optional[str] = None
+    case_id: str = "unknown"
+    court_role: str = "unknown"
+    timestamp: Optional[str] = None
+    known_speakers: List[Dict] = field(default_factory=list)
+    is_final: bool = False
+    language: Optional[str] = None
+    user_id: Optional[str] = None
+    user_role: Optional[str] = None
+    
+    def __post_init__(self):
+        # Normalize the role once per request; interning lets the many
+        # requests of a session share one string that compares by identity
+        self.court_role = sys.intern(self.court_role.lower())
+    
+    @classmethod
+    def from_metadata(cls, metadata: Dict) -> "TranscriptionRequest":
+        """
+        Build a request from a session metadata dict, ignoring unknown keys.
+        
+        Args:
+            metadata: Metadata about the session
+            
+        Returns:
+            The transcription request
+        """
+        return cls(**{name: metadata[name] for name in cls.__dataclass_fields__ if name in metadata})
+
+@dataclass(slots=True)
+class TranscriptionResult:
+    """Transcription and speaker identification of one audio segment"""
+    transcript: str
+    speaker: Optional[Dict]
+    confidence: float
+    timestamp: Optional[str]
+    language_detected: str
+    case_id: str
+    session_id: Optional[str]
+    is_final: bool = True  # False for partial hypotheses of a segment still being decoded
+
+# Minimum cosine similarity for a voice embedding to match a known speaker
+SPEAKER_MATCH_THRESHOLD = 0.7
+
+def _embedding_vector(embedding: Any) -> Optional[np.ndarray]:
+    """Convert a voice embedding to a flat float32 vector, or None if it is missing or not numeric"""
+    if embedding is None:
+        return None
+    try:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+    except (TypeError, ValueError):
+        return None
+    return vector if vector.size else None
+
+class SpeakerIndex:
+    """
+    Known speakers' voice embeddings stacked into one normalized matrix.
+    
+    Scoring a query embedding against every speaker is then a single
+    matrix-vector product instead of one Python-level dot product per speaker.
+    """
+    
+    __slots__ = ("key", "speakers", "matrix")
+    
+    def __init__(self, known_speakers: List[Dict]):
+        """
+        Build the index.
+        
+        Args:
+            known_speakers: Known speakers, each with an "embedding" vector
+        """
+        self.key = self.key_for(known_speakers)
+        self.speakers = []
+        self.matrix = None
+        
+        # Embeddings must share one dimension to be stacked; the first valid
+        # one sets it and speakers whose embeddings differ are left out
+        vectors = []
+        for speaker in known_speakers:
+            vector = _embedding_vector(speaker.get("embedding"))
+            if vector is None:
+                continue
+            if vectors and vector.size != vectors[0].size:
+                logger.warning("Ignoring speaker %s: embedding has %d dimensions, expected %d",
+                               speaker.get("id"), vector.size, vectors[0].size)
+                continue
+            self.speakers.append(speaker)
+            vectors.append(vector)
+        
+        if vectors:
+            matrix = np.stack(vectors)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.matrix = matrix / norms
+    
+    @staticmethod
+    def key_for(known_speakers: List[Dict]) -> Tuple:
+        """Identify a known-speaker list, to tell when a cached index is stale"""
+        # Embeddings are part of the key, so re-enrolled voices and speakers
+        # without IDs are told apart
+        key = []
+        for s in known_speakers:
+            vector = _embedding_vector(s.get("embedding"))
+            key.append((s.get("id"), s.get("name"), s.get("role"), None if vector is None else vector.tobytes()))
+        return tuple(key)
+    
+    def best_match(self, embedding: np.ndarray) -> Optional[Tuple[Dict, float]]:
+        """
+        Find the known speaker most similar to an embedding.
+        
+        Args:
+            embedding: Voice embedding of the audio segment
+            
+        Returns:
+            (speaker, cosine similarity), or None if no speaker has an
+            embedding of the same dimension
+        """
+        if self.matrix is None:
+            return None
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        if query.size != self.matrix.shape[1]:
+            logger.warning("Voice embedding has %d dimensions, known speakers have %d",
+                           query.size, self.matrix.shape[1])
+            return None
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = self.matrix @ query
+        idx = int(scores.argmax())
+        return self.speakers[idx], float(scores[idx])
+
+# Directory transcripts are saved to
+TRANSCRIPT_OUTPUT_DIR = "transcripts"
+
+def _dump_transcript_json(transcript_data: Dict) -> bytes:
+    """Serialize transcript data as indented UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(transcript_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(transcript_data, ensure_ascii=False, indent=2).encode("utf-8")
+
+def _render_transcript_txt(transcript_data: Dict) -> bytes:
+    """Render transcript data as a plain-text header and body"""
+    speaker = transcript_data.get("speaker", {})
+    return (
+        f"Session: {transcript_data.get('session_id', 'unknown_session')}\n"
+        f"Timestamp: {transcript_data.get('timestamp')}\n"
+        f"Speaker: {speaker.get('name', 'Unknown')}\n"
+        f"Role: {speaker.get('role', 'Unknown')}\n"
+        f"\n"
+        f"{transcript_data.get('transcript', '')}"
+    ).encode("utf-8")
+
+# Transcript file content by output format (also the file extension)
+TRANSCRIPT_RENDERERS: Dict[str, Callable[[Dict], bytes]] = {
+    "json": _dump_transcript_json,
+    "txt": _render_transcript_txt,
+}
+
+class InferenceBatcher:
+    """
+    Coalesces concurrent inference requests into batched model calls.
+    
+    Each submitted item waits on a future while a background worker drains
+    the queue, collecting up to max_batch_size items or until max_wait_ms
+    has passed since the first one arrived, then resolves every future from
+    a single call to infer_batch.
+    """
+    
+    def __init__(self, 
+                 infer_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_batch_size: int = INFERENCE_MAX_BATCH_SIZE,
+                 max_wait_ms: float = INFERENCE_MAX_WAIT_MS):
+        """
+        Initialize the batcher.
+        
+        Args:
+            infer_batch: Coroutine function mapping a list of items to a list of results
+            max_batch_size: Maximum number of items per batch
+            max_wait_ms: Maximum time to wait for a batch to fill, in milliseconds
+        """
+        self.infer_batch = infer_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._worker = None
+        self._loop = None
+    
+    async def submit(self, item: Any) -> Any:
+        """
+        Submit an item for batched inference and wait for its result.
+        
+        Args:
+            item: Input for a single inference request
+            
+        Returns:
+            The result produced for this item
+        """
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            # The worker is started lazily because services are constructed at
+            # import time, before any event loop is running
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        
+        future = loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+    
+    async def _run(self):
+        """Drain the queue into batches until cancelled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                results = list(await self.infer_batch([item for item, _ in batch]))
+                # Results can't be matched to callers if any are missing or extra
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Batched inference returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                logger.error("Batched inference failed: %s", e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), result in zip(batch, results):
+                # The caller may have given up (e.g. client disconnected)
+                if not future.done():
+                    future.set_result(result)
+
+# Loaded model backends shared by every service instance in the process,
+# keyed by (model_path, speaker_model_path, device)
+_MODEL_CACHE: Dict[Tuple[str, str, str], Tuple[ASRBackend, SpeakerBackend]] = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+def _load_models(model_path: str,
+                 speaker_model_path: str,
+                 device: str = "cuda") -> Tuple[ASRBackend, SpeakerBackend]:
+    """
+    Load the model backends for a pair of model paths, once per process.
+    
+    Args:
+        model_path: Path to the speech recognition model
+        speaker_model_path: Path to the speaker identification model
+        device: Device to run GPU-capable speech recognition backends on
+        
+    Returns:
+        (asr_backend, speaker_backend)
+    """
+    key = (model_path, speaker_model_path, device)
+    models = _MODEL_CACHE.get(key)
+    if models is None:
+        # Loading can take seconds, so make sure only one caller does it
+        with _MODEL_CACHE_LOCK:
+            models = _MODEL_CACHE.get(key)
+            if models is None:
+                models = (create_asr_backend(model_path, device), create_speaker_backend(speaker_model_path))
+                _MODEL_CACHE[key] = models
+    return models
+
 class TranscriptionService:
     """
     Service for handling real-time court transcription with speaker identification.
@@ -21,13 +462,18 @@ class TranscriptionService:
     Nigerian languages, Pidgin English, French, Spanish, and English.
     """
     
-    def __init__(self, model_path: str, speaker_model_path: str):
+    # Whether the transcript output directory has been created in this process
+    _output_dir_created = False
+    
+    def __init__(self, model_path: str, speaker_model_path: str, device: str = "cuda"):
         """
         Initialize the transcription service with the specified models.
         
         Args:
             model_path: Path to the speech recognition model
             speaker_model_path: Path to the speaker identification model
+            device: Device for GPU-capable speech recognition backends
+                (falls back to the CPU when CUDA is unavailable)
         """
         self.model_path = model_path
         self.speaker_model_path = speaker_model_path
@@ -45,156 +491,320 @@ class TranscriptionService:
         logger.info("Initializing transcription service with models from %s and %s", 
                     model_path, speaker_model_path)
         
+        # Streaming state per court session, and the task releasing the
+        # state of sessions that went idle without a final segment
+        self._stream_sessions: Dict[str, StreamingSessionState] = {}
+        self._stream_sweeper = None
+        
+        # Model backends (mock in development, see ASR_BACKEND/SPEAKER_BACKEND),
+        # loaded once per process
+        self.asr_backend, self.speaker_backend = _load_models(model_path, speaker_model_path, device)
+        
+        # Concurrent requests share batched model calls
+        self._asr_batcher = InferenceBatcher(self.asr_backend.infer_batch)
+        self._speaker_batcher = InferenceBatcher(self._identify_speaker_batch)
+    
     async def transcribe_audio(self, 
                               audio_data: bytes, 
-                              metadata: Dict) -> Dict:
+                              request: TranscriptionRequest) -> TranscriptionResult:
         """
         Transcribe audio data to text with speaker identification.
         
+        Consecutive segments with the same session_id are decoded as one
+        stream; set is_final on the last segment's request to flush the
+        held-back look-ahead audio and release the session state. A session
+        that sends nothing for STREAM_IDLE_TIMEOUT_S is released and its
+        held-back audio dropped.
+        
         Args:
             audio_data: Raw audio data bytes
-            metadata: Metadata about the session, including known speakers
+            request: Metadata about the session, including known speakers
             
         Returns:
-            Dict containing transcription and speaker identification
+            Transcription and speaker identification
         """
-        # In production, this would use the actual model inference
-        # For now, we'll simulate a response with a delay to mimic processing time
-        await asyncio.sleep(0.5)  # Simulate processing time
+        # Without partial results to report, the segment is one chunk and
+        # takes a single model call
+        result = None
+        async for result in self._transcribe(audio_data, request, max(len(audio_data), 1)):
+            pass
+        return result
+    
+    async def transcribe_audio_stream(self, 
+                                      audio_data: bytes, 
+                                      request: TranscriptionRequest) -> AsyncIterator[TranscriptionResult]:
+        """
+        Transcribe audio data, yielding partial hypotheses as it is decoded.
         
-        logger.info(f"Transcribing audio segment of {len(audio_data)} bytes")
+        The segment is decoded in chunks of STREAM_CHUNK_BYTES. A partial
+        result (is_final=False) with the text so far is yielded after each
+        chunk, and the last result (is_final=True) carries the full text and
+        the identified speaker.
         
-        # Detect primary language (would use actual language detection in production)
-        detected_language = self._detect_language(audio_data)
+        Decoding runs in its own task and results wait in a queue until they
+        are consumed, so a slow consumer doesn't hold the session's lock. A
+        consumer that stops early leaves the segment to finish decoding, which
+        keeps the session's stream state consistent.
         
-        # Identify speaker (would use actual speaker identification in production)
-        speaker = await self.identify_speaker(
-            audio_segment=audio_data,
-            known_speakers=metadata.get("known_speakers", [])
-        )
+        Args:
+            audio_data: Raw audio data bytes
+            request: Metadata about the session, including known speakers
+            
+        Yields:
+            Partial results, then the final transcription and speaker identification
+        """
+        results: asyncio.Queue = asyncio.Queue()
         
-        # For demo/development, return a simulated result based on metadata
-        court_role = metadata.get("court_role", "unknown")
-        case_id = metadata.get("case_id", "unknown")
+        async def decode() -> None:
+            try:
+                async for result in self._transcribe(audio_data, request, STREAM_CHUNK_BYTES):
+                    results.put_nowait(result)
+            finally:
+                results.put_nowait(None)
         
-        # Generate different sample text based on court role
-        transcript_text = self._generate_sample_text(court_role)
+        decoding = asyncio.ensure_future(decode())
+        try:
+            while (result := await results.get()) is not None:
+                yield result
+            # Raise any decoding error
+            await decoding
+        finally:
+            if not decoding.done():
+                decoding.add_done_callback(self._log_abandoned_decode)
+    
+    @staticmethod
+    def _log_abandoned_decode(decoding: asyncio.Future) -> None:
+        """Log a decoding error that no consumer was left to receive"""
+        if not decoding.cancelled() and decoding.exception() is not None:
+            logger.error("Transcription failed after its consumer stopped: %s", decoding.exception())
+    
+    async def _transcribe(self, 
+                          audio_data: bytes, 
+                          request: TranscriptionRequest, 
+                          chunk_bytes: int) -> AsyncIterator[TranscriptionResult]:
+        """Decode a segment in chunks of chunk_bytes under its session's lock, see transcribe_audio_stream"""
+        logger.info("Transcribing audio segment of %d bytes", len(audio_data))
         
-        return {
-            "transcript": transcript_text,
-            "speaker": speaker,
-            "confidence": 0.95,
-            "timestamp": metadata.get("timestamp"),
-            "language_detected": detected_language,
-            "case_id": case_id,
-            "session_id": metadata.get("session_id")
-        }
+        session_id = request.session_id
+        if not session_id:
+            async for result in self._decode_stream(StreamingSessionState(), audio_data, request, chunk_bytes):
+                yield result
+            return
+        
+        self._start_stream_sweeper()
+        async with self._stream_state(session_id) as state:
+            try:
+                async for result in self._decode_stream(state, audio_data, request, chunk_bytes):
+                    yield result
+            finally:
+                state.last_used = asyncio.get_running_loop().time()
+                if request.is_final:
+                    self._stream_sessions.pop(session_id, None)
     
-    def _detect_language(self, audio_data: bytes) -> str:
-        """
-        Detect the language being spoken in the audio.
+    @asynccontextmanager
+    async def _stream_state(self, session_id: str) -> AsyncIterator[StreamingSessionState]:
+        """Get a session's streaming state, holding its lock for the block"""
+        while True:
+            state = self._stream_sessions.setdefault(session_id, StreamingSessionState())
+            async with state.lock:
+                # Released (final segment or idle) while this request waited
+                if self._stream_sessions.get(session_id) is not state:
+                    continue
+                yield state
+                return
+    
+    async def _decode_stream(self, 
+                             state: StreamingSessionState, 
+                             audio_data: bytes, 
+                             request: TranscriptionRequest, 
+                             chunk_bytes: int) -> AsyncIterator[TranscriptionResult]:
+        """Decode one segment of a stream in chunks of chunk_bytes, see transcribe_audio_stream"""
+        session_id = request.session_id
+        # Stack the known speakers' embeddings once per session
+        known_speakers = request.known_speakers
+        if state.speaker_index is None or state.speaker_index.key != SpeakerIndex.key_for(known_speakers):
+            state.speaker_index = SpeakerIndex(known_speakers)
         
-        Args:
-            audio_data: Raw audio data
+        # Speaker identification is independent of speech recognition, so
+        # it runs concurrently while the chunks are decoded
+        speaker_task = asyncio.ensure_future(self.identify_speaker(
+            audio_segment=audio_data,
+            known_speakers=known_speakers,
+            speaker_index=state.speaker_index
+        ))
+        
+        try:
+            pieces = []
+            detected_language = request.language or "en-NG"
+            offsets = range(0, max(len(audio_data), 1), chunk_bytes)
+            for offset in offsets:
+                is_last_chunk = offset == offsets[-1]
+                window, chunk_start, chunk_end = self._build_stream_window(
+                    state,
+                    audio_data[offset:offset + chunk_bytes],
+                    request.is_final and is_last_chunk
+                )
+                text, detected_language, state.decoder_state = await self._asr_batcher.submit(
+                    (window, chunk_start, chunk_end, state.decoder_state, request)
+                )
+                if text:
+                    pieces.append(text)
+                
+                if not is_last_chunk:
+                    yield TranscriptionResult(
+                        transcript=" ".join(pieces),
+                        speaker=None,
+                        confidence=0.95,
+                        timestamp=request.timestamp,
+                        language_detected=detected_language,
+                        case_id=request.case_id,
+                        session_id=session_id,
+                        is_final=False
+                    )
             
-        Returns:
-            Language code (e.g., 'en-NG', 'pcm-NG', 'yo-NG')
-        """
-        # In production, this would use a language identification model
-        # For now, return English (Nigerian) as the default
-        return "en-NG"
+            speaker = await speaker_task
+        finally:
+            speaker_task.cancel()
+        
+        yield TranscriptionResult(
+            transcript=" ".join(pieces),
+            speaker=speaker,
+            confidence=0.95,
+            timestamp=request.timestamp,
+            language_detected=detected_language,
+            case_id=request.case_id,
+            session_id=session_id
+        )
+    
+    def _start_stream_sweeper(self) -> None:
+        """Start the task releasing idle sessions, unless it is running on this loop"""
+        loop = asyncio.get_running_loop()
+        sweeper = self._stream_sweeper
+        if sweeper is None or sweeper.done() or sweeper.get_loop() is not loop:
+            self._stream_sweeper = loop.create_task(self._sweep_idle_streams())
     
-    def _generate_sample_text(self, court_role: str) -> str:
+    async def _sweep_idle_streams(self) -> None:
+        """Release sessions idle for STREAM_IDLE_TIMEOUT_S, until cancelled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(STREAM_IDLE_TIMEOUT_S / 2)
+            cutoff = loop.time() - STREAM_IDLE_TIMEOUT_S
+            for session_id, state in list(self._stream_sessions.items()):
+                if state.lock.locked() or state.last_used > cutoff:
+                    continue
+                del self._stream_sessions[session_id]
+                if state.right_context:
+                    logger.warning("Released idle transcription session %s, dropping %d bytes of untranscribed audio",
+                                   session_id, len(state.right_context))
+    
+    def _build_stream_window(self, 
+                             state: StreamingSessionState, 
+                             audio_data: bytes, 
+                             is_final: bool) -> Tuple[bytes, int, int]:
         """
-        Generate sample text based on court role for development purposes.
+        Build the encoder input for the next chunk of a stream.
+        
+        The chunk is the previously held-back audio plus the new audio, minus
+        a new look-ahead tail that is held back as right context (unless this
+        is the final segment). The state is advanced past the chunk.
         
         Args:
-            court_role: Role in court (judge, prosecutor, etc.)
+            state: Streaming state of the session
+            audio_data: Newly received audio data
+            is_final: Whether this is the last segment of the stream
             
         Returns:
-            Sample text appropriate for the role
-        """
-        sample_texts = {
-            "judge": [
-                "The court is now in session.",
-                "Please proceed with your argument, counsel.",
-                "The witness may take the stand.",
-                "I will now deliver the judgment of this court."
-            ],
-            "prosecutor": [
-                "The prosecution intends to show that the defendant committed the offense.",
-                "Your Honor, I would like to present Exhibit A as evidence.",
-                "I call the first witness for the prosecution.",
-                "The state rests its case, Your Honor."
-            ],
-            "defense_counsel": [
-                "My client pleads not guilty to all charges.",
-                "Your Honor, I object to this line of questioning.",
-                "The defense would like to cross-examine this witness.",
-                "Your Honor, I move for dismissal of all charges."
-            ],
-            "witness": [
-                "I solemnly swear to tell the truth, the whole truth, and nothing but the truth.",
-                "I was present at the scene when it happened.",
-                "To the best of my recollection, it occurred around 3 PM.",
-                "I have known the defendant for approximately five years."
-            ],
-            "defendant": [
-                "I am not guilty of the charges against me.",
-                "I was not at the location on the date in question.",
-                "I would like to exercise my right to remain silent.",
-                "I did not commit this offense, Your Honor."
-            ],
-            "clerk": [
-                "All rise for the Honorable Justice.",
-                "Case number NHC/ABJ/123/2025 is now being heard.",
-                "Please state your full name for the record.",
-                "The next case on the docket is scheduled for 2 PM."
-            ]
-        }
+            (window, chunk_start, chunk_end) where window is
+            left context + chunk + right context and the chunk occupies
+            window[chunk_start:chunk_end]
+        """
+        pending = state.right_context + audio_data
+        split = len(pending) if is_final else max(0, len(pending) - STREAM_RIGHT_CONTEXT_BYTES)
+        chunk, right_context = pending[:split], pending[split:]
         
-        # Get samples for the role, or use generic samples if role not recognized
-        role_samples = sample_texts.get(court_role.lower(), [
-            "Proceedings continuing in the High Court.",
-            "The court is considering the evidence presented.",
-            "Legal arguments are being presented to the court.",
-            "The session is ongoing."
-        ])
+        window = state.left_context + chunk + right_context
+        chunk_start = len(state.left_context)
+        chunk_end = chunk_start + len(chunk)
         
-        # Return a sample text, could randomize for more variety
-        import random
-        return random.choice(role_samples)
+        state.left_context = (state.left_context + chunk)[-STREAM_LEFT_CONTEXT_BYTES:]
+        state.right_context = right_context
+        return window, chunk_start, chunk_end
     
     async def identify_speaker(self, 
                               audio_segment: bytes, 
-                              known_speakers: List[Dict]) -> Optional[Dict]:
+                              known_speakers: List[Dict],
+                              speaker_index: Optional[SpeakerIndex] = None) -> Optional[Dict]:
         """
         Identify the speaker in an audio segment.
         
         Args:
             audio_segment: Audio segment containing a single speaker
             known_speakers: List of known speakers with voice embeddings
+            speaker_index: Prebuilt index of known_speakers, if the caller has one
             
         Returns:
             Speaker information if identified, None otherwise
         """
-        # In production, this would use speaker diarization and identification models
-        # For now, simulate processing with a short delay
-        await asyncio.sleep(0.2)
+        logger.info("Identifying speaker in audio segment with %d known speakers", len(known_speakers))
         
-        logger.info(f"Identifying speaker in audio segment with {len(known_speakers)} known speakers")
+        return await self._speaker_batcher.submit((audio_segment, known_speakers, speaker_index))
+    
+    async def _identify_speaker_batch(self,
+                                      items: List[Tuple[bytes, List[Dict], Optional[SpeakerIndex]]]) -> List[Optional[Dict]]:
+        """
+        Run speaker identification over a batch of audio segments.
         
-        # If no known speakers, return None
-        if not known_speakers:
-            return None
+        Args:
+            items: (audio_segment, known_speakers, speaker_index) tuples
+            
+        Returns:
+            Speaker information or None per item
+        """
+        embeddings = await self.speaker_backend.embed_batch([item[0] for item in items])
+        
+        results = []
+        for (audio_segment, known_speakers, speaker_index), embedding in zip(items, embeddings):
+            # If no known speakers, return None
+            if not known_speakers:
+                results.append(None)
+                continue
+            
+            if embedding is None:
+                # The mock backend has no embeddings; for demo/development,
+                # return the first known speaker
+                results.append({
+                    "id": known_speakers[0].get("id", "unknown"),
+                    "name": known_speakers[0].get("name", "Unknown Speaker"),
+                    "role": known_speakers[0].get("role", "Unknown Role"),
+                    "confidence": 0.92,
+                    "verified": True
+                })
+                continue
+            
+            results.append(self._match_speaker(embedding, speaker_index or SpeakerIndex(known_speakers)))
+        return results
+    
+    def _match_speaker(self, embedding: np.ndarray, speaker_index: SpeakerIndex) -> Optional[Dict]:
+        """
+        Match a voice embedding against the known speakers' embeddings.
+        
+        Args:
+            embedding: Voice embedding of the audio segment
+            speaker_index: Index of the known speakers' embeddings
             
-        # For demo/development, return the first known speaker
-        # In production, this would do actual speaker verification
+        Returns:
+            The best-matching speaker if similar enough, None otherwise
+        """
+        match = speaker_index.best_match(embedding)
+        if match is None or match[1] < SPEAKER_MATCH_THRESHOLD:
+            return None
+        best_speaker, best_score = match
+        
         return {
-            "id": known_speakers[0].get("id", "unknown"),
-            "name": known_speakers[0].get("name", "Unknown Speaker"),
-            "role": known_speakers[0].get("role", "Unknown Role"),
-            "confidence": 0.92,
+            "id": best_speaker.get("id", "unknown"),
+            "name": best_speaker.get("name", "Unknown Speaker"),
+            "role": best_speaker.get("role", "Unknown Role"),
+            "confidence": round(best_score, 4),
             "verified": True
         }
     
@@ -213,54 +823,32 @@ class TranscriptionService:
         """
         # In production, this would use named entity recognition and replacement
         # For now, implement a basic version
-        logger.info(f"Anonymizing transcript with {len(entities_to_anonymize)} entity types")
-        
-        anonymized = transcript
-        
-        # Basic anonymization for development purposes
-        replacements = {
-            "DEFENDANT": [
-                "defendant", "accused", "perpetrator",
-                # Add common Nigerian names that might appear
-                "Adebayo", "Chukwu", "Mohammed", "Oluwaseun", "Ibrahim"
-            ],
-            "VICTIM": [
-                "victim", "complainant", "injured party",
-                # Add common Nigerian names that might appear
-                "Adesola", "Chioma", "Ahmed", "Oluwafemi", "Fatima"
-            ],
-            "WITNESS": [
-                "witness", "eyewitness", "bystander",
-                # Add common witness references
-                "first witness", "second witness", "prosecution witness", "defense witness"
-            ],
-            "MINOR": [
-                "child", "minor", "juvenile", "underage", 
-                "boy", "girl", "teenager", "infant", "baby"
-            ],
-            "ADDRESS": [
-                "street", "avenue", "road", "close", "crescent",
-                "estate", "compound", "quarters"
-            ],
-            "PHONE": [
-                "phone", "telephone", "mobile", "cell"
-            ]
+        logger.info("Anonymizing transcript with %d entity types", len(entities_to_anonymize))
+        
+        # Basic anonymization for development purposes: collect the matches of
+        # every entity type against the original text, then rebuild it once
+        priorities = {
+            entity_type: priority
+            for priority, entity_type in enumerate(dict.fromkeys(entities_to_anonymize))
         }
+        lowered = transcript.lower()
         
-        for entity_type in entities_to_anonymize:
-            if entity_type in replacements:
-                for term in replacements[entity_type]:
-                    # Replace with case insensitivity
-                    pattern = f"\\b{term}\\b"
-                    import re
-                    anonymized = re.sub(
-                        pattern, 
-                        f"[REDACTED-{entity_type}]", 
-                        anonymized, 
-                        flags=re.IGNORECASE
+        # Spans in the lower-cased text only line up with the original if
+        # lowering kept the length (not always so for non-ASCII text)
+        if ANONYMIZATION_AUTOMATON is not None and len(lowered) == len(transcript):
+            # Lower-case once and scan for every term with one automaton
+            spans = _find_term_spans(lowered, priorities)
+        else:
+            spans = []
+            for entity_type, priority in priorities.items():
+                if entity_type in ANONYMIZATION_PATTERNS:
+                    replacement = f"[REDACTED-{entity_type}]"
+                    spans.extend(
+                        (*match.span(), priority, replacement)
+                        for match in ANONYMIZATION_PATTERNS[entity_type].finditer(transcript)
                     )
         
-        return anonymized
+        return _replace_spans(transcript, _merge_redaction_spans(spans))
         
     async def save_transcript(self, 
                              transcript_data: Dict, 
@@ -268,6 +856,9 @@ class TranscriptionService:
         """
         Save transcript data to a file.
         
+        The file is written under a temporary name and renamed into place,
+        so a crash mid-write never leaves a partial transcript behind.
+        
         Args:
             transcript_data: Transcript data to save
             output_format: Format to save in ("json", "txt", "docx")
@@ -275,36 +866,79 @@ class TranscriptionService:
         Returns:
             Path to the saved file
         """
+        output_path, content = self._render_transcript_file(transcript_data, output_format)
+        
+        if aiofiles is not None:
+            if not TranscriptionService._output_dir_created:
+                await asyncio.to_thread(self._create_output_dir)
+            temp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+            try:
+                async with aiofiles.open(temp_path, "xb") as f:
+                    await f.write(content)
+                await asyncio.to_thread(os.replace, temp_path, output_path)
+            except BaseException:
+                await asyncio.to_thread(self._discard_temp_file, temp_path)
+                raise
+        else:
+            # File I/O runs in a worker thread so it doesn't stall other sessions
+            await asyncio.to_thread(self._write_transcript_file, output_path, content)
+        
+        logger.info("Saved transcript to %s", output_path)
+        return output_path
+    
+    def _render_transcript_file(self, transcript_data: Dict, output_format: str) -> Tuple[str, bytes]:
+        """
+        Render transcript data in an output format.
+        
+        Args:
+            transcript_data: Transcript data to save
+            output_format: Format to save in ("json", "txt")
+            
+        Returns:
+            (output_path, file content)
+        """
+        renderer = TRANSCRIPT_RENDERERS.get(output_format)
+        if renderer is None:
+            # Default to JSON if format not recognized
+            logger.warning("Unsupported output format: %s. Using JSON instead.", output_format)
+            output_format = "json"
+            renderer = TRANSCRIPT_RENDERERS[output_format]
+        
         session_id = transcript_data.get("session_id", "unknown_session")
         timestamp = transcript_data.get("timestamp", "unknown_time").replace(":", "-")
+        output_path = f"{TRANSCRIPT_OUTPUT_DIR}/{session_id}_{timestamp}.{output_format}"
+        content = renderer(transcript_data)
         
-        # Create output directory if it doesn't exist
-        output_dir = "transcripts"
-        os.makedirs(output_dir, exist_ok=True)
+        return output_path, content
+    
+    def _create_output_dir(self) -> None:
+        """Create the transcript output directory if it doesn't exist (once per process)"""
+        os.makedirs(TRANSCRIPT_OUTPUT_DIR, exist_ok=True)
+        TranscriptionService._output_dir_created = True
+    
+    def _write_transcript_file(self, output_path: str, content: bytes) -> None:
+        """
+        Atomically write a transcript file (blocking).
         
-        if output_format == "json":
-            # Save as JSON
-            output_path = f"{output_dir}/{session_id}_{timestamp}.json"
-            with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(transcript_data, f, ensure_ascii=False, indent=2)
-                
-        elif output_format == "txt":
-            # Save as plain text
-            output_path = f"{output_dir}/{session_id}_{timestamp}.txt"
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(f"Session: {session_id}\n")
-                f.write(f"Timestamp: {transcript_data.get('timestamp')}\n")
-                f.write(f"Speaker: {transcript_data.get('speaker', {}).get('name', 'Unknown')}\n")
-                f.write(f"Role: {transcript_data.get('speaker', {}).get('role', 'Unknown')}\n")
-                f.write("\n")
-                f.write(transcript_data.get("transcript", ""))
-                
-        else:
-            # Default to JSON if format not recognized
-            logger.warning(f"Unsupported output format: {output_format}. Using JSON instead.")
-            output_path = f"{output_dir}/{session_id}_{timestamp}.json"
-            with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(transcript_data, f, ensure_ascii=False, indent=2)
+        Args:
+            output_path: Path of the file
+            content: File content
+        """
+        if not TranscriptionService._output_dir_created:
+            self._create_output_dir()
         
-        logger.info(f"Saved transcript to {output_path}")
-        return output_path
+        # A unique temporary name keeps concurrent saves of the same file apart
+        temp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "xb") as f:
+                f.write(content)
+            os.replace(temp_path, output_path)
+        except BaseException:
+            self._discard_temp_file(temp_path)
+            raise
+    
+    @staticmethod
+    def _discard_temp_file(temp_path: str) -> None:
+        """Remove a temporary transcript file left by a failed save"""
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
@@ -8,19 +8,50 @@ verification.
 
 import logging
 import os
-import json
 import uuid
-from typing import Dict, List, Optional, Tuple, Any
-from datetime import datetime, timedelta
-import random
-import string
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+import secrets
+import hmac
+import base64
 import asyncio
+import weakref
+import heapq
+from operator import itemgetter
+from collections import Counter, OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
 
 from app.core.config import settings
 from app.services.identity_verification import IdentityVerificationService
+from app.services.session_store import create_session_store
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of parsed sessions kept in memory
+SESSION_CACHE_SIZE = 512
+
+# Session states from which each action is allowed
+ACTION_STATES = {
+    "start": frozenset({"scheduled", "postponed"}),
+    "end": frozenset({"in_progress"}),
+    "join": frozenset({"scheduled", "in_progress"}),
+    "postpone": frozenset({"scheduled", "postponed"}),
+}
+
+# Roles whose identity must be verified before joining
+VERIFIED_ROLES = frozenset({"judge", "prosecutor", "defense"})
+
+# Delay before a coalesced session write is flushed, per session with
+# writes outstanding, and its upper bound (seconds)
+SAVE_COALESCE_DELAY = 0.01
+SAVE_COALESCE_MAX_DELAY = 0.05
+
+def schedule_key(session: Dict) -> str:
+    """Get the sort key for a session's scheduled date and time"""
+    schedule = session.get("schedule", {})
+    return f"{schedule.get('date', '')}T{schedule.get('time', '')}"
+
 class VirtualCourtService:
     """
     Service for managing virtual court sessions.
@@ -40,6 +71,33 @@ class VirtualCourtService:
         self.storage_path = storage_path or os.path.join("data", "virtual_sessions")
         self.identity_service = identity_service or IdentityVerificationService()
         
+        # Court configuration consulted on every session creation and join
+        self.allow_public_access = bool(settings.COURT_CONFIG.get("allow_public_access", False))
+        self.require_identity_verification = bool(settings.COURT_CONFIG.get("require_identity_verification", True))
+        
+        # Session storage (JSON files by default, see VIRTUAL_COURT_STORE)
+        self.store = create_session_store(self.storage_path)
+        
+        # Parsed sessions by ID with the stored version they were read at,
+        # least recently used first
+        self._session_cache: "OrderedDict[str, Tuple[int, Dict]]" = OrderedDict()
+        
+        # Serializes concurrent loads of the same session
+        self._session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        
+        # Serializes changes to the same session, see _updating_session
+        self._update_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        
+        # Participant positions by ID for each cached session, with the
+        # participants list they index
+        self._participant_indexes: Dict[str, Tuple[List[Dict], Dict[str, int]]] = {}
+        
+        # Sessions with a coalesced write scheduled, the flush tasks, and
+        # futures done once each session's scheduled changes are written
+        self._dirty_sessions: Dict[str, Dict] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._written: Dict[str, asyncio.Future] = {}
+        
         # Create storage directory if it doesn't exist
         os.makedirs(self.storage_path, exist_ok=True)
         
@@ -56,13 +114,13 @@ class VirtualCourtService:
         Returns:
             Created session with ID and access codes
         """
-        logger.info(f"Creating new virtual court session for case {session_data.get('case_number', 'unknown')}")
+        logger.info("Creating new virtual court session for case %s", session_data.get('case_number', 'unknown'))
         
         # Validate required fields
         required_fields = ["case_number", "case_title", "scheduled_date", "scheduled_time"]
         for field in required_fields:
             if field not in session_data or not session_data[field]:
-                logger.error(f"Missing required field for virtual session: {field}")
+                logger.error("Missing required field for virtual session: %s", field)
                 raise ValueError(f"Missing required field for virtual session: {field}")
         
         # Generate session ID
@@ -109,35 +167,185 @@ class VirtualCourtService:
         # Save session to storage
         await self._save_session(session)
         
-        logger.info(f"Created virtual court session with ID: {session_id}")
+        logger.info("Created virtual court session with ID: %s", session_id)
         return session
     
+    async def close(self) -> None:
+        """Flush pending session writes and close the session store"""
+        for session in list(self._dirty_sessions.values()):
+            await self._save_session(session)
+        await self.store.close()
+    
     def _generate_access_codes(self) -> Dict[str, str]:
         """Generate secure access codes for virtual court roles"""
         
-        # Generate random 8-character alphanumeric codes
-        def generate_code():
-            chars = string.ascii_uppercase + string.digits
-            return ''.join(random.choice(chars) for _ in range(8))
+        # Generate random 8-character codes from one CSPRNG read: every 5
+        # random bytes base32-encode to exactly 8 characters (A-Z, 2-7)
+        roles = ["judge", "prosecutor", "defense", "witness", "clerk"]
+        if self.allow_public_access:
+            roles.append("public")
+        encoded = base64.b32encode(secrets.token_bytes(5 * len(roles))).decode("ascii")
+        codes = {role: encoded[8 * i:8 * i + 8] for i, role in enumerate(roles)}
         
         # Create codes for different roles
-        return {
-            "judge": generate_code(),
-            "prosecutor": generate_code(),
-            "defense": generate_code(),
-            "witness": generate_code(),
-            "clerk": generate_code(),
-            "public": generate_code() if settings.COURT_CONFIG.get("allow_public_access", False) else None
-        }
+        codes.setdefault("public", None)
+        return codes
     
     async def _save_session(self, session: Dict) -> None:
-        """Save session to storage"""
+        """Save session to storage immediately"""
+        session_id = session.get("id")
+        session["schedule_key"] = schedule_key(session)
+        
+        # This write includes any changes waiting for a coalesced write
+        self._dirty_sessions.pop(session_id, None)
+        written = self._written.pop(session_id, None)
+        task = self._pending.pop(session_id, None)
+        if task is not None:
+            task.cancel()
+        
+        try:
+            version = await self.store.save(session)
+        except BaseException as e:
+            # The cached copy holds the changes that failed to save
+            self._fail_write(written, e)
+            self._discard_session(session_id)
+            raise
+        self._cache_session(session_id, version, session)
+        if written is not None:
+            written.set_result(None)
+    
+    async def _save_session_fields(self, session: Dict, *fields: str) -> None:
+        """
+        Save changes to some fields of a session, plus its new events.
+        
+        Stores that support it update just those fields rather than
+        rewriting the whole document.
+        
+        Args:
+            session: Session with the changes applied
+            fields: Dotted paths of the changed fields, e.g. "schedule.date"
+        """
+        session_id = session.get("id")
+        if session_id in self._dirty_sessions:
+            # Changes waiting for a coalesced write may touch any field
+            await self._save_session(session)
+            return
+        
+        if any(field == "schedule" or field.startswith("schedule.") for field in fields):
+            session["schedule_key"] = schedule_key(session)
+            fields += ("schedule_key",)
+        
+        try:
+            version = await self.store.save_fields(session, fields)
+        except BaseException:
+            # The cached copy holds the changes that failed to save
+            self._discard_session(session_id)
+            raise
+        self._cache_session(session_id, version, session)
+    
+    def _schedule_save(self, session: Dict) -> asyncio.Future:
+        """
+        Save session to storage shortly, coalescing it with other changes.
+        
+        Changes made to the same session before the flush are written
+        together, so a burst of joins costs one write instead of one each.
+        
+        Returns:
+            A future done once the changes are written, or failed if they
+            are lost; await it (shielded) after releasing the session's update
+            lock
+        """
         session_id = session.get("id")
-        filename = os.path.join(self.storage_path, f"{session_id}.json")
+        self._dirty_sessions[session_id] = session
+        if session_id not in self._pending:
+            self._pending[session_id] = asyncio.create_task(self._flush_after(session_id))
+        written = self._written.get(session_id)
+        if written is None:
+            written = self._written[session_id] = asyncio.get_running_loop().create_future()
+        return written
+    
+    def _fail_write(self, written: Optional[asyncio.Future], error: Optional[BaseException] = None) -> None:
+        """Fail the callers waiting for a scheduled write with the reason it was lost"""
+        if written is None:
+            return
+        if not isinstance(error, Exception):
+            error = RuntimeError("Unsaved session changes were discarded")
+        written.set_exception(error)
+    
+    async def _flush_after(self, session_id: str) -> None:
+        """Write a session's coalesced changes after an adaptive delay"""
+        # Wait longer while more sessions have writes outstanding, so busy
+        # periods batch more changes into each write
+        delay = min(SAVE_COALESCE_DELAY * len(self._pending), SAVE_COALESCE_MAX_DELAY)
+        await asyncio.sleep(delay)
+        
+        # Still scheduled, or _save_session would have cancelled this task
+        del self._pending[session_id]
+        session = self._dirty_sessions.get(session_id)
+        if session is None:
+            return
+        try:
+            await self._save_session(session)
+        except Exception as e:
+            logger.error("Error saving session %s: %s", session_id, e)
+            self._discard_session(session_id)
+    
+    def _discard_session(self, session_id: str) -> None:
+        """Forget a session's unsaved changes and its cached copy"""
+        self._dirty_sessions.pop(session_id, None)
+        self._fail_write(self._written.pop(session_id, None))
+        task = self._pending.pop(session_id, None)
+        if task is not None:
+            task.cancel()
+        self._session_cache.pop(session_id, None)
+        self._participant_indexes.pop(session_id, None)
+    
+    @asynccontextmanager
+    async def _updating_session(self, session_id: str) -> AsyncIterator[Dict]:
+        """
+        Get a session to change, holding its update lock for the block.
         
-        # Save as JSON file
-        with open(filename, 'w') as f:
-            json.dump(session, f, indent=2)
+        Service methods read, check, change and save a session inside this
+        block, so concurrent requests on one session take turns and none
+        of them changes a copy that another has already replaced.
+        
+        Args:
+            session_id: ID of the session
+            
+        Yields:
+            The session
+        """
+        lock = self._update_locks.get(session_id)
+        if lock is None:
+            lock = self._update_locks[session_id] = asyncio.Lock()
+        
+        async with lock:
+            session = await self.get_session(session_id)
+            if not session:
+                logger.error("Session not found: %s", session_id)
+                raise ValueError(f"Session not found: {session_id}")
+            yield session
+    
+    def _check_state(self, session: Dict, action: str) -> None:
+        """Raise ValueError unless the session's state allows an action (see ACTION_STATES)"""
+        if session["status"] not in ACTION_STATES[action]:
+            logger.error("Cannot %s session in current state: %s", action, session['status'])
+            raise ValueError(f"Cannot {action} session in current state: {session['status']}")
+    
+    def _check_judge_action(self, session: Dict, judge_info: Dict, action: str) -> None:
+        """Raise ValueError unless the presiding judge may take an action on the session now"""
+        if judge_info.get("id") != session["presiding_judge"].get("id"):
+            logger.error("Unauthorized judge attempt to %s session: %s", action, session["id"])
+            raise ValueError(f"Only the presiding judge can {action} this session")
+        self._check_state(session, action)
+    
+    def _cache_session(self, session_id: str, version: int, session: Dict) -> None:
+        """Remember a parsed session, evicting the least recently used beyond SESSION_CACHE_SIZE"""
+        self._session_cache[session_id] = (version, session)
+        self._session_cache.move_to_end(session_id)
+        if len(self._session_cache) > SESSION_CACHE_SIZE:
+            evicted_id, _ = self._session_cache.popitem(last=False)
+            self._participant_indexes.pop(evicted_id, None)
     
     async def get_session(self, session_id: str) -> Optional[Dict]:
         """
@@ -147,26 +355,68 @@ class VirtualCourtService:
             session_id: ID of the session
             
         Returns:
-            Session data if found, None otherwise
+            Session data if found, None otherwise. The session is shared with
+            the in-memory cache, so changes to it must be saved with
+            _save_session.
         """
-        logger.info(f"Retrieving virtual court session with ID: {session_id}")
+        logger.info("Retrieving virtual court session with ID: %s", session_id)
+        
+        # Sessions with unsaved changes are newer than the stored copy
+        dirty = self._dirty_sessions.get(session_id)
+        if dirty is not None:
+            return dirty
         
         # Check if session exists
-        filename = os.path.join(self.storage_path, f"{session_id}.json")
-        if not os.path.exists(filename):
-            logger.warning(f"Session not found: {session_id}")
+        version = await self.store.version(session_id)
+        if version is None:
+            self._session_cache.pop(session_id, None)
+            self._participant_indexes.pop(session_id, None)
+            logger.warning("Session not found: %s", session_id)
             return None
         
-        # Load session from file
-        try:
-            with open(filename, 'r') as f:
-                session = json.load(f)
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = self._session_locks[session_id] = asyncio.Lock()
+        
+        async with lock:
+            # Reuse the parsed session unless it changed since it was read
+            cached = self._session_cache.get(session_id)
+            if cached is not None and cached[0] == version:
+                self._session_cache.move_to_end(session_id)
+                return cached[1]
             
-            logger.info(f"Successfully retrieved session: {session_id}")
-            return session
-        except Exception as e:
-            logger.error(f"Error loading session {session_id}: {str(e)}")
-            raise
+            # Load session from storage
+            try:
+                loaded = await self.store.load(session_id)
+                if loaded is None:
+                    logger.warning("Session not found: %s", session_id)
+                    return None
+                
+                version, session = loaded
+                self._cache_session(session_id, version, session)
+                logger.info("Successfully retrieved session: %s", session_id)
+                return session
+            except Exception as e:
+                logger.error("Error loading session %s: %s", session_id, e)
+                raise
+    
+    def _participant_index(self, session: Dict) -> Dict[str, int]:
+        """
+        Get the positions of a session's participants by ID.
+        
+        The index is rebuilt whenever the session's participants list has
+        been replaced, e.g. by update_session or a reload from storage.
+        """
+        participants = session["participants"]
+        cached = self._participant_indexes.get(session["id"])
+        if cached is not None and cached[0] is participants:
+            return cached[1]
+        
+        index = {}
+        for i, p in enumerate(participants):
+            index.setdefault(p.get("id"), i)
+        self._participant_indexes[session["id"]] = (participants, index)
+        return index
     
     async def update_session(self, session_id: str, update_data: Dict) -> Dict:
         """
@@ -179,44 +429,41 @@ class VirtualCourtService:
         Returns:
             Updated session
         """
-        logger.info(f"Updating virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Update session fields
-        if "status" in update_data:
-            session["status"] = update_data["status"]
-        
-        if "schedule" in update_data:
-            for key, value in update_data["schedule"].items():
-                session["schedule"][key] = value
+        logger.info("Updating virtual court session: %s", session_id)
         
-        if "participants" in update_data:
-            session["participants"] = update_data["participants"]
-        
-        if "documents" in update_data:
-            session["documents"] = update_data["documents"]
-        
-        if "metadata" in update_data:
-            for key, value in update_data["metadata"].items():
-                session["metadata"][key] = value
-        
-        # Add update event
-        session["events"].append({
-            "type": "update",
-            "timestamp": datetime.now().isoformat(),
-            "details": "Session updated"
-        })
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Successfully updated session: {session_id}")
-        return session
+        # Get the session, holding it against concurrent changes
+        async with self._updating_session(session_id) as session:
+            # Update session fields
+            fields = [key for key in ("status", "schedule", "participants", "documents", "metadata") if key in update_data]
+            if "status" in update_data:
+                session["status"] = update_data["status"]
+            
+            if "schedule" in update_data:
+                for key, value in update_data["schedule"].items():
+                    session["schedule"][key] = value
+            
+            if "participants" in update_data:
+                session["participants"] = update_data["participants"]
+            
+            if "documents" in update_data:
+                session["documents"] = update_data["documents"]
+            
+            if "metadata" in update_data:
+                for key, value in update_data["metadata"].items():
+                    session["metadata"][key] = value
+            
+            # Add update event
+            session["events"].append({
+                "type": "update",
+                "timestamp": datetime.now().isoformat(),
+                "details": "Session updated"
+            })
+            
+            # Save updated session
+            await self._save_session_fields(session, *fields)
+            
+            logger.info("Successfully updated session: %s", session_id)
+            return session
     
     async def start_session(self, session_id: str, judge_info: Dict) -> Dict:
         """
@@ -229,43 +476,33 @@ class VirtualCourtService:
         Returns:
             Updated session
         """
-        logger.info(f"Starting virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
+        logger.info("Starting virtual court session: %s", session_id)
         
-        # Check if judge is authorized
-        if judge_info.get("id") != session["presiding_judge"].get("id"):
-            logger.error(f"Unauthorized judge attempt to start session: {session_id}")
-            raise ValueError("Only the presiding judge can start this session")
-        
-        # Check if session is in the right state
-        if session["status"] not in ["scheduled", "postponed"]:
-            logger.error(f"Cannot start session in current state: {session['status']}")
-            raise ValueError(f"Cannot start session in current state: {session['status']}")
-        
-        # Update session state
-        session["status"] = "in_progress"
-        session["events"].append({
-            "type": "start",
-            "timestamp": datetime.now().isoformat(),
-            "initiated_by": judge_info.get("name"),
-            "details": "Session started"
-        })
-        
-        # For recording sessions, initialize recording data
-        if session["recording"]["enabled"]:
-            session["recording"]["started_at"] = datetime.now().isoformat()
-            session["recording"]["segments"] = []
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Successfully started session: {session_id}")
-        return session
+        # Get the session, holding it against concurrent changes
+        async with self._updating_session(session_id) as session:
+            # Check that the presiding judge may start the session now
+            self._check_judge_action(session, judge_info, "start")
+            
+            # Update session state
+            now = datetime.now().isoformat()
+            session["status"] = "in_progress"
+            session["events"].append({
+                "type": "start",
+                "timestamp": now,
+                "initiated_by": judge_info.get("name"),
+                "details": "Session started"
+            })
+            
+            # For recording sessions, initialize recording data
+            if session["recording"]["enabled"]:
+                session["recording"]["started_at"] = now
+                session["recording"]["segments"] = []
+            
+            # Save updated session
+            await self._save_session_fields(session, "status", "recording")
+            
+            logger.info("Successfully started session: %s", session_id)
+            return session
     
     async def end_session(self, session_id: str, judge_info: Dict, outcome: Optional[str] = None) -> Dict:
         """
@@ -279,51 +516,40 @@ class VirtualCourtService:
         Returns:
             Updated session
         """
-        logger.info(f"Ending virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
+        logger.info("Ending virtual court session: %s", session_id)
         
-        # Check if judge is authorized
-        if judge_info.get("id") != session["presiding_judge"].get("id"):
-            logger.error(f"Unauthorized judge attempt to end session: {session_id}")
-            raise ValueError("Only the presiding judge can end this session")
-        
-        # Check if session is in progress
-        if session["status"] != "in_progress":
-            logger.error(f"Cannot end session in current state: {session['status']}")
-            raise ValueError(f"Cannot end session in current state: {session['status']}")
-        
-        # Update session state
-        session["status"] = "completed"
-        session["events"].append({
-            "type": "end",
-            "timestamp": datetime.now().isoformat(),
-            "initiated_by": judge_info.get("name"),
-            "details": outcome or "Session ended"
-        })
-        
-        # For recording sessions, finalize recording data
-        if session["recording"]["enabled"] and "started_at" in session["recording"]:
-            session["recording"]["ended_at"] = datetime.now().isoformat()
+        # Get the session, holding it against concurrent changes
+        async with self._updating_session(session_id) as session:
+            # Check that the presiding judge may end the session now
+            self._check_judge_action(session, judge_info, "end")
             
-            # Calculate duration
-            try:
-                start_time = datetime.fromisoformat(session["recording"]["started_at"])
-                end_time = datetime.fromisoformat(session["recording"]["ended_at"])
-                duration_seconds = (end_time - start_time).total_seconds()
-                session["recording"]["duration_seconds"] = duration_seconds
-            except (ValueError, TypeError):
-                logger.warning(f"Could not calculate recording duration for session {session_id}")
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Successfully ended session: {session_id}")
-        return session
+            # Update session state
+            now = datetime.now()
+            session["status"] = "completed"
+            session["events"].append({
+                "type": "end",
+                "timestamp": now.isoformat(),
+                "initiated_by": judge_info.get("name"),
+                "details": outcome or "Session ended"
+            })
+            
+            # For recording sessions, finalize recording data
+            if session["recording"]["enabled"] and "started_at" in session["recording"]:
+                session["recording"]["ended_at"] = now.isoformat()
+                
+                # Calculate duration
+                try:
+                    start_time = datetime.fromisoformat(session["recording"]["started_at"])
+                    duration_seconds = (now - start_time).total_seconds()
+                    session["recording"]["duration_seconds"] = duration_seconds
+                except (ValueError, TypeError):
+                    logger.warning("Could not calculate recording duration for session %s", session_id)
+            
+            # Save updated session
+            await self._save_session_fields(session, "status", "recording")
+            
+            logger.info("Successfully ended session: %s", session_id)
+            return session
     
     async def join_session(self, session_id: str, participant_data: Dict) -> Dict:
         """
@@ -336,91 +562,99 @@ class VirtualCourtService:
         Returns:
             Session access information
         """
-        logger.info(f"Participant joining virtual court session: {session_id}")
+        logger.info("Participant joining virtual court session: %s", session_id)
         
         # Get the session
         session = await self.get_session(session_id)
         if not session:
-            logger.error(f"Session not found: {session_id}")
+            logger.error("Session not found: %s", session_id)
             raise ValueError(f"Session not found: {session_id}")
         
         # Check if session is joinable
-        if session["status"] not in ["scheduled", "in_progress"]:
-            logger.error(f"Cannot join session in current state: {session['status']}")
-            raise ValueError(f"Cannot join session in current state: {session['status']}")
+        self._check_state(session, "join")
         
         # Verify access code
         role = participant_data.get("role", "").lower()
         provided_code = participant_data.get("access_code")
         
         if role not in session["access_codes"] or not provided_code:
-            logger.error(f"Invalid role or missing access code: {role}")
+            logger.error("Invalid role or missing access code: %s", role)
             raise ValueError("Invalid role or missing access code")
         
-        if provided_code != session["access_codes"][role]:
-            logger.error(f"Invalid access code for role {role}")
+        # Compare in constant time so response timing reveals nothing about the code
+        expected_code = session["access_codes"][role] or ""
+        if not hmac.compare_digest(str(provided_code).encode("utf-8"), expected_code.encode("utf-8")):
+            logger.error("Invalid access code for role %s", role)
             raise ValueError("Invalid access code")
         
         # Check identity verification if required
-        if role in ["judge", "prosecutor", "defense"] and settings.COURT_CONFIG.get("require_identity_verification", True):
+        if role in VERIFIED_ROLES and self.require_identity_verification:
             # Verify identity
             identity_verified = await self._verify_participant_identity(participant_data)
             if not identity_verified:
-                logger.error(f"Identity verification failed for participant in role: {role}")
+                logger.error("Identity verification failed for participant in role: %s", role)
                 raise ValueError("Identity verification failed")
         
-        # Generate join token (would be a JWT in production)
-        join_token = str(uuid.uuid4())
-        
-        # Add participant to session
-        participant_entry = {
-            "id": participant_data.get("id", str(uuid.uuid4())),
-            "name": participant_data.get("name"),
-            "role": role,
-            "joined_at": datetime.now().isoformat()
-        }
-        
-        # Update participants list if not already present
-        participant_exists = False
-        for i, p in enumerate(session["participants"]):
-            if p.get("id") == participant_entry["id"]:
-                session["participants"][i] = {**p, **participant_entry}
-                participant_exists = True
-                break
-        
-        if not participant_exists:
-            session["participants"].append(participant_entry)
-        
-        # Add join event
-        session["events"].append({
-            "type": "join",
-            "timestamp": datetime.now().isoformat(),
-            "participant": {
-                "id": participant_entry["id"],
-                "name": participant_entry["name"],
-                "role": participant_entry["role"]
+        # Add the participant holding the session, rechecking its state in
+        # case it changed during identity verification
+        async with self._updating_session(session_id) as session:
+            self._check_state(session, "join")
+            
+            # Generate join token (would be a JWT in production)
+            join_token = str(uuid.uuid4())
+            
+            # Add participant to session
+            now = datetime.now().isoformat()
+            participant_entry = {
+                "id": participant_data.get("id", str(uuid.uuid4())),
+                "name": participant_data.get("name"),
+                "role": role,
+                "joined_at": now
             }
-        })
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Participant {participant_entry['name']} joined session {session_id} as {role}")
-        
-        # Return access information
-        return {
-            "session_id": session_id,
-            "case_title": session["case"]["title"],
-            "access_token": join_token,
-            "participant_id": participant_entry["id"],
-            "role": role,
-            "status": session["status"],
-            "session_details": {
-                "presiding_judge": session["presiding_judge"]["name"],
-                "scheduled_time": f"{session['schedule']['date']} {session['schedule']['time']}",
-                "participants_count": len(session["participants"])
+            
+            # Update participants list if not already present
+            participant_index = self._participant_index(session)
+            i = participant_index.get(participant_entry["id"])
+            if i is not None:
+                session["participants"][i].update(participant_entry)
+            else:
+                participant_index[participant_entry["id"]] = len(session["participants"])
+                session["participants"].append(participant_entry)
+            
+            # Add join event
+            session["events"].append({
+                "type": "join",
+                "timestamp": now,
+                "participant": {
+                    "id": participant_entry["id"],
+                    "name": participant_entry["name"],
+                    "role": participant_entry["role"]
+                }
+            })
+            
+            # Save updated session
+            written = self._schedule_save(session)
+            
+            logger.info("Participant %s joined session %s as %s", participant_entry['name'], session_id, role)
+            
+            # Return access information
+            access = {
+                "session_id": session_id,
+                "case_title": session["case"]["title"],
+                "access_token": join_token,
+                "participant_id": participant_entry["id"],
+                "role": role,
+                "status": session["status"],
+                "session_details": {
+                    "presiding_judge": session["presiding_judge"]["name"],
+                    "scheduled_time": f"{session['schedule']['date']} {session['schedule']['time']}",
+                    "participants_count": len(session["participants"])
+                }
             }
-        }
+        
+        # Report the join once it is saved, along with any others made meanwhile
+        await asyncio.shield(written)
+        return access
     
     async def _verify_participant_identity(self, participant_data: Dict) -> bool:
         """Verify the identity of a participant"""
@@ -432,26 +666,13 @@ class VirtualCourtService:
             return False
         
         identity_data = participant_data["identity"]
-        
-        # Check for NIN or passport
-        if "nin" in identity_data:
-            # Verify NIN using identity service
-            is_verified, _ = await self.identity_service.verify_nin(identity_data["nin"])
-            return is_verified
-        elif "passport" in identity_data:
-            # Verify passport using identity service
-            is_verified, _ = await self.identity_service.verify_passport(identity_data["passport"])
-            return is_verified
-        elif "court_official_id" in identity_data:
-            # Verify court official using identity service
-            is_verified, _ = await self.identity_service.verify_court_official(
-                identity_data["court_official_id"], 
-                identity_data.get("expected_role")
-            )
-            return is_verified
-        else:
+        if not any(credential in identity_data for credential in ("nin", "passport", "court_official_id")):
             logger.warning("No recognized identity credential provided")
             return False
+        
+        # Verify the credential using identity service
+        is_verified, _ = await self.identity_service.verify_credential(identity_data)
+        return is_verified
     
     async def leave_session(self, session_id: str, participant_id: str) -> Dict:
         """
@@ -464,43 +685,40 @@ class VirtualCourtService:
         Returns:
             Updated session
         """
-        logger.info(f"Participant leaving virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Find participant
-        participant = None
-        for p in session["participants"]:
-            if p.get("id") == participant_id:
-                participant = p
-                break
-        
-        if not participant:
-            logger.error(f"Participant not found in session: {participant_id}")
-            raise ValueError("Participant not found in session")
-        
-        # Update participant status
-        participant["left_at"] = datetime.now().isoformat()
-        
-        # Add leave event
-        session["events"].append({
-            "type": "leave",
-            "timestamp": datetime.now().isoformat(),
-            "participant": {
-                "id": participant["id"],
-                "name": participant["name"],
-                "role": participant["role"]
-            }
-        })
+        logger.info("Participant leaving virtual court session: %s", session_id)
         
-        # Save updated session
-        await self._save_session(session)
+        # Get the session, holding it against concurrent changes
+        async with self._updating_session(session_id) as session:
+            # Find participant
+            i = self._participant_index(session).get(participant_id)
+            participant = session["participants"][i] if i is not None else None
+            
+            if not participant:
+                logger.error("Participant not found in session: %s", participant_id)
+                raise ValueError("Participant not found in session")
+            
+            # Update participant status
+            now = datetime.now().isoformat()
+            participant["left_at"] = now
+            
+            # Add leave event
+            session["events"].append({
+                "type": "leave",
+                "timestamp": now,
+                "participant": {
+                    "id": participant["id"],
+                    "name": participant["name"],
+                    "role": participant["role"]
+                }
+            })
+            
+            # Save updated session
+            written = self._schedule_save(session)
+            
+            logger.info("Participant %s left session %s", participant['name'], session_id)
         
-        logger.info(f"Participant {participant['name']} left session {session_id}")
+        # Report the leave once it is saved, along with any others made meanwhile
+        await asyncio.shield(written)
         return session
     
     async def add_document(self, session_id: str, document_data: Dict, uploaded_by: Dict) -> Dict:
@@ -515,57 +733,54 @@ class VirtualCourtService:
         Returns:
             Updated session
         """
-        logger.info(f"Adding document to virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Create document entry
-        document = {
-            "id": str(uuid.uuid4()),
-            "name": document_data.get("name"),
-            "type": document_data.get("type"),
-            "path": document_data.get("path"),
-            "size_bytes": document_data.get("size_bytes"),
-            "uploaded_at": datetime.now().isoformat(),
-            "uploaded_by": {
-                "id": uploaded_by.get("id"),
-                "name": uploaded_by.get("name"),
-                "role": uploaded_by.get("role")
-            },
-            "visibility": document_data.get("visibility", "all"),
-            "metadata": document_data.get("metadata", {})
-        }
-        
-        # Add document to session
-        if "documents" not in session:
-            session["documents"] = []
-        
-        session["documents"].append(document)
-        
-        # Add document event
-        session["events"].append({
-            "type": "document_added",
-            "timestamp": datetime.now().isoformat(),
-            "document": {
-                "id": document["id"],
-                "name": document["name"]
-            },
-            "uploaded_by": {
-                "id": uploaded_by.get("id"),
-                "name": uploaded_by.get("name"),
-                "role": uploaded_by.get("role")
+        logger.info("Adding document to virtual court session: %s", session_id)
+        
+        # Get the session, holding it against concurrent changes
+        async with self._updating_session(session_id) as session:
+            # Create document entry
+            now = datetime.now().isoformat()
+            document = {
+                "id": str(uuid.uuid4()),
+                "name": document_data.get("name"),
+                "type": document_data.get("type"),
+                "path": document_data.get("path"),
+                "size_bytes": document_data.get("size_bytes"),
+                "uploaded_at": now,
+                "uploaded_by": {
+                    "id": uploaded_by.get("id"),
+                    "name": uploaded_by.get("name"),
+                    "role": uploaded_by.get("role")
+                },
+                "visibility": document_data.get("visibility", "all"),
+                "metadata": document_data.get("metadata", {})
             }
-        })
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Added document {document['name']} to session {session_id}")
-        return session
+            
+            # Add document to session
+            if "documents" not in session:
+                session["documents"] = []
+            
+            session["documents"].append(document)
+            
+            # Add document event
+            session["events"].append({
+                "type": "document_added",
+                "timestamp": now,
+                "document": {
+                    "id": document["id"],
+                    "name": document["name"]
+                },
+                "uploaded_by": {
+                    "id": uploaded_by.get("id"),
+                    "name": uploaded_by.get("name"),
+                    "role": uploaded_by.get("role")
+                }
+            })
+            
+            # Save updated session
+            await self._save_session(session)
+            
+            logger.info("Added document %s to session %s", document['name'], session_id)
+            return session
     
     async def search_sessions(self, search_params: Dict) -> List[Dict]:
         """
@@ -577,106 +792,95 @@ class VirtualCourtService:
         Returns:
             List of matching sessions
         """
-        logger.info(f"Searching virtual court sessions with params: {search_params}")
+        logger.info("Searching virtual court sessions with params: %s", search_params)
         
-        # Get all session files
-        session_files = [f for f in os.listdir(self.storage_path) if f.endswith('.json')]
+        # Stream the candidate session summaries (the store may pre-filter
+        # them), keeping only the matches
+        matches = self._search_predicate(search_params)
+        filtered_sessions = [s async for s in self.store.query(search_params) if matches(s)]
         
-        # Load all sessions
-        sessions = []
-        for filename in session_files:
-            try:
-                with open(os.path.join(self.storage_path, filename), 'r') as f:
-                    session = json.load(f)
-                sessions.append(session)
-            except Exception as e:
-                logger.error(f"Error loading session file {filename}: {str(e)}")
+        # Sort results (default: newest first by scheduled date)
+        sort_by = search_params.get("sort_by", "scheduled_date")
+        descending = search_params.get("sort_order", "desc") == "desc"
+        
+        if sort_by == "scheduled_date":
+            for session in filtered_sessions:
+                # Sessions saved before the key was stored
+                if session.get("schedule_key") is None:
+                    session["schedule_key"] = schedule_key(session)
+            sort_key = itemgetter("schedule_key")
+        elif sort_by == "created_at":
+            sort_key = itemgetter("created_at")
+        else:
+            sort_key = None
+        
+        # Limit results if specified; a bounded heap selects the top results
+        # without sorting every match
+        limit = search_params.get("limit")
+        if limit and limit > 0:
+            if sort_key is not None:
+                select = heapq.nlargest if descending else heapq.nsmallest
+                filtered_sessions = select(limit, filtered_sessions, key=sort_key)
+            else:
+                filtered_sessions = filtered_sessions[:limit]
+        elif sort_key is not None:
+            filtered_sessions.sort(key=sort_key, reverse=descending)
         
-        # Filter sessions based on search parameters
-        filtered_sessions = sessions
+        logger.info("Found %s matching sessions", len(filtered_sessions))
+        
+        # Return simplified session data for search results
+        return [self._search_result(session) for session in filtered_sessions]
+    
+    def _search_predicate(self, search_params: Dict) -> Callable[[Dict], bool]:
+        """Build a test for whether a session summary matches search parameters"""
+        # Combine the search parameters into one predicate, cheapest checks
+        # first, so each session is tested in a single pass
+        checks = []
         
         # Filter by status
         if "status" in search_params:
-            filtered_sessions = [s for s in filtered_sessions if s.get("status") == search_params["status"]]
+            status = search_params["status"]
+            checks.append(lambda s: s.get("status") == status)
         
         # Filter by case number
         if "case_number" in search_params:
-            filtered_sessions = [
-                s for s in filtered_sessions 
-                if s.get("case", {}).get("number") == search_params["case_number"]
-            ]
+            case_number = search_params["case_number"]
+            checks.append(lambda s: s.get("case", {}).get("number") == case_number)
         
         # Filter by judge
         if "judge_id" in search_params:
-            filtered_sessions = [
-                s for s in filtered_sessions 
-                if s.get("presiding_judge", {}).get("id") == search_params["judge_id"]
-            ]
+            judge_id = search_params["judge_id"]
+            checks.append(lambda s: s.get("presiding_judge", {}).get("id") == judge_id)
         
         # Filter by date range
         if "date_from" in search_params:
-            try:
-                date_from = search_params["date_from"]
-                filtered_sessions = [
-                    s for s in filtered_sessions 
-                    if s.get("schedule", {}).get("date", "") >= date_from
-                ]
-            except ValueError:
-                logger.warning(f"Invalid date_from format: {search_params['date_from']}")
+            date_from = search_params["date_from"]
+            checks.append(lambda s: s.get("schedule", {}).get("date", "") >= date_from)
         
         if "date_to" in search_params:
-            try:
-                date_to = search_params["date_to"]
-                filtered_sessions = [
-                    s for s in filtered_sessions 
-                    if s.get("schedule", {}).get("date", "") <= date_to
-                ]
-            except ValueError:
-                logger.warning(f"Invalid date_to format: {search_params['date_to']}")
+            date_to = search_params["date_to"]
+            checks.append(lambda s: s.get("schedule", {}).get("date", "") <= date_to)
         
         # Filter by participant
         if "participant_name" in search_params:
             participant_name = search_params["participant_name"].lower()
-            filtered_sessions = [
-                s for s in filtered_sessions 
-                if any(participant_name in p.get("name", "").lower() for p in s.get("participants", []))
-            ]
-        
-        # Sort results (default: newest first by scheduled date)
-        sort_by = search_params.get("sort_by", "scheduled_date")
-        sort_order = search_params.get("sort_order", "desc")
-        
-        if sort_by == "scheduled_date":
-            filtered_sessions.sort(
-                key=lambda s: f"{s.get('schedule', {}).get('date', '')}{s.get('schedule', {}).get('time', '')}", 
-                reverse=(sort_order == "desc")
-            )
-        elif sort_by == "created_at":
-            filtered_sessions.sort(
-                key=lambda s: s.get("created_at", ""), 
-                reverse=(sort_order == "desc")
+            checks.append(
+                lambda s: participant_name in s.get("participant_names", "")
             )
         
-        # Limit results if specified
-        limit = search_params.get("limit")
-        if limit and limit > 0:
-            filtered_sessions = filtered_sessions[:limit]
-        
-        logger.info(f"Found {len(filtered_sessions)} matching sessions")
-        
-        # Return simplified session data for search results
-        return [
-            {
-                "id": session.get("id"),
-                "status": session.get("status"),
-                "case": session.get("case"),
-                "schedule": session.get("schedule"),
-                "presiding_judge": session.get("presiding_judge"),
-                "participants_count": len(session.get("participants", [])),
-                "metadata": session.get("metadata")
-            }
-            for session in filtered_sessions
-        ]
+        return lambda s: all(check(s) for check in checks)
+    
+    def _search_result(self, session: Dict) -> Dict:
+        """Get the simplified data returned for a session by searches"""
+        return {
+            "id": session.get("id"),
+            "status": session.get("status"),
+            "case": session.get("case"),
+            "schedule": session.get("schedule"),
+            "presiding_judge": session.get("presiding_judge"),
+            "participants_count": session.get("participants_count", 0),
+            "metadata": session.get("metadata")
+        }
     
     async def postpone_session(self, session_id: str, new_date: str, new_time: str, reason: str, judge_info: Dict) -> Dict:
         """
@@ -692,55 +896,44 @@ class VirtualCourtService:
         Returns:
             Updated session
         """
-        logger.info(f"Postponing virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Check if judge is authorized
-        if judge_info.get("id") != session["presiding_judge"].get("id"):
-            logger.error(f"Unauthorized judge attempt to postpone session: {session_id}")
-            raise ValueError("Only the presiding judge can postpone this session")
-        
-        # Check if session is in a state that can be postponed
-        if session["status"] not in ["scheduled", "postponed"]:
-            logger.error(f"Cannot postpone session in current state: {session['status']}")
-            raise ValueError(f"Cannot postpone session in current state: {session['status']}")
-        
-        # Save original schedule for reference
-        original_schedule = {
-            "date": session["schedule"]["date"],
-            "time": session["schedule"]["time"]
-        }
+        logger.info("Postponing virtual court session: %s", session_id)
         
-        # Update session schedule
-        session["schedule"]["date"] = new_date
-        session["schedule"]["time"] = new_time
-        
-        # Update session state
-        session["status"] = "postponed"
-        
-        # Add postponement event
-        session["events"].append({
-            "type": "postpone",
-            "timestamp": datetime.now().isoformat(),
-            "initiated_by": judge_info.get("name"),
-            "reason": reason,
-            "original_schedule": original_schedule,
-            "new_schedule": {
-                "date": new_date,
-                "time": new_time
+        # Get the session, holding it against concurrent changes
+        async with self._updating_session(session_id) as session:
+            # Check that the presiding judge may postpone the session now
+            self._check_judge_action(session, judge_info, "postpone")
+            
+            # Save original schedule for reference
+            original_schedule = {
+                "date": session["schedule"]["date"],
+                "time": session["schedule"]["time"]
             }
-        })
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Successfully postponed session {session_id} to {new_date} {new_time}")
-        return session
+            
+            # Update session schedule
+            session["schedule"]["date"] = new_date
+            session["schedule"]["time"] = new_time
+            
+            # Update session state
+            session["status"] = "postponed"
+            
+            # Add postponement event
+            session["events"].append({
+                "type": "postpone",
+                "timestamp": datetime.now().isoformat(),
+                "initiated_by": judge_info.get("name"),
+                "reason": reason,
+                "original_schedule": original_schedule,
+                "new_schedule": {
+                    "date": new_date,
+                    "time": new_time
+                }
+            })
+            
+            # Save updated session
+            await self._save_session_fields(session, "status", "schedule.date", "schedule.time")
+            
+            logger.info("Successfully postponed session %s to %s %s", session_id, new_date, new_time)
+            return session
     
     async def get_session_recording(self, session_id: str) -> Optional[Dict]:
         """
@@ -752,36 +945,37 @@ class VirtualCourtService:
         Returns:
             Recording information if available, None otherwise
         """
-        logger.info(f"Retrieving recording for session: {session_id}")
+        logger.info("Retrieving recording for session: %s", session_id)
         
         # Get the session
         session = await self.get_session(session_id)
         if not session:
-            logger.error(f"Session not found: {session_id}")
+            logger.error("Session not found: %s", session_id)
             raise ValueError(f"Session not found: {session_id}")
         
         # Check if recording is available
-        if not session.get("recording", {}).get("enabled", False):
-            logger.warning(f"Recording not enabled for session: {session_id}")
+        recording = session.get("recording", {})
+        if not recording.get("enabled", False):
+            logger.warning("Recording not enabled for session: %s", session_id)
             return None
         
         if session.get("status") != "completed":
-            logger.warning(f"Recording not available for incomplete session: {session_id}")
+            logger.warning("Recording not available for incomplete session: %s", session_id)
             return None
         
-        if "started_at" not in session.get("recording", {}):
-            logger.warning(f"Recording never started for session: {session_id}")
+        if "started_at" not in recording:
+            logger.warning("Recording never started for session: %s", session_id)
             return None
         
         # Return recording information
         recording_info = {
             "session_id": session_id,
             "case_title": session.get("case", {}).get("title"),
-            "started_at": session.get("recording", {}).get("started_at"),
-            "ended_at": session.get("recording", {}).get("ended_at"),
-            "duration_seconds": session.get("recording", {}).get("duration_seconds"),
-            "has_transcript": session.get("recording", {}).get("auto_transcription", False),
-            "segments": session.get("recording", {}).get("segments", []),
+            "started_at": recording.get("started_at"),
+            "ended_at": recording.get("ended_at"),
+            "duration_seconds": recording.get("duration_seconds"),
+            "has_transcript": recording.get("auto_transcription", False),
+            "segments": recording.get("segments", []),
             "download_url": f"/api/virtual-court/sessions/{session_id}/recording/download"
         }
         
@@ -797,12 +991,12 @@ class VirtualCourtService:
         Returns:
             List of session events
         """
-        logger.info(f"Retrieving events for session: {session_id}")
+        logger.info("Retrieving events for session: %s", session_id)
         
         # Get the session
         session = await self.get_session(session_id)
         if not session:
-            logger.error(f"Session not found: {session_id}")
+            logger.error("Session not found: %s", session_id)
             raise ValueError(f"Session not found: {session_id}")
         
         # Return events
@@ -818,33 +1012,36 @@ class VirtualCourtService:
         Returns:
             Session report
         """
-        logger.info(f"Generating report for session: {session_id}")
+        logger.info("Generating report for session: %s", session_id)
         
         # Get the session
         session = await self.get_session(session_id)
         if not session:
-            logger.error(f"Session not found: {session_id}")
+            logger.error("Session not found: %s", session_id)
             raise ValueError(f"Session not found: {session_id}")
         
         # Check if session is completed
         if session.get("status") != "completed":
-            logger.warning(f"Cannot generate report for incomplete session: {session_id}")
+            logger.warning("Cannot generate report for incomplete session: %s", session_id)
             raise ValueError("Cannot generate report for incomplete session")
         
         # Create report
+        case = session.get("case", {})
+        schedule = session.get("schedule", {})
+        recording = session.get("recording", {})
         report = {
             "session_id": session_id,
             "report_generated_at": datetime.now().isoformat(),
             "case_information": {
-                "number": session.get("case", {}).get("number"),
-                "title": session.get("case", {}).get("title"),
-                "type": session.get("case", {}).get("type")
+                "number": case.get("number"),
+                "title": case.get("title"),
+                "type": case.get("type")
             },
             "session_details": {
-                "date": session.get("schedule", {}).get("date"),
-                "time": session.get("schedule", {}).get("time"),
-                "duration_minutes": session.get("schedule", {}).get("duration_minutes"),
-                "actual_duration_seconds": session.get("recording", {}).get("duration_seconds")
+                "date": schedule.get("date"),
+                "time": schedule.get("time"),
+                "duration_minutes": schedule.get("duration_minutes"),
+                "actual_duration_seconds": recording.get("duration_seconds")
             },
             "presiding_judge": session.get("presiding_judge"),
             "participants": self._summarize_participants(session.get("participants", [])),
@@ -859,11 +1056,11 @@ class VirtualCourtService:
                 }
                 for doc in session.get("documents", [])
             ],
-            "recording_info": session.get("recording", {}).get("enabled", False) and {
-                "duration_seconds": session.get("recording", {}).get("duration_seconds"),
-                "auto_transcription": session.get("recording", {}).get("auto_transcription", False),
-                "started_at": session.get("recording", {}).get("started_at"),
-                "ended_at": session.get("recording", {}).get("ended_at")
+            "recording_info": recording.get("enabled", False) and {
+                "duration_seconds": recording.get("duration_seconds"),
+                "auto_transcription": recording.get("auto_transcription", False),
+                "started_at": recording.get("started_at"),
+                "ended_at": recording.get("ended_at")
             }
         }
         
@@ -871,1412 +1068,62 @@ class VirtualCourtService:
     
     def _summarize_participants(self, participants: List[Dict]) -> Dict:
         """Summarize participant information for the session report"""
-        roles = {}
+        roles = defaultdict(list)
         
         # Count participants by role
         for participant in participants:
-            role = participant.get("role", "unknown")
-            if role not in roles:
-                roles[role] = []
+            get = participant.get
             
             # Include basic participant info
             participant_info = {
-                "id": participant.get("id"),
-                "name": participant.get("name"),
-                "joined_at": participant.get("joined_at")
+                "id": get("id"),
+                "name": get("name"),
+                "joined_at": get("joined_at")
             }
             
             # Include leave time if available
             if "left_at" in participant:
-                participant_info["left_at"] = participant.get("left_at")
+                participant_info["left_at"] = participant["left_at"]
             
-            roles[role].append(participant_info)
+            roles[get("role", "unknown")].append(participant_info)
         
         return {
-            "by_role": roles,
+            "by_role": dict(roles),
             "total_count": len(participants)
         }
     
     def _summarize_events(self, events: List[Dict]) -> Dict:
         """Summarize events for the session report"""
-        event_types = {}
-        
-        # Group events by type
+        # Count events by type, noting the first start and end, in one pass
+        counts = Counter()
+        start_event = end_event = None
         for event in events:
             event_type = event.get("type", "unknown")
-            if event_type not in event_types:
-                event_types[event_type] = []
-            
-            event_types[event_type].append(event)
+            counts[event_type] += 1
+            if event_type == "start" and start_event is None:
+                start_event = event
+            elif event_type == "end" and end_event is None:
+                end_event = event
         
         # Create summary
         summary = {
-            "count_by_type": {event_type: len(events_list) for event_type, events_list in event_types.items()},
+            "count_by_type": dict(counts),
             "total_count": len(events)
         }
         
         # Add some specific event information
-        if "start" in event_types and event_types["start"]:
-            start_event = event_types["start"][0]
+        if start_event is not None:
             summary["started_at"] = start_event.get("timestamp")
             summary["started_by"] = start_event.get("initiated_by")
         
-        if "end" in event_types and event_types["end"]:
-            end_event = event_types["end"][0]
+        if end_event is not None:
             summary["ended_at"] = end_event.get("timestamp")
             summary["ended_by"] = end_event.get("initiated_by")
             summary["outcome"] = end_event.get("details")
         
-        return summary"""
-Virtual Court Service for NigeriaJustice.AI
-
-This module provides functionality for managing virtual court sessions,
-allowing remote participation in court proceedings with secure identity
-verification.
-"""
-
-import logging
-import os
-import json
-import uuid
-from typing import Dict, List, Optional, Tuple, Any
-from datetime import datetime, timedelta
-import random
-import string
-import asyncio
-
-from app.core.config import settings
-from app.services.identity_verification import IdentityVerificationService
-
-logger = logging.getLogger(__name__)
+        return summary
 
-class VirtualCourtService:
-    """
-    Service for managing virtual court sessions.
-    
-    This service enables the creation, management, and execution of
-    virtual court sessions with secure identity verification.
-    """
-    
-    def __init__(self, storage_path: str = None, identity_service: Optional[IdentityVerificationService] = None):
-        """
-        Initialize the virtual court service.
-        
-        Args:
-            storage_path: Path to store session data
-            identity_service: Identity verification service instance
-        """
-        self.storage_path = storage_path or os.path.join("data", "virtual_sessions")
-        self.identity_service = identity_service or IdentityVerificationService()
-        
-        # Create storage directory if it doesn't exist
-        os.makedirs(self.storage_path, exist_ok=True)
-        
-        logger.info("Virtual Court Service initialized")
-    
-    async def create_session(self, session_data: Dict, judge_info: Dict) -> Dict:
-        """
-        Create a new virtual court session.
-        
-        Args:
-            session_data: Data for the session
-            judge_info: Information about the presiding judge
-            
-        Returns:
-            Created session with ID and access codes
-        """
-        logger.info(f"Creating new virtual court session for case {session_data.get('case_number', 'unknown')}")
-        
-        # Validate required fields
-        required_fields = ["case_number", "case_title", "scheduled_date", "scheduled_time"]
-        for field in required_fields:
-            if field not in session_data or not session_data[field]:
-                logger.error(f"Missing required field for virtual session: {field}")
-                raise ValueError(f"Missing required field for virtual session: {field}")
-        
-        # Generate session ID
-        session_id = str(uuid.uuid4())
-        
-        # Generate access codes for different roles
-        access_codes = self._generate_access_codes()
-        
-        # Create session document
-        session = {
-            "id": session_id,
-            "status": "scheduled",
-            "created_at": datetime.now().isoformat(),
-            "case": {
-                "number": session_data.get("case_number"),
-                "title": session_data.get("case_title"),
-                "type": session_data.get("case_type")
-            },
-            "schedule": {
-                "date": session_data.get("scheduled_date"),
-                "time": session_data.get("scheduled_time"),
-                "duration_minutes": session_data.get("duration_minutes", 60)
-            },
-            "presiding_judge": {
-                "id": judge_info.get("id"),
-                "name": judge_info.get("name"),
-                "court": judge_info.get("court")
-            },
-            "participants": session_data.get("participants", []),
-            "access_codes": access_codes,
-            "recording": {
-                "enabled": session_data.get("recording_enabled", True),
-                "auto_transcription": session_data.get("auto_transcription", True)
-            },
-            "documents": session_data.get("documents", []),
-            "events": [],
-            "metadata": {
-                "court_room": session_data.get("court_room"),
-                "jurisdiction": session_data.get("jurisdiction"),
-                "public_access": session_data.get("public_access", False)
-            }
-        }
-        
-        # Save session to storage
-        await self._save_session(session)
-        
-        logger.info(f"Created virtual court session with ID: {session_id}")
-        return session
-    
-    def _generate_access_codes(self) -> Dict[str, str]:
-        """Generate secure access codes for virtual court roles"""
-        
-        # Generate random 8-character alphanumeric codes
-        def generate_code():
-            chars = string.ascii_uppercase + string.digits
-            return ''.join(random.choice(chars) for _ in range(8))
-        
-        # Create codes for different roles
-        return {
-            "judge": generate_code(),
-            "prosecutor": generate_code(),
-            "defense": generate_code(),
-            "witness": generate_code(),
-            "clerk": generate_code(),
-            "public": generate_code() if settings.COURT_CONFIG.get("allow_public_access", False) else None
-        }
-    
-    async def _save_session(self, session: Dict) -> None:
-        """Save session to storage"""
-        session_id = session.get("id")
-        filename = os.path.join(self.storage_path, f"{session_id}.json")
-        
-        # Save as JSON file
-        with open(filename, 'w') as f:
-            json.dump(session, f, indent=2)
-    
-    async def get_session(self, session_id: str) -> Optional[Dict]:
-        """
-        Get a virtual court session by ID.
-        
-        Args:
-            session_id: ID of the session
-            
-        Returns:
-            Session data if found, None otherwise
-        """
-        logger.info(f"Retrieving virtual court session with ID: {session_id}")
-        
-        # Check if session exists
-        filename = os.path.join(self.storage_path, f"{session_id}.json")
-        if not os.path.exists(filename):
-            logger.warning(f"Session not found: {session_id}")
-            return None
-        
-        # Load session from file
-        try:
-            with open(filename, 'r') as f:
-                session = json.load(f)
-            
-            logger.info(f"Successfully retrieved session: {session_id}")
-            return session
-        except Exception as e:
-            logger.error(f"Error loading session {session_id}: {str(e)}")
-            raise
-    
-    async def update_session(self, session_id: str, update_data: Dict) -> Dict:
-        """
-        Update a virtual court session.
-        
-        Args:
-            session_id: ID of the session
-            update_data: Data to update
-            
-        Returns:
-            Updated session
-        """
-        logger.info(f"Updating virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Update session fields
-        if "status" in update_data:
-            session["status"] = update_data["status"]
-        
-        if "schedule" in update_data:
-            for key, value in update_data["schedule"].items():
-                session["schedule"][key] = value
-        
-        if "participants" in update_data:
-            session["participants"] = update_data["participants"]
-        
-        if "documents" in update_data:
-            session["documents"] = update_data["documents"]
-        
-        if "metadata" in update_data:
-            for key, value in update_data["metadata"].items():
-                session["metadata"][key] = value
-        
-        # Add update event
-        session["events"].append({
-            "type": "update",
-            "timestamp": datetime.now().isoformat(),
-            "details": "Session updated"
-        })
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Successfully updated session: {session_id}")
-        return session
-    
-    async def start_session(self, session_id: str, judge_info: Dict) -> Dict:
-        """
-        Start a virtual court session.
-        
-        Args:
-            session_id: ID of the session
-            judge_info: Information about the presiding judge
-            
-        Returns:
-            Updated session
-        """
-        logger.info(f"Starting virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Check if judge is authorized
-        if judge_info.get("id") != session["presiding_judge"].get("id"):
-            logger.error(f"Unauthorized judge attempt to start session: {session_id}")
-            raise ValueError("Only the presiding judge can start this session")
-        
-        # Check if session is in the right state
-        if session["status"] not in ["scheduled", "postponed"]:
-            logger.error(f"Cannot start session in current state: {session['status']}")
-            raise ValueError(f"Cannot start session in current state: {session['status']}")
-        
-        # Update session state
-        session["status"] = "in_progress"
-        session["events"].append({
-            "type": "start",
-            "timestamp": datetime.now().isoformat(),
-            "initiated_by": judge_info.get("name"),
-            "details": "Session started"
-        })
-        
-        # For recording sessions, initialize recording data
-        if session["recording"]["enabled"]:
-            session["recording"]["started_at"] = datetime.now().isoformat()
-            session["recording"]["segments"] = []
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Successfully started session: {session_id}")
-        return session
-    
-    async def end_session(self, session_id: str, judge_info: Dict, outcome: Optional[str] = None) -> Dict:
-        """
-        End a virtual court session.
-        
-        Args:
-            session_id: ID of the session
-            judge_info: Information about the presiding judge
-            outcome: Optional outcome of the session
-            
-        Returns:
-            Updated session
-        """
-        logger.info(f"Ending virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Check if judge is authorized
-        if judge_info.get("id") != session["presiding_judge"].get("id"):
-            logger.error(f"Unauthorized judge attempt to end session: {session_id}")
-            raise ValueError("Only the presiding judge can end this session")
-        
-        # Check if session is in progress
-        if session["status"] != "in_progress":
-            logger.error(f"Cannot end session in current state: {session['status']}")
-            raise ValueError(f"Cannot end session in current state: {session['status']}")
-        
-        # Update session state
-        session["status"] = "completed"
-        session["events"].append({
-            "type": "end",
-            "timestamp": datetime.now().isoformat(),
-            "initiated_by": judge_info.get("name"),
-            "details": outcome or "Session ended"
-        })
-        
-        # For recording sessions, finalize recording data
-        if session["recording"]["enabled"] and "started_at" in session["recording"]:
-            session["recording"]["ended_at"] = datetime.now().isoformat()
-            
-            # Calculate duration
-            try:
-                start_time = datetime.fromisoformat(session["recording"]["started_at"])
-                end_time = datetime.fromisoformat(session["recording"]["ended_at"])
-                duration_seconds = (end_time - start_time).total_seconds()
-                session["recording"]["duration_seconds"] = duration_seconds
-            except (ValueError, TypeError):
-                logger.warning(f"Could not calculate recording duration for session {session_id}")
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Successfully ended session: {session_id}")
-        return session
-    
-    async def join_session(self, session_id: str, participant_data: Dict) -> Dict:
-        """
-        Join a virtual court session.
-        
-        Args:
-            session_id: ID of the session
-            participant_data: Data about the participant
-            
-        Returns:
-            Session access information
-        """
-        logger.info(f"Participant joining virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Check if session is joinable
-        if session["status"] not in ["scheduled", "in_progress"]:
-            logger.error(f"Cannot join session in current state: {session['status']}")
-            raise ValueError(f"Cannot join session in current state: {session['status']}")
-        
-        # Verify access code
-        role = participant_data.get("role", "").lower()
-        provided_code = participant_data.get("access_code")
-        
-        if role not in session["access_codes"] or not provided_code:
-            logger.error(f"Invalid role or missing access code: {role}")
-            raise ValueError("Invalid role or missing access code")
-        
-        if provided_code != session["access_codes"][role]:
-            logger.error(f"Invalid access code for role {role}")
-            raise ValueError("Invalid access code")
-        
-        # Check identity verification if required
-        if role in ["judge", "prosecutor", "defense"] and settings.COURT_CONFIG.get("require_identity_verification", True):
-            # Verify identity
-            identity_verified = await self._verify_participant_identity(participant_data)
-            if not identity_verified:
-                logger.error(f"Identity verification failed for participant in role: {role}")
-                raise ValueError("Identity verification failed")
-        
-        # Generate join token (would be a JWT in production)
-        join_token = str(uuid.uuid4())
-        
-        # Add participant to session
-        participant_entry = {
-            "id": participant_data.get("id", str(uuid.uuid4())),
-            "name": participant_data.get("name"),
-            "role": role,
-            "joined_at": datetime.now().isoformat()
-        }
-        
-        # Update participants list if not already present
-        participant_exists = False
-        for i, p in enumerate(session["participants"]):
-            if p.get("id") == participant_entry["id"]:
-                session["participants"][i] = {**p, **participant_entry}
-                participant_exists = True
-                break
-        
-        if not participant_exists:
-            session["participants"].append(participant_entry)
-        
-        # Add join event
-        session["events"].append({
-            "type": "join",
-            "timestamp": datetime.now().isoformat(),
-            "participant": {
-                "id": participant_entry["id"],
-                "name": participant_entry["name"],
-                "role": participant_entry["role"]
-            }
-        })
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Participant {participant_entry['name']} joined session {session_id} as {role}")
-        
-        # Return access information
-        return {
-            "session_id": session_id,
-            "case_title": session["case"]["title"],
-            "access_token": join_token,
-            "participant_id": participant_entry["id"],
-            "role": role,
-            "status": session["status"],
-            "session_details": {
-                "presiding_judge": session["presiding_judge"]["name"],
-                "scheduled_time": f"{session['schedule']['date']} {session['schedule']['time']}",
-                "participants_count": len(session["participants"])
-            }
-        }
-    
-    async def _verify_participant_identity(self, participant_data: Dict) -> bool:
-        """Verify the identity of a participant"""
-        # In production, this would use the identity verification service
-        # For now, check if the required identity info is provided
-        
-        if not participant_data.get("identity"):
-            logger.warning("No identity data provided for verification")
-            return False
-        
-        identity_data = participant_data["identity"]
-        
-        # Check for NIN or passport
-        if "nin" in identity_data:
-            # Verify NIN using identity service
-            is_verified, _ = await self.identity_service.verify_nin(identity_data["nin"])
-            return is_verified
-        elif "passport" in identity_data:
-            # Verify passport using identity service
-            is_verified, _ = await self.identity_service.verify_passport(identity_data["passport"])
-            return is_verified
-        elif "court_official_id" in identity_data:
-            # Verify court official using identity service
-            is_verified, _ = await self.identity_service.verify_court_official(
-                identity_data["court_official_id"], 
-                identity_data.get("expected_role")
-            )
-            return is_verified
-        else:
-            logger.warning("No recognized identity credential provided")
-            return False
-    
-    async def leave_session(self, session_id: str, participant_id: str) -> Dict:
-        """
-        Leave a virtual court session.
-        
-        Args:
-            session_id: ID of the session
-            participant_id: ID of the participant
-            
-        Returns:
-            Updated session
-        """
-        logger.info(f"Participant leaving virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Find participant
-        participant = None
-        for p in session["participants"]:
-            if p.get("id") == participant_id:
-                participant = p
-                break
-        
-        if not participant:
-            logger.error(f"Participant not found in session: {participant_id}")
-            raise ValueError("Participant not found in session")
-        
-        # Update participant status
-        participant["left_at"] = datetime.now().isoformat()
-        
-        # Add leave event
-        session["events"].append({
-            "type": "leave",
-            "timestamp": datetime.now().isoformat(),
-            "participant": {
-                "id": participant["id"],
-                "name": participant["name"],
-                "role": participant["role"]
-            }
-        })
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Participant {participant['name']} left session {session_id}")
-        return session
-    
-    async def add_document(self, session_id: str, document_data: Dict, uploaded_by: Dict) -> Dict:
-        """
-        Add a document to a virtual court session.
-        
-        Args:
-            session_id: ID of the session
-            document_data: Data about the document
-            uploaded_by: Information about who uploaded the document
-            
-        Returns:
-            Updated session
-        """
-        logger.info(f"Adding document to virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Create document entry
-        document = {
-            "id": str(uuid.uuid4()),
-            "name": document_data.get("name"),
-            "type": document_data.get("type"),
-            "path": document_data.get("path"),
-            "size_bytes": document_data.get("size_bytes"),
-            "uploaded_at": datetime.now().isoformat(),
-            "uploaded_by": {
-                "id": uploaded_by.get("id"),
-                "name": uploaded_by.get("name"),
-                "role": uploaded_by.get("role")
-            },
-            "visibility": document_data.get("visibility", "all"),
-            "metadata": document_data.get("metadata", {})
-        }
-        
-        # Add document to session
-        if "documents" not in session:
-            session["documents"] = []
-        
-        session["documents"].append(document)
-        
-        # Add document event
-        session["events"].append({
-            "type": "document_added",
-            "timestamp": datetime.now().isoformat(),
-            "document": {
-                "id": document["id"],
-                "name": document["name"]
-            },
-            "uploaded_by": {
-                "id": uploaded_by.get("id"),
-                "name": uploaded_by.get("name"),
-                "role": uploaded_by.get("role")
-            }
-        })
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Added document {document['name']} to session {session_id}")
-        return session
-    
-    async def search_sessions(self, search_params: Dict) -> List[Dict]:
-        """
-        Search for virtual court sessions based on parameters.
-        
-        Args:
-            search_params: Search parameters
-            
-        Returns:
-            List of matching sessions
-        """
-        logger.info(f"Searching virtual court sessions with params: {search_params}")
-        
-        # Get all session files
-        session_files = [f for f in os.listdir(self.storage_path) if f.endswith('.json')]
-        
-        # Load all sessions
-        sessions = []
-        for filename in session_files:
-            try:
-                with open(os.path.join(self.storage_path, filename), 'r') as f:
-                    session = json.load(f)
-                sessions.append(session)
-            except Exception as e:
-                logger.error(f"Error loading session file {filename}: {str(e)}")
-        
-        # Filter sessions based on search parameters
-        filtered_sessions = sessions
-        
-        # Filter by status
-        if "status" in search_params:
-            filtered_sessions = [s for s in filtered_sessions if s.get("status") == search_params["status"]]
-        
-        # Filter by case number
-        if "case_number" in search_params:
-            filtered_sessions = [
-                s for s in filtered_sessions 
-                if s.get("case", {}).get("number") == search_params["case_number"]
-            ]
-        
-        # Filter by judge
-        if "judge_id" in search_params:
-            filtered_sessions = [
-                s for s in filtered_sessions 
-                if s.get("presiding_judge", {}).get("id") == search_params["judge_id"]
-            ]
-        
-        # Filter by date range
-        if "date_from" in search_params:
-            try:
-                date_from = search_params["date_from"]
-                filtered_sessions = [
-                    s for s in filtered_sessions 
-                    if s.get("schedule", {}).get("date", "") >= date_from
-                ]
-            except ValueError:
-                logger.warning(f"Invalid date_from format: {search_params['date_from']}")
-        
-        if "date_to" in search_params:
-            try:
-                date_to = search_params["date_to"]
-                filtered_sessions = [
-                    s for s in filtered_sessions 
-                    if s.get("schedule", {}).get("date", "") <= date_to
-                ]
-            except ValueError:
-                logger.warning(f"Invalid date_to format: {search_params['date_to']}")
-        
-        # Filter by participant
-        if "participant_name" in search_params:
-            participant_name = search_params["participant_name"].lower()
-            filtered_sessions = [
-                s for s in filtered_sessions 
-                if any(participant_name in p.get("name", "").lower() for p in s.get("participants", []))
-            ]
-        
-        # Sort results (default: newest first by scheduled date)
-        sort_by = search_params.get("sort_by", "scheduled_date")
-        sort_order = search_params.get("sort_order", "desc")
-        
-        if sort_by == "scheduled_date":
-            filtered_sessions.sort(
-                key=lambda s: f"{s.get('schedule', {}).get('date', '')}{s.get('schedule', {}).get('time', '')}", 
-                reverse=(sort_order == "desc")
-            )
-        elif sort_by == "created_at":
-            filtered_sessions.sort(
-                key=lambda s: s.get("created_at", ""), 
-                reverse=(sort_order == "desc")
-            )
-        
-        # Limit results if specified
-        limit = search_params.get("limit")
-        if limit and limit > 0:
-            filtered_sessions = filtered_sessions[:limit]
-        
-        logger.info(f"Found {len(filtered_sessions)} matching sessions")
-        
-        # Return simplified session data for search results
-        return [
-            {
-                "id": session.get("id"),
-                "status": session.get("status"),
-                "case": session.get("case"),
-                "schedule": session.get("schedule"),
-                "presiding_judge": session.get("presiding_judge"),
-                "participants_count": len(session.get("participants", [])),
-                "metadata": session.get("metadata")
-            }
-            for session in filtered_sessions
-        ]
-    
-    async def postpone_session(self, session_id: str, new_date: str, new_time: str, reason: str, judge_info: Dict) -> Dict:
-        """
-        Postpone a virtual court session.
-        
-        Args:
-            session_id: ID of the session
-            new_date: New session date
-            new_time: New session time
-            reason: Reason for postponement
-            judge_info: Information about the presiding judge
-            
-        Returns:
-            Updated session
-        """
-        logger.info(f"Postponing virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Check if judge is authorized
-        if judge_info.get("id") != session["presiding_judge"].get("id"):
-            logger.error(f"Unauthorized judge attempt to postpone session: {session_id}")
-            raise ValueError("Only the presiding judge can postpone this session")
-        
-        # Check if session is in a state that can be postponed
-        if session["status"] not in ["scheduled", "postponed"]:
-            logger.error(f"Cannot postpone session in current state: {session['status']}")
-            raise ValueError(f"Cannot postpone session in current state: {session['status']}")
-        
-        # Save original schedule for reference
-        original_schedule = {
-            "date": session["schedule"]["date"],
-            "time": session["schedule"]["time"]
-        }
-        
-        # Update session schedule
-        session["schedule"]["date"] = new_date
-        session["schedule"]["time"] = new_time
-        
-        # Update session state
-        session["status"] = "postponed"
-        
-        # Add postponement event
-        session["events"].append({
-            "type": "postpone",
-            "timestamp": datetime.now().isoformat(),
-            "initiated_by": judge_info.get("name"),
-            "reason": reason,
-            "original_schedule": original_schedule,
-            "new_schedule": {
-                "date": new_date,
-                "time": new_time
-            }
-        })
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Successfully postponed session {session_id} to {new_date} {new_time}")
-        return session
-    
-    async def get_session_recording(self, session_id: str) -> Optional[Dict]:
-        """
-        Get recording information for a completed session.
-        
-        Args:
-            session_id: ID of the session
-            
-        Returns:
-            Recording information if available, None otherwise
-        """
-        logger.info(f"Retrieving recording for session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Check if recording is available
-        if not session.get("recording", {}).get("enabled", False):
-            logger.warning(f"Recording not enabled for session: {session_id}")
-            return None
-        
-        if session.get("status") != "completed":
-            logger.warning(f"Recording not available for incomplete session: {session_id}")
-            return None
-        
-        if "started_at" not in session.get("recording", {}):
-            logger.warning(f"Recording never started for session: {session_id}")
-            return None
-        
-        # Return recording information
-        recording_info = {
-            "session_id": session_id,
-            "case_title": session.get("case", {}).get("title"),
-            "started_at": session.get("recording", {}).get("started_at"),
-            "ended_at": session.get("recording", {}).get("ended_at"),
-            "duration_seconds": session.get("recording", {}).get("duration_seconds"),
-            "has_transcript": session.get("recording", {}).get("auto_transcription", False),
-            "segments": session.get("recording", {}).get("segments", []),
-            "download_url": f"/api/virtual-court/sessions/{session_id}/recording/download"
-        }
-        
-        return recording_info
-    
-    async def get_session_events(self, session_id: str) -> List[Dict]:
-        """
-        Get all events for a session.
-        
-        Args:
-            session_id: ID of the session
-            
-        Returns:
-            List of session events
-        """
-        logger.info(f"Retrieving events for session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Return events
-        return session.get("events", [])
-    
-    async def generate_session_report(self, session_id: str) -> Dict:
-        """
-        Generate a comprehensive report for a completed session.
-        
-        Args:
-            session_id: ID of the session
-            
-        Returns:
-            Session report
-        """
-        logger.info(f"Generating report for session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Check if session is completed
-        if session.get("status") != "completed":
-            logger.warning(f"Cannot generate report for incomplete session: {session_id}")
-            raise ValueError("Cannot generate report for incomplete session")
-        
-        # Create report
-        report = {
-            "session_id": session_id,
-            "report_generated_at": datetime.now().isoformat(),
-            "case_information": {
-                "number": session.get("case", {}).get("number"),
-                "title": session.get("case", {}).get("title"),
-                "type": session.get("case", {}).get("type")
-            },
-            "session_details": {
-                "date": session.get("schedule", {}).get("date"),
-                "time": session.get("schedule", {}).get("time"),
-                "duration_minutes": session.get("schedule", {}).get("duration_minutes"),
-                "actual_duration_seconds": session.get("recording", {}).get("duration_seconds")
-            },
-            "presiding_judge": session.get("presiding_judge"),
-            "participants": self._summarize_participants(session.get("participants", [])),
-            "events_summary": self._summarize_events(session.get("events", [])),
-            "documents": [
-                {
-                    "id": doc.get("id"),
-                    "name": doc.get("name"),
-                    "type": doc.get("type"),
-                    "uploaded_by": doc.get("uploaded_by", {}).get("name"),
-                    "uploaded_at": doc.get("uploaded_at")
-                }
-                for doc in session.get("documents", ["""
-Virtual Court Service for NigeriaJustice.AI
-
-This module provides functionality for managing virtual court sessions,
-allowing remote participation in court proceedings with secure identity
-verification.
-"""
-
-import logging
-import os
-import json
-import uuid
-from typing import Dict, List, Optional, Tuple, Any
-from datetime import datetime, timedelta
-import random
-import string
-import asyncio
-
-from app.core.config import settings
-from app.services.identity_verification import IdentityVerificationService
-
-logger = logging.getLogger(__name__)
-
-class VirtualCourtService:
-    """
-    Service for managing virtual court sessions.
-    
-    This service enables the creation, management, and execution of
-    virtual court sessions with secure identity verification.
-    """
-    
-    def __init__(self, storage_path: str = None, identity_service: Optional[IdentityVerificationService] = None):
-        """
-        Initialize the virtual court service.
-        
-        Args:
-            storage_path: Path to store session data
-            identity_service: Identity verification service instance
-        """
-        self.storage_path = storage_path or os.path.join("data", "virtual_sessions")
-        self.identity_service = identity_service or IdentityVerificationService()
-        
-        # Create storage directory if it doesn't exist
-        os.makedirs(self.storage_path, exist_ok=True)
-        
-        logger.info("Virtual Court Service initialized")
-    
-    async def create_session(self, session_data: Dict, judge_info: Dict) -> Dict:
-        """
-        Create a new virtual court session.
-        
-        Args:
-            session_data: Data for the session
-            judge_info: Information about the presiding judge
-            
-        Returns:
-            Created session with ID and access codes
-        """
-        logger.info(f"Creating new virtual court session for case {session_data.get('case_number', 'unknown')}")
-        
-        # Validate required fields
-        required_fields = ["case_number", "case_title", "scheduled_date", "scheduled_time"]
-        for field in required_fields:
-            if field not in session_data or not session_data[field]:
-                logger.error(f"Missing required field for virtual session: {field}")
-                raise ValueError(f"Missing required field for virtual session: {field}")
-        
-        # Generate session ID
-        session_id = str(uuid.uuid4())
-        
-        # Generate access codes for different roles
-        access_codes = self._generate_access_codes()
-        
-        # Create session document
-        session = {
-            "id": session_id,
-            "status": "scheduled",
-            "created_at": datetime.now().isoformat(),
-            "case": {
-                "number": session_data.get("case_number"),
-                "title": session_data.get("case_title"),
-                "type": session_data.get("case_type")
-            },
-            "schedule": {
-                "date": session_data.get("scheduled_date"),
-                "time": session_data.get("scheduled_time"),
-                "duration_minutes": session_data.get("duration_minutes", 60)
-            },
-            "presiding_judge": {
-                "id": judge_info.get("id"),
-                "name": judge_info.get("name"),
-                "court": judge_info.get("court")
-            },
-            "participants": session_data.get("participants", []),
-            "access_codes": access_codes,
-            "recording": {
-                "enabled": session_data.get("recording_enabled", True),
-                "auto_transcription": session_data.get("auto_transcription", True)
-            },
-            "documents": session_data.get("documents", []),
-            "events": [],
-            "metadata": {
-                "court_room": session_data.get("court_room"),
-                "jurisdiction": session_data.get("jurisdiction"),
-                "public_access": session_data.get("public_access", False)
-            }
-        }
-        
-        # Save session to storage
-        await self._save_session(session)
-        
-        logger.info(f"Created virtual court session with ID: {session_id}")
-        return session
-    
-    def _generate_access_codes(self) -> Dict[str, str]:
-        """Generate secure access codes for virtual court roles"""
-        
-        # Generate random 8-character alphanumeric codes
-        def generate_code():
-            chars = string.ascii_uppercase + string.digits
-            return ''.join(random.choice(chars) for _ in range(8))
-        
-        # Create codes for different roles
-        return {
-            "judge": generate_code(),
-            "prosecutor": generate_code(),
-            "defense": generate_code(),
-            "witness": generate_code(),
-            "clerk": generate_code(),
-            "public": generate_code() if settings.COURT_CONFIG.get("allow_public_access", False) else None
-        }
-    
-    async def _save_session(self, session: Dict) -> None:
-        """Save session to storage"""
-        session_id = session.get("id")
-        filename = os.path.join(self.storage_path, f"{session_id}.json")
-        
-        # Save as JSON file
-        with open(filename, 'w') as f:
-            json.dump(session, f, indent=2)
-    
-    async def get_session(self, session_id: str) -> Optional[Dict]:
-        """
-        Get a virtual court session by ID.
-        
-        Args:
-            session_id: ID of the session
-            
-        Returns:
-            Session data if found, None otherwise
-        """
-        logger.info(f"Retrieving virtual court session with ID: {session_id}")
-        
-        # Check if session exists
-        filename = os.path.join(self.storage_path, f"{session_id}.json")
-        if not os.path.exists(filename):
-            logger.warning(f"Session not found: {session_id}")
-            return None
-        
-        # Load session from file
-        try:
-            with open(filename, 'r') as f:
-                session = json.load(f)
-            
-            logger.info(f"Successfully retrieved session: {session_id}")
-            return session
-        except Exception as e:
-            logger.error(f"Error loading session {session_id}: {str(e)}")
-            raise
-    
-    async def update_session(self, session_id: str, update_data: Dict) -> Dict:
-        """
-        Update a virtual court session.
-        
-        Args:
-            session_id: ID of the session
-            update_data: Data to update
-            
-        Returns:
-            Updated session
-        """
-        logger.info(f"Updating virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Update session fields
-        if "status" in update_data:
-            session["status"] = update_data["status"]
-        
-        if "schedule" in update_data:
-            for key, value in update_data["schedule"].items():
-                session["schedule"][key] = value
-        
-        if "participants" in update_data:
-            session["participants"] = update_data["participants"]
-        
-        if "documents" in update_data:
-            session["documents"] = update_data["documents"]
-        
-        if "metadata" in update_data:
-            for key, value in update_data["metadata"].items():
-                session["metadata"][key] = value
-        
-        # Add update event
-        session["events"].append({
-            "type": "update",
-            "timestamp": datetime.now().isoformat(),
-            "details": "Session updated"
-        })
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Successfully updated session: {session_id}")
-        return session
-    
-    async def start_session(self, session_id: str, judge_info: Dict) -> Dict:
-        """
-        Start a virtual court session.
-        
-        Args:
-            session_id: ID of the session
-            judge_info: Information about the presiding judge
-            
-        Returns:
-            Updated session
-        """
-        logger.info(f"Starting virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Check if judge is authorized
-        if judge_info.get("id") != session["presiding_judge"].get("id"):
-            logger.error(f"Unauthorized judge attempt to start session: {session_id}")
-            raise ValueError("Only the presiding judge can start this session")
-        
-        # Check if session is in the right state
-        if session["status"] not in ["scheduled", "postponed"]:
-            logger.error(f"Cannot start session in current state: {session['status']}")
-            raise ValueError(f"Cannot start session in current state: {session['status']}")
-        
-        # Update session state
-        session["status"] = "in_progress"
-        session["events"].append({
-            "type": "start",
-            "timestamp": datetime.now().isoformat(),
-            "initiated_by": judge_info.get("name"),
-            "details": "Session started"
-        })
-        
-        # For recording sessions, initialize recording data
-        if session["recording"]["enabled"]:
-            session["recording"]["started_at"] = datetime.now().isoformat()
-            session["recording"]["segments"] = []
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Successfully started session: {session_id}")
-        return session
-    
-    async def end_session(self, session_id: str, judge_info: Dict, outcome: Optional[str] = None) -> Dict:
-        """
-        End a virtual court session.
-        
-        Args:
-            session_id: ID of the session
-            judge_info: Information about the presiding judge
-            outcome: Optional outcome of the session
-            
-        Returns:
-            Updated session
-        """
-        logger.info(f"Ending virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Check if judge is authorized
-        if judge_info.get("id") != session["presiding_judge"].get("id"):
-            logger.error(f"Unauthorized judge attempt to end session: {session_id}")
-            raise ValueError("Only the presiding judge can end this session")
-        
-        # Check if session is in progress
-        if session["status"] != "in_progress":
-            logger.error(f"Cannot end session in current state: {session['status']}")
-            raise ValueError(f"Cannot end session in current state: {session['status']}")
-        
-        # Update session state
-        session["status"] = "completed"
-        session["events"].append({
-            "type": "end",
-            "timestamp": datetime.now().isoformat(),
-            "initiated_by": judge_info.get("name"),
-            "details": outcome or "Session ended"
-        })
-        
-        # For recording sessions, finalize recording data
-        if session["recording"]["enabled"] and "started_at" in session["recording"]:
-            session["recording"]["ended_at"] = datetime.now().isoformat()
-            
-            # Calculate duration
-            try:
-                start_time = datetime.fromisoformat(session["recording"]["started_at"])
-                end_time = datetime.fromisoformat(session["recording"]["ended_at"])
-                duration_seconds = (end_time - start_time).total_seconds()
-                session["recording"]["duration_seconds"] = duration_seconds
-            except (ValueError, TypeError):
-                logger.warning(f"Could not calculate recording duration for session {session_id}")
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Successfully ended session: {session_id}")
-        return session
-    
-    async def join_session(self, session_id: str, participant_data: Dict) -> Dict:
-        """
-        Join a virtual court session.
-        
-        Args:
-            session_id: ID of the session
-            participant_data: Data about the participant
-            
-        Returns:
-            Session access information
-        """
-        logger.info(f"Participant joining virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Check if session is joinable
-        if session["status"] not in ["scheduled", "in_progress"]:
-            logger.error(f"Cannot join session in current state: {session['status']}")
-            raise ValueError(f"Cannot join session in current state: {session['status']}")
-        
-        # Verify access code
-        role = participant_data.get("role", "").lower()
-        provided_code = participant_data.get("access_code")
-        
-        if role not in session["access_codes"] or not provided_code:
-            logger.error(f"Invalid role or missing access code: {role}")
-            raise ValueError("Invalid role or missing access code")
-        
-        if provided_code != session["access_codes"][role]:
-            logger.error(f"Invalid access code for role {role}")
-            raise ValueError("Invalid access code")
-        
-        # Check identity verification if required
-        if role in ["judge", "prosecutor", "defense"] and settings.COURT_CONFIG.get("require_identity_verification", True):
-            # Verify identity
-            identity_verified = await self._verify_participant_identity(participant_data)
-            if not identity_verified:
-                logger.error(f"Identity verification failed for participant in role: {role}")
-                raise ValueError("Identity verification failed")
-        
-        # Generate join token (would be a JWT in production)
-        join_token = str(uuid.uuid4())
-        
-        # Add participant to session
-        participant_entry = {
-            "id": participant_data.get("id", str(uuid.uuid4())),
-            "name": participant_data.get("name"),
-            "role": role,
-            "joined_at": datetime.now().isoformat()
-        }
-        
-        # Update participants list if not already present
-        participant_exists = False
-        for i, p in enumerate(session["participants"]):
-            if p.get("id") == participant_entry["id"]:
-                session["participants"][i] = {**p, **participant_entry}
-                participant_exists = True
-                break
-        
-        if not participant_exists:
-            session["participants"].append(participant_entry)
-        
-        # Add join event
-        session["events"].append({
-            "type": "join",
-            "timestamp": datetime.now().isoformat(),
-            "participant": {
-                "id": participant_entry["id"],
-                "name": participant_entry["name"],
-                "role": participant_entry["role"]
-            }
-        })
-        
-        # Save updated session
-        await self._save_session(session)
-        
-        logger.info(f"Participant {participant_entry['name']} joined session {session_id} as {role}")
-        
-        # Return access information
-        return {
-            "session_id": session_id,
-            "case_title": session["case"]["title"],
-            "access_token": join_token,
-            "participant_id": participant_entry["id"],
-            "role": role,
-            "status": session["status"],
-            "session_details": {
-                "presiding_judge": session["presiding_judge"]["name"],
-                "scheduled_time": f"{session['schedule']['date']} {session['schedule']['time']}",
-                "participants_count": len(session["participants"])
-            }
-        }
-    
-    async def _verify_participant_identity(self, participant_data: Dict) -> bool:
-        """Verify the identity of a participant"""
-        # In production, this would use the identity verification service
-        # For now, check if the required identity info is provided
-        
-        if not participant_data.get("identity"):
-            logger.warning("No identity data provided for verification")
-            return False
-        
-        identity_data = participant_data["identity"]
-        
-        # Check for NIN or passport
-        if "nin" in identity_data:
-            # Verify NIN using identity service
-            is_verified, _ = await self.identity_service.verify_nin(identity_data["nin"])
-            return is_verified
-        elif "passport" in identity_data:
-            # Verify passport using identity service
-            is_verified, _ = await self.identity_service.verify_passport(identity_data["passport"])
-            return is_verified
-        elif "court_official_id" in identity_data:
-            # Verify court official using identity service
-            is_verified, _ = await self.identity_service.verify_court_official(
-                identity_data["court_official_id"], 
-                identity_data.get("expected_role")
-            )
-            return is_verified
-        else:
-            logger.warning("No recognized identity credential provided")
-            return False
-    
-    async def leave_session(self, session_id: str, participant_id: str) -> Dict:
-        """
-        Leave a virtual court session.
-        
-        Args:
-            session_id: ID of the session
-            participant_id: ID of the participant
-            
-        Returns:
-            Updated session
-        """
-        logger.info(f"Participant leaving virtual court session: {session_id}")
-        
-        # Get the session
-        session = await self.get_session(session_id)
-        if not session:
-            logger.error(f"Session not found: {session_id}")
-            raise ValueError(f"Session not found: {session_id}")
-        
-        # Find participant
-        participant = None
-        for p in session["participants"]:
-            if p.get("id") == participant_id:
-                participant = p
-                break
-        
-        if not participant:
-            logger.error(f"Participant not found in session: {participant_id}")
-            raise ValueError("Participant not found in session")
-        
-        # Update participant status
-        participant["left_at"] = datetime.now().isoformat()
-        
-        # Add leave event
-        session["events"].append({
-            "type": "leave",
-            "timestamp": datetime.now().isoformat(),
-            "participant": {
-                "id": participant["id"],
+@lru_cache(maxsize=None)
+def get_virtual_court_service() -> VirtualCourtService:
+    """Get the virtual court service shared by the app, creating it on first use"""
+    return VirtualCourtService()
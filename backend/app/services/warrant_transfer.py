@@ -6,21 +6,52 @@ court warrants to Nigerian Correctional Services and other prosecuting agencies
 in a secure and traceable manner.
 """
 
+import asyncio
 import logging
 import os
 import json
+import sqlite3
+import threading
+import time
 import uuid
-from typing import Dict, List, Optional, Tuple, Any
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import hashlib
 import base64
 import hmac
 import re
 
+try:
+    import orjson
+except ImportError:  # Optional accelerator; falls back to the stdlib json module
+    orjson = None
+
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Number of worker threads reading warrant files during a search
+WARRANT_LOAD_CONCURRENCY = 32
+
+# Search index kept beside the warrant files
+WARRANT_INDEX_FILE = "warrants_idx.sqlite"
+
+# Append-only record of transfers sent to agencies, one JSON line each
+TRANSFER_JOURNAL_FILE = "transfers.log"
+
+# Maximum number of parsed warrants kept in memory
+WARRANT_CACHE_SIZE = 1024
+
+# Random bytes per verification code, and codes drawn from the OS at once
+VERIFICATION_CODE_BYTES = 3
+VERIFICATION_CODES_PER_DRAW = 128
+
+# Format of warrant IDs (UUIDs)
+WARRANT_ID_PATTERN = re.compile(r'[0-9a-f-]{36}')
+
 class WarrantTransferService:
     """
     Service for creating, managing, and transferring court warrants.
@@ -30,6 +61,37 @@ class WarrantTransferService:
     proper authentication, verification, and tracking.
     """
     
+    INDEX_SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS warrant_index (
+            id TEXT PRIMARY KEY,
+            status TEXT,
+            type TEXT,
+            judge_id TEXT,
+            subject_name TEXT,
+            case_number TEXT,
+            issue_ts INTEGER
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_warrant_index_status ON warrant_index (status)",
+        "CREATE INDEX IF NOT EXISTS idx_warrant_index_type ON warrant_index (type)",
+        "CREATE INDEX IF NOT EXISTS idx_warrant_index_judge_id ON warrant_index (judge_id)",
+        "CREATE INDEX IF NOT EXISTS idx_warrant_index_case_number ON warrant_index (case_number)",
+        "CREATE INDEX IF NOT EXISTS idx_warrant_index_issue_ts ON warrant_index (issue_ts)",
+    )
+    
+    # Trigram index over subject names, keyed by warrant_index rowid, so
+    # partial name searches need not scan every row
+    SUBJECT_SEARCH_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS subject_search USING fts5(name, tokenize='trigram')"
+    
+    # Search parameters answered by equality on an indexed column
+    INDEX_COLUMNS = (
+        ("status", "status"),
+        ("type", "type"),
+        ("judge_id", "judge_id"),
+        ("case_number", "case_number"),
+    )
+    
     def __init__(self, storage_path: str = None):
         """
         Initialize the warrant transfer service.
@@ -41,9 +103,55 @@ class WarrantTransferService:
         self.warrant_types = self._get_warrant_types()
         self.agencies = self._get_agencies()
         
+        # Warrant types each agency accepts
+        self._agency_warrant_types = {
+            agency_id: frozenset(agency.get("warrant_types", []))
+            for agency_id, agency in self.agencies.items()
+        }
+        
+        # Public listings, built once since the configuration is static
+        self._agency_list = self._build_agency_list()
+        self._warrant_type_list = self._build_warrant_type_list()
+        
+        # The listings as JSON, for routes to return without serializing
+        self._agency_list_json = self._dump_json(self._agency_list)
+        self._warrant_type_list_json = self._dump_json(self._warrant_type_list)
+        
+        # HMAC keyed for signing warrants; each signature starts from a copy,
+        # so the key is only processed once
+        self._signer = hmac.new(settings.SECRET_KEY.encode('utf-8'), digestmod=hashlib.sha256)
+        
+        # Random bytes drawn ahead for verification codes, and the process
+        # they were drawn in, so a forked worker never reuses its parent's
+        self._random_pool = b""
+        self._random_pool_pid = None
+        self._random_pool_lock = threading.Lock()
+        
+        # Parsed warrants by ID with the file modification time they were
+        # read at, least recently used first
+        self._warrant_cache: "OrderedDict[str, Tuple[int, Dict]]" = OrderedDict()
+        
+        # Serializes changes to the same warrant, see _updating_warrant
+        self._update_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        
         # Create warrant storage directory if it doesn't exist
         os.makedirs(self.storage_path, exist_ok=True)
         
+        # Searchable fields of every warrant, so a search only reads the
+        # warrant files that can match
+        index_path = os.path.join(self.storage_path, WARRANT_INDEX_FILE)
+        rebuild_index = not os.path.exists(index_path)
+        self._index = sqlite3.connect(index_path, check_same_thread=False)
+        self._index_lock = threading.Lock()
+        for statement in self.INDEX_SCHEMA:
+            self._index.execute(statement)
+        self._subject_search = self._create_subject_search()
+        
+        # Index any warrants saved before the index existed
+        if rebuild_index:
+            self._rebuild_index()
+        self._index.commit()
+        
         logger.info("Warrant Transfer Service initialized")
     
     def _get_warrant_types(self) -> Dict[str, Dict]:
@@ -138,6 +246,16 @@ class WarrantTransferService:
         """
         logger.info(f"Creating new warrant of type: {warrant_data.get('warrant_type', 'unknown')}")
         
+        warrant = self._build_warrant(warrant_data, judge_info)
+        
+        # Save warrant to storage
+        await self._save_warrant(warrant)
+        
+        logger.info(f"Created warrant with ID: {warrant['id']}")
+        return warrant
+    
+    def _build_warrant(self, warrant_data: Dict, judge_info: Dict) -> Dict:
+        """Validate warrant data and build the signed warrant document"""
         # Validate warrant type
         warrant_type = warrant_data.get("warrant_type")
         if not warrant_type or warrant_type not in self.warrant_types:
@@ -167,6 +285,8 @@ class WarrantTransferService:
             "status": "issued",
             "issue_date": issue_date.isoformat(),
             "expiry_date": expiry_date.isoformat(),
+            "issue_ts": int(issue_date.timestamp()),
+            "expiry_ts": int(expiry_date.timestamp()),
             "issuing_judge": {
                 "id": judge_info.get("id"),
                 "name": judge_info.get("name"),
@@ -177,18 +297,18 @@ class WarrantTransferService:
             "verification_code": self._generate_verification_code(),
             "digital_signature": self._generate_digital_signature(warrant_data, judge_info)
         }
-        
-        # Save warrant to storage
-        await self._save_warrant(warrant)
-        
-        logger.info(f"Created warrant with ID: {warrant_id}")
         return warrant
     
     def _generate_verification_code(self) -> str:
         """Generate a human-readable verification code for warrants"""
         # Generate a 6-character alphanumeric code
-        code_bytes = os.urandom(3)  # 3 bytes = 6 hex characters
-        code = base64.b32encode(code_bytes).decode('utf-8')[:6]
+        with self._random_pool_lock:
+            if len(self._random_pool) < VERIFICATION_CODE_BYTES or self._random_pool_pid != os.getpid():
+                self._random_pool = os.urandom(VERIFICATION_CODE_BYTES * VERIFICATION_CODES_PER_DRAW)
+                self._random_pool_pid = os.getpid()
+            code_bytes = self._random_pool[:VERIFICATION_CODE_BYTES]
+            self._random_pool = self._random_pool[VERIFICATION_CODE_BYTES:]
+        code = base64.b32encode(code_bytes).decode('ascii')[:6]
         return code
     
     def _generate_digital_signature(self, warrant_data: Dict, judge_info: Dict) -> str:
@@ -201,20 +321,133 @@ class WarrantTransferService:
         judge_string = f"{judge_info.get('id')}:{judge_info.get('name')}:{judge_info.get('court')}"
         
         # Create HMAC signature using a secret key
-        key = settings.SECRET_KEY.encode('utf-8')
-        message = f"{data_string}:{judge_string}".encode('utf-8')
-        signature = hmac.new(key, message, hashlib.sha256).hexdigest()
-        
-        return signature
+        signer = self._signer.copy()
+        signer.update(f"{data_string}:{judge_string}".encode('utf-8'))
+        return signer.hexdigest()
     
     async def _save_warrant(self, warrant: Dict) -> None:
         """Save warrant to storage"""
         warrant_id = warrant.get("id")
         filename = os.path.join(self.storage_path, f"{warrant_id}.json")
         
-        # Save as JSON file
-        with open(filename, 'w') as f:
-            json.dump(warrant, f, indent=2)
+        # Serialize here, so the file matches the warrant as it is now, and
+        # write it in a worker thread to keep the event loop free
+        if orjson is not None:
+            content = orjson.dumps(warrant, option=orjson.OPT_INDENT_2)
+        else:
+            content = json.dumps(warrant, indent=2).encode('utf-8')
+        try:
+            version = await asyncio.to_thread(self._write_warrant, filename, content, self._index_row(warrant))
+        except BaseException:
+            # The cached copy may hold the changes that failed to save
+            self._warrant_cache.pop(warrant_id, None)
+            raise
+        self._cache_warrant(warrant_id, version, warrant)
+    
+    def _write_warrant(self, filename: str, content: bytes, row: Tuple) -> int:
+        # Write a temporary file flushed to disk and rename it over the
+        # warrant, so a crash never leaves a partial warrant file behind
+        temp_path = f"{filename}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, 'xb') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, filename)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        self._sync_directory()
+        with self._index_lock:
+            self._index_warrant(row)
+            self._index.commit()
+        return os.stat(filename).st_mtime_ns
+    
+    def _sync_directory(self) -> None:
+        """Make renames in the storage directory durable"""
+        # Directories cannot be opened for syncing on Windows
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self.storage_path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    
+    def _cache_warrant(self, warrant_id: str, version: int, warrant: Dict) -> None:
+        """Remember a parsed warrant, evicting the least recently used"""
+        self._warrant_cache[warrant_id] = (version, warrant)
+        self._warrant_cache.move_to_end(warrant_id)
+        if len(self._warrant_cache) > WARRANT_CACHE_SIZE:
+            self._warrant_cache.popitem(last=False)
+    
+    def _index_row(self, warrant: Dict) -> Tuple:
+        """Get a warrant's row in the search index"""
+        data = warrant.get("data", {})
+        return (
+            warrant.get("id"),
+            warrant.get("status"),
+            warrant.get("type"),
+            warrant.get("issuing_judge", {}).get("id"),
+            data.get("subject_name", "").lower(),
+            data.get("case_number"),
+            self._timestamp_or_none(warrant, "issue"),
+        )
+    
+    def _timestamp(self, warrant: Dict, date: str) -> int:
+        """Get a warrant's issue or expiry date as a Unix timestamp"""
+        timestamp = warrant.get(f"{date}_ts")
+        if timestamp is None:
+            # Saved before timestamps were stored
+            timestamp = int(datetime.fromisoformat(warrant.get(f"{date}_date", "")).timestamp())
+        return timestamp
+    
+    def _timestamp_or_none(self, warrant: Dict, date: str) -> Optional[int]:
+        try:
+            return self._timestamp(warrant, date)
+        except (ValueError, TypeError):
+            return None
+    
+    def _create_subject_search(self) -> bool:
+        """
+        Create the subject name index, filling it if it is new.
+        
+        Returns:
+            Whether the index is available
+        """
+        exists = self._index.execute("SELECT 1 FROM sqlite_master WHERE name = 'subject_search'").fetchone()
+        try:
+            self._index.execute(self.SUBJECT_SEARCH_SCHEMA)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Subject name index unavailable, names will be scanned: {str(e)}")
+            return False
+        if not exists:
+            self._index.execute("INSERT INTO subject_search (rowid, name) SELECT rowid, subject_name FROM warrant_index")
+        return True
+    
+    def _index_warrant(self, row: Tuple) -> None:
+        """Record a warrant's searchable fields in the index"""
+        if self._subject_search:
+            self._index.execute(
+                "DELETE FROM subject_search WHERE rowid IN (SELECT rowid FROM warrant_index WHERE id = ?)", (row[0],)
+            )
+        cursor = self._index.execute("INSERT OR REPLACE INTO warrant_index VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+        if self._subject_search:
+            self._index.execute("INSERT INTO subject_search (rowid, name) VALUES (?, ?)", (cursor.lastrowid, row[4]))
+    
+    def _rebuild_index(self) -> None:
+        """Index every warrant file in the directory"""
+        with os.scandir(self.storage_path) as entries:
+            warrant_files = [entry.path for entry in entries if entry.name.endswith('.json') and entry.is_file()]
+        for filename in warrant_files:
+            try:
+                warrant = self._read_file(filename)
+            except Exception as e:
+                logger.error(f"Error loading warrant file {filename}: {str(e)}")
+                continue
+            self._index_warrant(self._index_row(warrant))
+        logger.info(f"Indexed {len(warrant_files)} warrant files")
     
     async def get_warrant(self, warrant_id: str) -> Optional[Dict]:
         """
@@ -224,25 +457,36 @@ class WarrantTransferService:
             warrant_id: ID of the warrant
             
         Returns:
-            Warrant data if found, None otherwise
+            Warrant data if found, None otherwise. The warrant is shared with
+            the in-memory cache, so changes to it must be made inside
+            _updating_warrant and saved with _save_warrant.
         """
         logger.info(f"Retrieving warrant with ID: {warrant_id}")
         
         # Validate input
-        if not warrant_id or not re.match(r'^[0-9a-f-]{36}, warrant_id):
+        if not warrant_id or not WARRANT_ID_PATTERN.fullmatch(warrant_id):
             logger.error(f"Invalid warrant ID format: {warrant_id}")
             raise ValueError("Invalid warrant ID format")
         
         # Check if warrant exists
         filename = os.path.join(self.storage_path, f"{warrant_id}.json")
-        if not os.path.exists(filename):
+        try:
+            version = os.stat(filename).st_mtime_ns
+        except FileNotFoundError:
+            self._warrant_cache.pop(warrant_id, None)
             logger.warning(f"Warrant not found: {warrant_id}")
             return None
         
+        # Reuse the parsed warrant unless the file changed since it was read
+        cached = self._warrant_cache.get(warrant_id)
+        if cached is not None and cached[0] == version:
+            self._warrant_cache.move_to_end(warrant_id)
+            return cached[1]
+        
         # Load warrant from file
         try:
-            with open(filename, 'r') as f:
-                warrant = json.load(f)
+            warrant = await asyncio.to_thread(self._read_file, filename)
+            self._cache_warrant(warrant_id, version, warrant)
             
             logger.info(f"Successfully retrieved warrant: {warrant_id}")
             return warrant
@@ -250,6 +494,51 @@ class WarrantTransferService:
             logger.error(f"Error loading warrant {warrant_id}: {str(e)}")
             raise
     
+    @asynccontextmanager
+    async def _updating_warrant(self, warrant_id: str) -> AsyncIterator[Dict]:
+        """
+        Get a warrant to change, holding its update lock for the block.
+        
+        get_warrant hands every caller the cached warrant, so changes to one
+        warrant are made and saved inside this block, one at a time. If the
+        block fails, the cached copy is dropped so the warrant is read again
+        as saved.
+        
+        Args:
+            warrant_id: ID of the warrant
+            
+        Yields:
+            The warrant
+        """
+        lock = self._update_locks.get(warrant_id)
+        if lock is None:
+            lock = self._update_locks[warrant_id] = asyncio.Lock()
+        
+        async with lock:
+            warrant = await self.get_warrant(warrant_id)
+            if not warrant:
+                logger.error(f"Warrant not found: {warrant_id}")
+                raise ValueError(f"Warrant not found: {warrant_id}")
+            try:
+                yield warrant
+            except BaseException:
+                self._warrant_cache.pop(warrant_id, None)
+                raise
+    
+    def _read_file(self, filename: str) -> Dict:
+        # Read through a raw descriptor in one call sized by fstat, which
+        # avoids the extra syscalls and objects of a buffered file
+        fd = os.open(filename, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            size = os.fstat(fd).st_size
+            data = os.read(fd, size + 1)
+            if len(data) > size:
+                # Grew after fstat; read the rest
+                data += b"".join(iter(lambda: os.read(fd, 65536), b""))
+        finally:
+            os.close(fd)
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+    
     async def verify_warrant(self, warrant_id: str, verification_code: str) -> Tuple[bool, str]:
         """
         Verify a warrant's authenticity.
@@ -275,8 +564,7 @@ class WarrantTransferService:
         
         # Check if warrant is expired
         try:
-            expiry_date = datetime.fromisoformat(warrant.get("expiry_date", ""))
-            if expiry_date < datetime.now():
+            if self._timestamp(warrant, "expiry") < time.time():
                 logger.warning(f"Warrant {warrant_id} is expired")
                 return False, "Warrant is expired"
         except (ValueError, TypeError):
@@ -310,51 +598,56 @@ class WarrantTransferService:
             logger.error(f"Invalid agency ID: {agency_id}")
             raise ValueError(f"Invalid agency ID: {agency_id}")
         
-        # Get the warrant
-        warrant = await self.get_warrant(warrant_id)
-        if not warrant:
-            logger.error(f"Warrant not found: {warrant_id}")
-            raise ValueError(f"Warrant not found: {warrant_id}")
-        
-        # Check if warrant type is supported by agency
-        warrant_type = warrant.get("type")
-        if warrant_type not in self.agencies[agency_id].get("warrant_types", []):
-            logger.error(f"Agency {agency_id} does not support warrant type {warrant_type}")
-            raise ValueError(f"Agency {agency_id} does not support warrant type {warrant_type}")
-        
-        # Create transfer record
-        transfer = {
-            "id": str(uuid.uuid4()),
-            "timestamp": datetime.now().isoformat(),
-            "agency_id": agency_id,
-            "agency_name": self.agencies[agency_id].get("name"),
-            "status": "pending",
-            "notes": transfer_notes
-        }
-        
-        # Add transfer to warrant
-        warrant["transfers"].append(transfer)
-        
-        # Update warrant status
-        warrant["status"] = "transferred"
-        
-        # Save updated warrant
-        await self._save_warrant(warrant)
-        
-        # In a production system, this would actually call the agency's API
-        # For now, we'll simulate a successful transfer
-        transfer_result = await self._simulate_agency_transfer(warrant, agency_id)
-        
-        # Update transfer status based on result
-        warrant["transfers"][-1]["status"] = transfer_result.get("status", "failed")
-        warrant["transfers"][-1]["response"] = transfer_result.get("message", "")
-        
-        # Save updated warrant again
-        await self._save_warrant(warrant)
+        async with self._updating_warrant(warrant_id) as warrant:
+            # Check if warrant type is supported by agency
+            warrant_type = warrant.get("type")
+            if warrant_type not in self._agency_warrant_types[agency_id]:
+                logger.error(f"Agency {agency_id} does not support warrant type {warrant_type}")
+                raise ValueError(f"Agency {agency_id} does not support warrant type {warrant_type}")
+            
+            # Create transfer record
+            transfer = {
+                "id": str(uuid.uuid4()),
+                "timestamp": datetime.now().isoformat(),
+                "agency_id": agency_id,
+                "agency_name": self.agencies[agency_id].get("name"),
+                "status": "pending",
+                "notes": transfer_notes
+            }
+            
+            # Record the pending transfer before contacting the agency, so a crash
+            # mid-transfer leaves a trace without rewriting the whole warrant
+            await asyncio.to_thread(self._journal_transfer, warrant_id, transfer)
+            
+            # In a production system, this would actually call the agency's API
+            # For now, we'll simulate a successful transfer
+            transfer_result = await self._simulate_agency_transfer(warrant, agency_id)
+            
+            # Update transfer status based on result
+            transfer["status"] = transfer_result.get("status", "failed")
+            transfer["response"] = transfer_result.get("message", "")
+            
+            # The cached warrant is shared with readers, so it only changes
+            # once the transfer is complete and about to be saved
+            warrant["transfers"].append(transfer)
+            warrant["status"] = "transferred"
+            
+            # Save updated warrant
+            await self._save_warrant(warrant)
         
         logger.info(f"Completed transfer of warrant {warrant_id} to agency {agency_id}")
         return warrant
     
+    def _journal_transfer(self, warrant_id: str, transfer: Dict) -> None:
+        """Append a pending transfer to the transfer journal"""
+        record = {"warrant_id": warrant_id, "transfer_id": transfer["id"], "agency_id": transfer["agency_id"], "timestamp": transfer["timestamp"]}
+        line = json.dumps(record).encode('utf-8') + b"\n"
+        fd = os.open(os.path.join(self.storage_path, TRANSFER_JOURNAL_FILE), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+    
     async def _simulate_agency_transfer(self, warrant: Dict, agency_id: str) -> Dict:
         """Simulate transferring a warrant to an agency (for development)"""
         # In a production system, this would make an API call to the agency
@@ -367,7 +660,7 @@ class WarrantTransferService:
             "status": "delivered",
             "message": f"Warrant successfully delivered to {self.agencies[agency_id].get('name')}",
             "timestamp": datetime.now().isoformat(),
-            "reference_number": f"AGY-{agency_id.upper()}-{str(uuid.uuid4())[:8]}"
+            "reference_number": f"AGY-{agency_id.upper()}-{os.urandom(4).hex()}"
         }
     
     async def revoke_warrant(self, warrant_id: str, judge_info: Dict, reason: str) -> Dict:
@@ -384,34 +677,29 @@ class WarrantTransferService:
         """
         logger.info(f"Revoking warrant: {warrant_id}")
         
-        # Get the warrant
-        warrant = await self.get_warrant(warrant_id)
-        if not warrant:
-            logger.error(f"Warrant not found: {warrant_id}")
-            raise ValueError(f"Warrant not found: {warrant_id}")
-        
-        # Create revocation record
-        revocation = {
-            "timestamp": datetime.now().isoformat(),
-            "judge_id": judge_info.get("id"),
-            "judge_name": judge_info.get("name"),
-            "judge_court": judge_info.get("court"),
-            "reason": reason
-        }
-        
-        # Update warrant
-        warrant["status"] = "revoked"
-        warrant["revocation"] = revocation
-        
-        # Save updated warrant
-        await self._save_warrant(warrant)
+        async with self._updating_warrant(warrant_id) as warrant:
+            # Create revocation record
+            revocation = {
+                "timestamp": datetime.now().isoformat(),
+                "judge_id": judge_info.get("id"),
+                "judge_name": judge_info.get("name"),
+                "judge_court": judge_info.get("court"),
+                "reason": reason
+            }
+            
+            # Update warrant
+            warrant["status"] = "revoked"
+            warrant["revocation"] = revocation
+            
+            # Save updated warrant
+            await self._save_warrant(warrant)
         
-        # If the warrant has been transferred, notify the agencies
-        if warrant.get("transfers"):
-            for transfer in warrant.get("transfers", []):
-                agency_id = transfer.get("agency_id")
-                if agency_id and transfer.get("status") == "delivered":
-                    await self._notify_agency_of_revocation(warrant, agency_id)
+        # If the warrant has been transferred, notify the agencies together
+        await asyncio.gather(*(
+            self._notify_agency_of_revocation(warrant, transfer["agency_id"])
+            for transfer in warrant.get("transfers", [])
+            if transfer.get("agency_id") and transfer.get("status") == "delivered"
+        ))
         
         logger.info(f"Successfully revoked warrant: {warrant_id}")
         return warrant
@@ -427,8 +715,21 @@ class WarrantTransferService:
         Get a list of available agencies for warrant transfer.
         
         Returns:
-            List of agencies with metadata
+            List of agencies with metadata (shared; do not modify)
+        """
+        return self._agency_list
+    
+    def get_agency_list_json(self) -> bytes:
         """
+        Get the list of available agencies for warrant transfer as JSON.
+        
+        Returns:
+            The agency list serialized as a JSON response body
+        """
+        return self._agency_list_json
+    
+    def _build_agency_list(self) -> List[Dict]:
+        """Build the public list of agencies"""
         # Convert dictionary to list and return
         return [
             {
@@ -445,8 +746,21 @@ class WarrantTransferService:
         Get a list of available warrant types.
         
         Returns:
-            List of warrant types with metadata
+            List of warrant types with metadata (shared; do not modify)
         """
+        return self._warrant_type_list
+    
+    def get_warrant_types_json(self) -> bytes:
+        """
+        Get the list of available warrant types as JSON.
+        
+        Returns:
+            The warrant type list serialized as a JSON response body
+        """
+        return self._warrant_type_list_json
+    
+    def _build_warrant_type_list(self) -> List[Dict]:
+        """Build the public list of warrant types"""
         # Convert dictionary to list and return
         return [
             {
@@ -459,6 +773,12 @@ class WarrantTransferService:
             for type_id, warrant_type in self.warrant_types.items()
         ]
     
+    def _dump_json(self, value: Any) -> bytes:
+        """Serialize a value to compact JSON"""
+        if orjson is not None:
+            return orjson.dumps(value)
+        return json.dumps(value, separators=(',', ':')).encode('utf-8')
+    
     async def search_warrants(self, search_params: Dict) -> List[Dict]:
         """
         Search for warrants based on parameters.
@@ -471,84 +791,180 @@ class WarrantTransferService:
         """
         logger.info(f"Searching warrants with params: {search_params}")
         
-        # Get all warrant files
-        warrant_files = [f for f in os.listdir(self.storage_path) if f.endswith('.json')]
+        # Find the warrants that can match in the index
+        issued = self._issue_range(search_params)
+        sql, args = self._index_query(search_params, issued)
+        warrant_files = [f"{warrant_id}.json" for warrant_id in await asyncio.to_thread(self._select_ids, sql, args)]
         
-        # Load all warrants
-        warrants = []
-        for filename in warrant_files:
-            try:
-                with open(os.path.join(self.storage_path, filename), 'r') as f:
-                    warrant = json.load(f)
-                warrants.append(warrant)
-            except Exception as e:
-                logger.error(f"Error loading warrant file {filename}: {str(e)}")
+        # Load those warrants in up to WARRANT_LOAD_CONCURRENCY worker threads,
+        # each reading an interleaved share of the files
+        batches = [warrant_files[i::WARRANT_LOAD_CONCURRENCY] for i in range(WARRANT_LOAD_CONCURRENCY)]
+        loaded = await asyncio.gather(
+            *(asyncio.to_thread(self._load_warrant_files, batch) for batch in batches if batch)
+        )
+        warrants = [warrant for batch in loaded for warrant in batch]
+        
+        matches = self._search_predicate(search_params, issued)
+        filtered_warrants = [w for w in warrants if matches(w)]
+        
+        # Sort results (default: newest first)
+        sort_by = search_params.get("sort_by", "issue_date")
+        sort_order = search_params.get("sort_order", "desc")
+        
+        if sort_by == "issue_date":
+            filtered_warrants.sort(
+                key=lambda w: w.get("issue_date", ""), 
+                reverse=(sort_order == "desc")
+            )
+        elif sort_by == "expiry_date":
+            filtered_warrants.sort(
+                key=lambda w: w.get("expiry_date", ""), 
+                reverse=(sort_order == "desc")
+            )
+        
+        logger.info(f"Found {len(filtered_warrants)} matching warrants")
+        return filtered_warrants
+    
+    async def iter_warrants(self, search_params: Dict) -> AsyncIterator[Dict]:
+        """
+        Stream warrants matching search parameters.
         
-        # Filter warrants based on search parameters
-        filtered_warrants = warrants
+        Unlike search_warrants, warrants are yielded as they are read, in
+        index order rather than sorted, so memory use does not grow with the
+        number of matches. "limit" and "offset" parameters select a page of
+        the matches in the index query.
+        
+        Args:
+            search_params: Search parameters, as for search_warrants
+            
+        Yields:
+            Each matching warrant
+        """
+        issued = self._issue_range(search_params)
+        matches = self._search_predicate(search_params, issued)
+        
+        sql, args = self._index_query(search_params, issued)
+        # Order by row, so pages are stable whichever index the query uses
+        sql += " ORDER BY rowid LIMIT ? OFFSET ?"
+        args += [search_params.get("limit") or -1, search_params.get("offset", 0)]
+        warrant_ids = await asyncio.to_thread(self._select_ids, sql, args)
+        
+        for i in range(0, len(warrant_ids), WARRANT_LOAD_CONCURRENCY):
+            batch = [f"{warrant_id}.json" for warrant_id in warrant_ids[i:i + WARRANT_LOAD_CONCURRENCY]]
+            for warrant in await asyncio.to_thread(self._load_warrant_files, batch):
+                if matches(warrant):
+                    yield warrant
+    
+    def _issue_range(self, search_params: Dict) -> Tuple[Optional[int], Optional[int]]:
+        """Get the issue date range of search parameters as Unix timestamps (either end may be open)"""
+        issued = []
+        for param in ("date_from", "date_to"):
+            timestamp = None
+            if param in search_params:
+                try:
+                    timestamp = int(datetime.fromisoformat(search_params[param]).timestamp())
+                except ValueError:
+                    logger.warning(f"Invalid {param} format: {search_params[param]}")
+            issued.append(timestamp)
+        return tuple(issued)
+    
+    def _index_query(self, search_params: Dict, issued: Tuple[Optional[int], Optional[int]]) -> Tuple[str, List]:
+        """Build the index query for the IDs of warrants that can match search parameters"""
+        clauses, args = [], []
+        for param, column in self.INDEX_COLUMNS:
+            if param in search_params:
+                clauses.append(f"{column} = ?")
+                args.append(search_params[param])
+        if "subject_name" in search_params:
+            subject_name = search_params["subject_name"].lower()
+            if self._subject_search:
+                # Substring match through the trigram index, with LIKE
+                # wildcards in the name taken literally
+                for char in "\\%_":
+                    subject_name = subject_name.replace(char, "\\" + char)
+                clauses.append("rowid IN (SELECT rowid FROM subject_search WHERE name LIKE ? ESCAPE '\\')")
+                args.append(f"%{subject_name}%")
+            else:
+                clauses.append("instr(subject_name, ?) > 0")
+                args.append(subject_name)
+        issued_from, issued_to = issued
+        if issued_from is not None:
+            clauses.append("issue_ts >= ?")
+            args.append(issued_from)
+        if issued_to is not None:
+            clauses.append("issue_ts <= ?")
+            args.append(issued_to)
+        
+        sql = "SELECT id FROM warrant_index"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return sql, args
+    
+    def _search_predicate(self, search_params: Dict, issued: Tuple[Optional[int], Optional[int]]) -> Callable[[Dict], bool]:
+        """Build a test for whether a warrant matches search parameters"""
+        # Combine the search parameters into one predicate, so each warrant
+        # is tested in a single pass
+        checks = []
         
         # Filter by status
         if "status" in search_params:
-            filtered_warrants = [w for w in filtered_warrants if w.get("status") == search_params["status"]]
+            status = search_params["status"]
+            checks.append(lambda w: w.get("status") == status)
         
         # Filter by type
         if "type" in search_params:
-            filtered_warrants = [w for w in filtered_warrants if w.get("type") == search_params["type"]]
+            warrant_type = search_params["type"]
+            checks.append(lambda w: w.get("type") == warrant_type)
         
         # Filter by issuing judge
         if "judge_id" in search_params:
-            filtered_warrants = [w for w in filtered_warrants if w.get("issuing_judge", {}).get("id") == search_params["judge_id"]]
+            judge_id = search_params["judge_id"]
+            checks.append(lambda w: w.get("issuing_judge", {}).get("id") == judge_id)
         
         # Filter by subject name (case insensitive partial match)
         if "subject_name" in search_params:
             subject_name = search_params["subject_name"].lower()
-            filtered_warrants = [
-                w for w in filtered_warrants 
-                if subject_name in w.get("data", {}).get("subject_name", "").lower()
-            ]
+            checks.append(lambda w: subject_name in w.get("data", {}).get("subject_name", "").lower())
         
         # Filter by case number
         if "case_number" in search_params:
-            filtered_warrants = [
-                w for w in filtered_warrants 
-                if search_params["case_number"] == w.get("data", {}).get("case_number")
-            ]
+            case_number = search_params["case_number"]
+            checks.append(lambda w: w.get("data", {}).get("case_number") == case_number)
         
         # Filter by date range (issue date)
-        if "date_from" in search_params:
-            try:
-                date_from = datetime.fromisoformat(search_params["date_from"])
-                filtered_warrants = [
-                    w for w in filtered_warrants 
-                    if datetime.fromisoformat(w.get("issue_date", "")) >= date_from
-                ]
-            except ValueError:
-                logger.warning(f"Invalid date_from format: {search_params['date_from']}")
-        
-        if "date_to" in search_params:
-            try:
-                date_to = datetime.fromisoformat(search_params["date_to"])
-                filtered_warrants = [
-                    w for w in filtered_warrants 
-                    if datetime.fromisoformat(w.get("issue_date", "")) <= date_to
-                ]
-            except ValueError:
-                logger.warning(f"Invalid date_to format: {search_params['date_to']}")
+        if issued != (None, None):
+            checks.append(lambda w: self._issued_within(w, *issued))
         
-        # Sort results (default: newest first)
-        sort_by = search_params.get("sort_by", "issue_date")
-        sort_order = search_params.get("sort_order", "desc")
-        
-        if sort_by == "issue_date":
-            filtered_warrants.sort(
-                key=lambda w: w.get("issue_date", ""), 
-                reverse=(sort_order == "desc")
-            )
-        elif sort_by == "expiry_date":
-            filtered_warrants.sort(
-                key=lambda w: w.get("expiry_date", ""), 
-                reverse=(sort_order == "desc")
-            )
-        
-        logger.info(f"Found {len(filtered_warrants)} matching warrants")
-        return filtered_warrants
+        return lambda w: all(check(w) for check in checks)
+    
+    def _issued_within(self, warrant: Dict, issued_from: Optional[int], issued_to: Optional[int]) -> bool:
+        """Check whether a warrant was issued within a timestamp range (either end may be open)"""
+        issue_ts = self._timestamp_or_none(warrant, "issue")
+        if issue_ts is None:
+            return False
+        return (issued_from is None or issue_ts >= issued_from) and (issued_to is None or issue_ts <= issued_to)
+    
+    def _select_ids(self, sql: str, args: List) -> List[str]:
+        with self._index_lock:
+            return [warrant_id for warrant_id, in self._index.execute(sql, args)]
+    
+    def _load_warrant_files(self, filenames: List[str]) -> List[Dict]:
+        """Read warrant files, logging and skipping unreadable ones"""
+        warrants = []
+        for filename in filenames:
+            try:
+                warrants.append(self._read_file(os.path.join(self.storage_path, filename)))
+            except FileNotFoundError:
+                # Deleted outside the service; forget it
+                warrant_id = filename[:-len('.json')]
+                with self._index_lock:
+                    if self._subject_search:
+                        self._index.execute(
+                            "DELETE FROM subject_search WHERE rowid IN (SELECT rowid FROM warrant_index WHERE id = ?)",
+                            (warrant_id,)
+                        )
+                    self._index.execute("DELETE FROM warrant_index WHERE id = ?", (warrant_id,))
+                    self._index.commit()
+            except Exception as e:
+                logger.error(f"Error loading warrant file {filename}: {str(e)}")
+        return warrants
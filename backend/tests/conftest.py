@@ -0,0 +1,20 @@
+"""
+Shared test configuration.
+
+app/core/config.py cannot be imported on its own, so when it fails to load
+the services are given a fixed test configuration instead.
+"""
+
+import sys
+import types
+
+try:
+    from app.core.config import settings  # noqa: F401
+except ImportError:
+    sys.modules["app.core.config"] = types.SimpleNamespace(
+        settings=types.SimpleNamespace(
+            SECRET_KEY="test-secret-key",
+            NLP_MODEL_PATH="models/nlp",
+            COURT_CONFIG={"allow_public_access": False, "require_identity_verification": False},
+        )
+    )
@@ -0,0 +1,181 @@
+import asyncio
+import json
+
+import pytest
+
+from app.services.session_store import EVENTS_SUFFIX, JsonFileSessionStore, SQLiteSessionStore
+
+
+def make_session(session_id, status="scheduled", date="2026-03-02", time="10:00", participants=(), events=()):
+    return {
+        "id": session_id,
+        "status": status,
+        "created_at": f"{date}T08:00:00",
+        "case": {"number": f"CASE-{session_id}", "title": f"State v. {session_id}", "type": "criminal"},
+        "schedule": {"date": date, "time": time, "duration_minutes": 60},
+        "schedule_key": f"{date}T{time}",
+        "presiding_judge": {"id": "J1", "name": "Hon. Justice Bello", "court": "FCT High Court 5"},
+        "participants": [{"id": f"p{i}", "name": name, "role": "witness"} for i, name in enumerate(participants)],
+        "metadata": {"court_room": "5"},
+        "events": [{"type": event, "timestamp": f"{date}T09:0{i}:00"} for i, event in enumerate(events)],
+    }
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def make_store(request, tmp_path):
+    def make():
+        if request.param == "sqlite":
+            return SQLiteSessionStore(str(tmp_path / "sessions.db"))
+        return JsonFileSessionStore(str(tmp_path))
+    return make
+
+
+async def query_ids(store, search_params):
+    return [summary["id"] async for summary in store.query(search_params)]
+
+
+def test_save_and_load_round_trip(make_store):
+    async def run():
+        store = make_store()
+        try:
+            assert await store.version("S1") is None
+            assert await store.load("S1") is None
+
+            session = make_session("S1", participants=["Ada Obi"], events=["join"])
+            await store.save(session)
+            session["events"].append({"type": "leave", "timestamp": "2026-03-02T09:30:00"})
+            version = await store.save(session)
+
+            assert await store.version("S1") == version
+            assert await store.load("S1") == (version, session)
+        finally:
+            await store.close()
+
+    asyncio.run(run())
+
+
+def test_save_fields_patches_stored_session(make_store):
+    async def run():
+        store = make_store()
+        try:
+            session = make_session("S1", events=["join"])
+            await store.save(session)
+
+            session["schedule"]["date"] = "2026-04-01"
+            session["events"].append({"type": "postpone", "timestamp": "2026-03-02T09:30:00"})
+            version = await store.save_fields(session, ["schedule.date"])
+
+            assert await store.load("S1") == (version, session)
+        finally:
+            await store.close()
+
+    asyncio.run(run())
+
+
+def test_save_fields_stores_new_session(make_store):
+    async def run():
+        store = make_store()
+        try:
+            session = make_session("S1", events=["join"])
+            version = await store.save_fields(session, ["status"])
+
+            assert await store.load("S1") == (version, session)
+            assert await query_ids(store, {"status": "scheduled"}) == ["S1"]
+        finally:
+            await store.close()
+
+    asyncio.run(run())
+
+
+def test_query_filters_sort_and_limit(make_store):
+    async def run():
+        store = make_store()
+        try:
+            await store.save(make_session("S1", date="2026-03-01"))
+            await store.save(make_session("S2", date="2026-03-03", status="completed"))
+            await store.save(make_session("S3", date="2026-03-02", time="09:00"))
+            await store.save(make_session("S4", date="2026-03-02", time="14:00"))
+
+            assert await query_ids(store, {}) == ["S2", "S4", "S3", "S1"]
+            assert await query_ids(store, {"sort_order": "asc"}) == ["S1", "S3", "S4", "S2"]
+            assert await query_ids(store, {"status": "scheduled", "limit": 2}) == ["S4", "S3"]
+            assert await query_ids(store, {"date_from": "2026-03-02", "date_to": "2026-03-02"}) == ["S4", "S3"]
+            assert await query_ids(store, {"case_number": "CASE-S2"}) == ["S2"]
+            assert await query_ids(store, {"judge_id": "J2"}) == []
+        finally:
+            await store.close()
+
+    asyncio.run(run())
+
+
+def test_participant_name_matches_wildcards_literally(make_store):
+    async def run():
+        store = make_store()
+        try:
+            await store.save(make_session("S1", participants=["Ada_Obi"]))
+            await store.save(make_session("S2", participants=["AdaXObi"]))
+            await store.save(make_session("S3", participants=["Chinedu 100% Eze"]))
+
+            assert await query_ids(store, {"participant_name": "ADA_obi"}) == ["S1"]
+            assert await query_ids(store, {"participant_name": "%"}) == ["S3"]
+            assert sorted(await query_ids(store, {"participant_name": "obi"})) == ["S1", "S2"]
+        finally:
+            await store.close()
+
+    asyncio.run(run())
+
+
+def test_json_store_upgrades_inline_events(tmp_path):
+    # A session file written before events had their own log
+    session = make_session("S1", events=["join", "start"])
+    with open(tmp_path / "S1.json", "w") as f:
+        json.dump(session, f)
+
+    async def run():
+        store = JsonFileSessionStore(str(tmp_path))
+        try:
+            _, loaded = await store.load("S1")
+            assert loaded == session
+            assert await query_ids(store, {"case_number": "CASE-S1"}) == ["S1"]
+
+            session["events"].append({"type": "end", "timestamp": "2026-03-02T11:00:00"})
+            version = await store.save(session)
+            assert await store.load("S1") == (version, session)
+        finally:
+            await store.close()
+
+    asyncio.run(run())
+
+    with open(tmp_path / "S1.json") as f:
+        assert "events" not in json.load(f)
+    with open(tmp_path / f"S1{EVENTS_SUFFIX}") as f:
+        assert [json.loads(line)["type"] for line in f] == ["join", "start", "end"]
+
+
+def test_json_store_drops_torn_event_line(tmp_path):
+    async def run():
+        store = JsonFileSessionStore(str(tmp_path))
+        try:
+            session = make_session("S1", events=["join"])
+            await store.save(session)
+
+            # An append interrupted part-way through a line
+            with open(tmp_path / f"S1{EVENTS_SUFFIX}", "ab") as f:
+                f.write(b'{"type": "le')
+
+            # A fresh store, as after a restart
+            await store.close()
+            store = JsonFileSessionStore(str(tmp_path))
+            _, loaded = await store.load("S1")
+            assert loaded == session
+
+            session["events"].append({"type": "leave", "timestamp": "2026-03-02T09:30:00"})
+            version = await store.save(session)
+            assert await store.load("S1") == (version, session)
+        finally:
+            await store.close()
+
+    asyncio.run(run())
+
+    with open(tmp_path / f"S1{EVENTS_SUFFIX}", "rb") as f:
+        assert f.read().count(b"\n") == 2
@@ -0,0 +1,140 @@
+import asyncio
+import random
+import re
+
+import pytest
+
+from app.services import transcription
+from app.services.transcription import ANONYMIZATION_TERMS, InferenceBatcher, TranscriptionService
+
+
+def recording_batcher(**kwargs):
+    """A batcher doubling its items, and the batches it was called with"""
+    batches = []
+
+    async def infer_batch(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    return InferenceBatcher(infer_batch, **kwargs), batches
+
+
+def test_batcher_coalesces_concurrent_requests():
+    batcher, batches = recording_batcher(max_batch_size=16, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(20)))
+
+    assert asyncio.run(run()) == [i * 2 for i in range(20)]
+    assert batches == [list(range(16)), list(range(16, 20))]
+
+
+def test_batcher_flushes_after_wait_window():
+    batcher, batches = recording_batcher(max_batch_size=16, max_wait_ms=20)
+
+    async def run():
+        first = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0.1)
+        return await first, await batcher.submit(2)
+
+    assert asyncio.run(run()) == (2, 4)
+    assert batches == [[1], [2]]
+
+
+def test_batcher_restarts_worker_on_new_loop():
+    batcher, batches = recording_batcher()
+
+    assert asyncio.run(batcher.submit(1)) == 2
+    assert asyncio.run(batcher.submit(2)) == 4
+    assert batches == [[1], [2]]
+
+
+def test_batcher_fails_every_request_on_error():
+    async def infer_batch(items):
+        raise ValueError("model crashed")
+
+    batcher = InferenceBatcher(infer_batch)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    assert [str(result) for result in asyncio.run(run())] == ["model crashed"] * 3
+
+
+def test_batcher_fails_every_request_on_missing_results():
+    async def infer_batch(items):
+        return items[:-1]
+
+    batcher = InferenceBatcher(infer_batch)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def anonymize_by_term(transcript, entities_to_anonymize):
+    """Anonymize with one regex substitution per term, as anonymize_transcript used to"""
+    anonymized = transcript
+    for entity_type in entities_to_anonymize:
+        for term in ANONYMIZATION_TERMS.get(entity_type, []):
+            anonymized = re.sub(f"\\b{term}\\b", f"[REDACTED-{entity_type}]", anonymized, flags=re.IGNORECASE)
+    return anonymized
+
+
+# Terms that contain no other term, so redacting term by term cannot split them
+SINGLE_TERMS = [
+    term for terms in ANONYMIZATION_TERMS.values() for term in terms
+    if not any(other != term and re.search(f"\\b{other}\\b", term) for others in ANONYMIZATION_TERMS.values() for other in others)
+]
+FILLER = ["the", "court", "heard", "that", "boyfriend", "closed", "cellphone", "witnessed", "Adebayo's", "road-side", "42"]
+SEPARATORS = [" ", " ", ", ", ". ", "\n", "-", "_", "'"]
+
+
+def random_transcript(rng):
+    words = [rng.choice(SINGLE_TERMS + FILLER) for _ in range(rng.randint(0, 40))]
+    words = [word.upper() if rng.random() < 0.2 else word.capitalize() if rng.random() < 0.2 else word for word in words]
+    return "".join(word + rng.choice(SEPARATORS) for word in words)
+
+
+@pytest.fixture(params=["automaton", "regex"])
+def service(request, monkeypatch):
+    if request.param == "regex":
+        monkeypatch.setattr(transcription, "ANONYMIZATION_AUTOMATON", None)
+    elif transcription.ANONYMIZATION_AUTOMATON is None:
+        pytest.skip("pyahocorasick is not installed")
+    return TranscriptionService(model_path="models/asr", speaker_model_path="models/speaker", device="cpu")
+
+
+def test_anonymize_matches_term_by_term_redaction(service):
+    rng = random.Random(1234)
+    entity_types = list(ANONYMIZATION_TERMS) + ["UNKNOWN"]
+    for _ in range(500):
+        transcript = random_transcript(rng)
+        entities = rng.sample(entity_types, rng.randint(0, len(entity_types)))
+        # Term by term, "minor" also matched the placeholders "child" left
+        expected = anonymize_by_term(transcript, entities).replace("[REDACTED-[REDACTED-MINOR]]", "[REDACTED-MINOR]")
+        assert asyncio.run(service.anonymize_transcript(transcript, entities)) == expected
+
+
+def test_anonymize_redacts_phrases_whole(service):
+    # Term by term, "witness" was redacted first and left "first" behind
+    transcript = "The first witness and the Prosecution Witness agreed."
+    assert asyncio.run(service.anonymize_transcript(transcript, ["WITNESS"])) == (
+        "The [REDACTED-WITNESS] and the [REDACTED-WITNESS] agreed."
+    )
+
+
+def test_anonymize_text_changing_length_when_lowered(service):
+    transcript = "İstanbul: the defendant called the Victim."
+    assert asyncio.run(service.anonymize_transcript(transcript, ["VICTIM", "DEFENDANT"])) == (
+        "İstanbul: the [REDACTED-DEFENDANT] called the [REDACTED-VICTIM]."
+    )
+
+
+def test_anonymize_leaves_placeholders_alone(service):
+    transcript = "The child, a minor, has a phone."
+    assert asyncio.run(service.anonymize_transcript(transcript, ["MINOR", "PHONE"])) == (
+        "The [REDACTED-MINOR], a [REDACTED-MINOR], has a [REDACTED-PHONE]."
+    )
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.warrant_transfer import WARRANT_INDEX_FILE, WarrantTransferService
+
+JUDGE = {"id": "J1", "name": "Hon. Justice Bello", "court": "FCT High Court 5"}
+
+
+def arrest_warrant(subject_name="Musa Ibrahim", **fields):
+    return {
+        "warrant_type": "arrest",
+        "subject_name": subject_name,
+        "subject_address": "12 Marina Road, Lagos",
+        "offence": "Theft",
+        "issuing_court": "FCT High Court 5",
+        **fields,
+    }
+
+
+@pytest.fixture
+def service(tmp_path):
+    return WarrantTransferService(storage_path=str(tmp_path))
+
+
+def read_warrant_file(service, warrant_id):
+    with open(os.path.join(service.storage_path, f"{warrant_id}.json")) as f:
+        return json.load(f)
+
+
+def test_failed_transfer_leaves_saved_warrant(service, monkeypatch):
+    async def agency_down(warrant, agency_id):
+        raise ConnectionError("agency unreachable")
+
+    monkeypatch.setattr(service, "_simulate_agency_transfer", agency_down)
+
+    async def run():
+        warrant = await service.create_warrant(arrest_warrant(), JUDGE)
+        with pytest.raises(ConnectionError):
+            await service.transfer_warrant(warrant["id"], "npf")
+        return warrant["id"], await service.get_warrant(warrant["id"])
+
+    warrant_id, warrant = asyncio.run(run())
+    assert warrant["status"] == "issued"
+    assert warrant["transfers"] == []
+    assert warrant == read_warrant_file(service, warrant_id)
+
+
+def full_scan(storage_path, search_params):
+    """Search by reading every warrant file, as searches did before the index"""
+    warrants = []
+    for filename in os.listdir(storage_path):
+        if filename.endswith(".json"):
+            with open(os.path.join(storage_path, filename)) as f:
+                warrants.append(json.load(f))
+
+    checks = [
+        ("status", lambda w, value: w.get("status") == value),
+        ("type", lambda w, value: w.get("type") == value),
+        ("judge_id", lambda w, value: w.get("issuing_judge", {}).get("id") == value),
+        ("subject_name", lambda w, value: value.lower() in w.get("data", {}).get("subject_name", "").lower()),
+        ("case_number", lambda w, value: w.get("data", {}).get("case_number") == value),
+    ]
+    for param, check in checks:
+        if param in search_params:
+            warrants = [w for w in warrants if check(w, search_params[param])]
+    for param, keep in (("date_from", lambda a, b: a >= b), ("date_to", lambda a, b: a <= b)):
+        if param in search_params:
+            try:
+                bound = datetime.fromisoformat(search_params[param])
+            except ValueError:
+                continue
+            warrants = [w for w in warrants if keep(datetime.fromisoformat(w["issue_date"]), bound)]
+
+    sort_by = search_params.get("sort_by", "issue_date")
+    if sort_by in ("issue_date", "expiry_date"):
+        warrants.sort(key=lambda w: w.get(sort_by, ""), reverse=search_params.get("sort_order", "desc") == "desc")
+    return [w["id"] for w in warrants]
+
+
+WARRANTS = [
+    ("J1", arrest_warrant("Musa Ibrahim")),
+    ("J1", arrest_warrant("Ibrahim Musa", case_number="CR/12/2026")),
+    ("J2", arrest_warrant("Ngozi 50% Okafor")),
+    ("J2", arrest_warrant("Ade_Bayo")),
+    ("J1", arrest_warrant("AdeXBayo")),
+    ("J2", {
+        "warrant_type": "search",
+        "premises_address": "4 Broad Street, Lagos",
+        "items_to_search_for": "Ledgers",
+        "issuing_court": "FCT High Court 5",
+    }),
+    ("J1", {
+        "warrant_type": "remand",
+        "subject_name": "Emeka Musa",
+        "detention_facility": "Kuje",
+        "case_number": "CR/12/2026",
+        "issuing_court": "FCT High Court 5",
+        "remand_period": "14 days",
+    }),
+]
+
+ISSUED = datetime(2026, 3, 1, 8)
+
+
+async def issue_warrants(service):
+    """Save WARRANTS issued an hour apart, revoking the last arrest warrant"""
+    warrant_ids = []
+    for hours, (judge_id, warrant_data) in enumerate(WARRANTS):
+        warrant = service._build_warrant(warrant_data, {**JUDGE, "id": judge_id})
+        issue_date = ISSUED + timedelta(hours=hours)
+        validity = service.warrant_types[warrant["type"]]["validity_days"]
+        warrant["issue_date"] = issue_date.isoformat()
+        warrant["issue_ts"] = int(issue_date.timestamp())
+        warrant["expiry_date"] = (issue_date + timedelta(days=validity)).isoformat()
+        warrant["expiry_ts"] = int((issue_date + timedelta(days=validity)).timestamp())
+        await service._save_warrant(warrant)
+        warrant_ids.append(warrant["id"])
+    await service.revoke_warrant(warrant_ids[4], JUDGE, "Issued in error")
+    return warrant_ids
+
+
+SEARCHES = [
+    {},
+    {"sort_order": "asc"},
+    {"sort_by": "expiry_date", "sort_order": "asc"},
+    {"status": "revoked"},
+    {"status": "issued", "type": "arrest"},
+    {"judge_id": "J2"},
+    {"subject_name": "MUSA"},
+    {"subject_name": "ade_bayo"},
+    {"subject_name": "%"},
+    {"case_number": "CR/12/2026"},
+    {"date_from": "2026-03-01T10:00:00"},
+    {"date_to": "2026-03-01T10:00:00"},
+    {"date_from": "2026-03-01T09:30:00", "date_to": "2026-03-01T12:00:00", "judge_id": "J1"},
+    {"date_from": "not a date"},
+]
+
+
+@pytest.mark.parametrize("search_params", SEARCHES)
+def test_search_matches_full_scan(service, search_params):
+    async def run():
+        await issue_warrants(service)
+        return [w["id"] for w in await service.search_warrants(search_params)]
+
+    assert asyncio.run(run()) == full_scan(service.storage_path, search_params)
+
+
+def test_search_rebuilds_missing_index(tmp_path):
+    asyncio.run(issue_warrants(WarrantTransferService(storage_path=str(tmp_path))))
+    os.remove(tmp_path / WARRANT_INDEX_FILE)
+
+    service = WarrantTransferService(storage_path=str(tmp_path))
+    for search_params in SEARCHES:
+        found = asyncio.run(service.search_warrants(search_params))
+        assert [w["id"] for w in found] == full_scan(str(tmp_path), search_params)
+
+
+def test_search_forgets_deleted_warrants(service):
+    warrant_ids = asyncio.run(issue_warrants(service))
+    os.remove(os.path.join(service.storage_path, f"{warrant_ids[0]}.json"))
+
+    found = asyncio.run(service.search_warrants({"subject_name": "musa"}))
+    assert [w["id"] for w in found] == full_scan(service.storage_path, {"subject_name": "musa"})
+
+    indexed = {warrant_id for warrant_id, in service._index.execute("SELECT id FROM warrant_index")}
+    assert indexed == set(warrant_ids[1:])
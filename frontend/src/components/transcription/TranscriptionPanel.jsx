@@ -53,7 +53,8 @@ const TranscriptionPanel = ({
         mediaRecorder.ondataavailable = (event) => {
           if (event.data.size > 0) {
             audioChunksRef.current.push(event.data);
-            handleAudioData();
+            // The recorder is already inactive when stop() flushes the last chunk
+            handleAudioData(mediaRecorder.state === 'inactive');
           }
         };
         
@@ -115,7 +116,7 @@ const TranscriptionPanel = ({
   }, [isRecording]);
   
   // Process audio chunks and send to API
-  const handleAudioData = async () => {
+  const handleAudioData = async (isFinal = false) => {
     try {
       if (audioChunksRef.current.length === 0) return;
       
@@ -135,7 +136,9 @@ const TranscriptionPanel = ({
         court_role: currentSpeaker?.role || 'unknown',
         language: language,
         court_room: courtRoom,
-        known_speakers: knownSpeakers
+        known_speakers: knownSpeakers,
+        // Lets the server transcribe the audio it holds back for context
+        is_final: isFinal
       };
       
       formData.append('session_metadata', JSON.stringify(metadata));